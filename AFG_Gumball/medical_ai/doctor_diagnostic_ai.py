@@ -1,6 +1,6 @@
 import os
 from .gemini_client import GeminiAI
-from ..xray_processing import process_xray_image
+from ..xray_processing import process_xray_image, process_xray_batch
 import google.generativeai as genai
 
 
@@ -28,14 +28,14 @@ class DoctorDiagnosticAI:
         if not image_paths or len(image_paths) > self.max_images:
             raise ValueError(f"Số lượng ảnh phải từ 1 đến {self.max_images}")
 
-        pathologies_list = []
-        gradcam_images_list = []
         for img_path in image_paths:
             if not os.path.exists(img_path):
                 raise ValueError(f"Đường dẫn ảnh {img_path} không tồn tại")
-            pathologies, gradcam_images = self.process_xray_image(img_path)
-            pathologies_list.append(pathologies)
-            gradcam_images_list.append(gradcam_images)
+
+        # Xử lý tất cả ảnh trong một lượt forward theo lô
+        results = process_xray_batch(image_paths)
+        pathologies_list = [pathologies for pathologies, _ in results]
+        gradcam_images_list = [gradcam_images for _, gradcam_images in results]
         
         prompt = """
         Bạn là một AI y tế chuyên nghiệp hỗ trợ bác sĩ. Dựa trên thông tin bệnh nhân, triệu chứng, kết quả phân tích ảnh X-quang và ảnh X-quang gốc (nếu có), tạo một bệnh án chi tiết theo các bước:
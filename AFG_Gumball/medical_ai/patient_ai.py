@@ -5,7 +5,7 @@ import io
 import os
 import tempfile
 from typing import Optional, Collection
-from ..xray_processing import process_xray_image
+from ..xray_processing import process_xray_batch
 import google.generativeai as genai
 
 
@@ -81,24 +81,23 @@ class PatientAI:
         temp_files = []
 
         if image_bytes_list:
-            pathologies_list = []
-            gradcam_images_list = []
             for img_bytes in image_bytes_list:
                 try:
                     img = Image.open(io.BytesIO(img_bytes))
                     if img.format != "JPEG":
                         raise ValueError("Ảnh phải ở định dạng JPEG")
                     
-                    # Lưu ảnh tạm để sử dụng với process_xray_image và upload
+                    # Lưu ảnh tạm để sử dụng với process_xray_batch và upload
                     with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
                         img.save(tmp.name, format="JPEG")
                         temp_files.append(tmp.name)
-                    
-                    pathologies, gradcam_images = process_xray_image(temp_files[-1])
-                    pathologies_list.append(pathologies)
-                    gradcam_images_list.append(gradcam_images)
                 except Exception as e:
                     raise RuntimeError(f"Lỗi khi xử lý ảnh: {str(e)}")
+
+            # Xử lý tất cả ảnh trong một lượt forward theo lô
+            results = process_xray_batch(temp_files)
+            pathologies_list = [pathologies for pathologies, _ in results]
+            gradcam_images_list = [gradcam_images for _, gradcam_images in results]
         else:
             pathologies_list, gradcam_images_list = zip(*processed_xrays)
         
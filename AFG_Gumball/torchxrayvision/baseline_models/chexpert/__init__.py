@@ -1,5 +1,5 @@
 import sys, os
-from typing import List
+from typing import List, Tuple
 
 thisfolder = os.path.dirname(__file__)
 sys.path.insert(0, thisfolder)
@@ -34,6 +34,12 @@ class DenseNet(nn.Module):
     ]
     """"""
 
+    resolution: int = 320
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self, weights_zip="", num_models=30):
 
         super(DenseNet, self).__init__()
@@ -58,7 +64,7 @@ class DenseNet(nn.Module):
     def forward(self, x):
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 320, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
@@ -82,7 +88,7 @@ class DenseNet(nn.Module):
     def features(self, x):
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 320, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
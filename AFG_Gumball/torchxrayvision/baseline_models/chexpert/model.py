@@ -7,6 +7,8 @@ import zipfile
 import io
 import tqdm
 
+from ...utils import open_zip, read_zip_member
+
 
 def uncertain_logits_to_probs(logits):
     """Convert explicit uncertainty modeling logits to probabilities P(is_abnormal).
@@ -92,11 +94,19 @@ class DenseNet121(Model):
 
 
 def load_individual(weights_zip, ckpt_path, model_uncertainty, use_gpu=False):
+    """Load one checkpoint of the ensemble from the weights zip.
 
-    with weights_zip.open(ckpt_path) as file:
-
-        stream = io.BytesIO(file.read())
-        ckpt_dict = torch.load(stream, map_location="cpu")
+    Args:
+        weights_zip: Path of the zip file (read through the per-process handle
+            of `open_zip`, stored members are memory-mapped) or an open ZipFile.
+        ckpt_path: Name of the checkpoint inside the zip.
+    """
+    if isinstance(weights_zip, zipfile.ZipFile):
+        with weights_zip.open(ckpt_path) as file:
+            stream = io.BytesIO(file.read())
+    else:
+        stream = io.BytesIO(read_zip_member(weights_zip, ckpt_path, use_mmap=True))
+    ckpt_dict = torch.load(stream, map_location="cpu")
 
     device = 'cuda:0' if use_gpu else 'cpu'
 
@@ -123,7 +133,9 @@ class Tasks2Models(object):
         self.get_config(config_path)
         self.dynamic = dynamic
         self.use_gpu = use_gpu
-        self.weights_zip = zipfile.ZipFile(weights_zip)
+        # Keep the path: an open ZipFile would be shared by forked workers
+        self.weights_zip_path = weights_zip
+        open_zip(weights_zip)
 
         if dynamic:
             model_loader = self.model_iterator
@@ -151,6 +163,10 @@ class Tasks2Models(object):
 
         self.tasks = list(self.task2model_dicts.keys())
 
+    @property
+    def weights_zip(self):
+        return open_zip(self.weights_zip_path)
+
     def get_hashable(self, model_dicts):
         return tuple([tuple(model_dict.items()) for model_dict in model_dicts])
 
@@ -188,7 +204,7 @@ class Tasks2Models(object):
 
                 ckpt_path = model_dict['ckpt_path']
                 model_uncertainty = model_dict['is_3class']
-                model, ckpt_info = load_individual(self.weights_zip, ckpt_path, model_uncertainty, self.use_gpu)
+                model, ckpt_info = load_individual(self.weights_zip_path, ckpt_path, model_uncertainty, self.use_gpu)
 
                 yield model
 
@@ -202,7 +218,7 @@ class Tasks2Models(object):
         for model_dict in toiter:
             ckpt_path = model_dict['ckpt_path']
             model_uncertainty = model_dict['is_3class']
-            model, ckpt_info = load_individual(self.weights_zip, ckpt_path, model_uncertainty, self.use_gpu)
+            model, ckpt_info = load_individual(self.weights_zip_path, ckpt_path, model_uncertainty, self.use_gpu)
 
             loaded_models.append(model)
 
@@ -1,5 +1,5 @@
 import sys, os
-from typing import List
+from typing import List, Tuple
 
 import numpy as np
 import pathlib
@@ -46,6 +46,12 @@ class RaceModel(nn.Module):
     targets: List[str] = ["Asian", "Black", "White"]
     """"""
 
+    resolution: int = 320
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self):
 
         super(RaceModel, self).__init__()
@@ -88,7 +94,7 @@ class RaceModel(nn.Module):
     def forward(self, x):
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 320, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # Expecting values between [-1024,1024]
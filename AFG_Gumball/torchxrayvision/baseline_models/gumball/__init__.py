@@ -3,7 +3,7 @@ import os
 import json
 import pathlib
 from collections import OrderedDict
-from typing import List
+from typing import List, Tuple
 
 import torch
 import torch.nn as nn
@@ -62,6 +62,7 @@ class PSPNet(nn.Module):
 
     params:
         cache_dir (str): Override directory used to store cached weights (default: ~/.torchxrayvision/)
+        optimize (bool): Fold BatchNorms and use channels-last weights, see `utils.optimize_for_inference` (default: True)
 
     """
 
@@ -74,7 +75,13 @@ class PSPNet(nn.Module):
     ]
     """"""
 
-    def __init__(self, cache_dir:str = None):
+    resolution: int = 512
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
+    def __init__(self, cache_dir:str = None, optimize:bool = True):
 
         super(PSPNet, self).__init__()
 
@@ -111,13 +118,15 @@ class PSPNet(nn.Module):
             raise e
 
         model.eval()
+        if optimize:
+            utils.optimize_for_inference(model)
         self.model = model
 
     def forward(self, x):
         
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 512, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
@@ -150,6 +159,15 @@ class DenseNet(nn.Module):
             primaryClass={cs.CV}
         }
 
+    params:
+        apply_sigmoid (bool): Return probabilities instead of logits (default: True)
+        device (str | torch.device): Device to load the model on (default: "cpu"). The classifier is only
+            wrapped in `nn.DataParallel` for "cuda" without an index when several GPUs are visible.
+        fuse_heads (bool): Replace the five classification heads (and their BatchNorms) with a single
+            grouped convolution, see `classifier.FusedClassifier` (default: True). Inference only.
+        optimize (bool): Fold BatchNorms and use channels-last weights, see `utils.optimize_for_inference`
+            (default: True). Inference only.
+
     """
 
     targets: List[str] = [
@@ -161,10 +179,17 @@ class DenseNet(nn.Module):
     ]
     """"""
 
-    def __init__(self, apply_sigmoid=True):
+    resolution: int = 512
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
+    def __init__(self, apply_sigmoid=True, device=None, fuse_heads=True, optimize=True):
 
         super(DenseNet, self).__init__()
         self.apply_sigmoid = apply_sigmoid
+        self.device = torch.device(device or "cpu")
 
         with open(os.path.join(thisfolder, 'config/example.json')) as f:
             self.cfg = json.load(f)
@@ -176,7 +201,6 @@ class DenseNet(nn.Module):
         self.cfg = Struct(**self.cfg)
 
         model = classifier.Classifier(self.cfg)
-        model = nn.DataParallel(model).eval()
 
         url = "https://github.com/KienPC1234/AI-FOR-GOOD-2025-Gumball/releases/download/pthv2/gumball-DenseNet121_pre_train.pth"
 
@@ -192,19 +216,29 @@ class DenseNet(nn.Module):
 
         try:
             ckpt = torch.load(self.weights_filename_local, map_location="cpu")
-            model.module.load_state_dict(ckpt)
+            model.load_state_dict(ckpt)
         except Exception as e:
             print("Loading failure. Check weights file:", self.weights_filename_local)
             raise (e)
 
+        if fuse_heads:
+            model = classifier.FusedClassifier(model)
+        model = model.to(self.device).eval()
+        if optimize:
+            utils.optimize_for_inference(model)
+        # Only split batches when there are several GPUs to split them across;
+        # on CPU DataParallel is a pure scatter/gather overhead.
+        if self.device.type == "cuda" and self.device.index is None and torch.cuda.device_count() > 1:
+            model = nn.DataParallel(model)
+
         self.model = model
 
         self.pathologies = self.targets
 
     def forward(self, x):
-        x = x.repeat(1, 3, 1, 1)
+        x = x.to(self.device).repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 512, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
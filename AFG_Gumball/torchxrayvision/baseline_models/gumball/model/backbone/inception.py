@@ -382,6 +382,9 @@ class InceptionAux(nn.Module):
 
 class BasicConv2d(nn.Module):
 
+    # `forward` applies `norm` right after `conv` (see `utils.optimize_for_inference`)
+    _fuse_pairs = (('conv', 'norm'),)
+
     def __init__(self, in_channels, out_channels, norm_type='Unknown',
                  **kwargs):
         super(BasicConv2d, self).__init__()
@@ -1,3 +1,4 @@
+import torch
 from torch import nn
 
 import torch.nn.functional as F
@@ -161,3 +162,71 @@ class Classifier(nn.Module):
             logits.append(logit)
 
         return (logits, logit_maps)
+
+
+class FusedClassifier(nn.Module):
+    """Inference-only version of a trained `Classifier` with a single fused head.
+
+    The per-head `bn_i` (applied to the pooled features) is folded into `fc_i`, and
+    the folded 1x1 convolutions are concatenated into one grouped convolution, so all
+    heads are evaluated with one conv call. Returns the same logits as
+    `Classifier.forward` in eval mode (the per-head logit maps are not computed).
+
+    The attention map is still applied cumulatively (head `i` sees the feature map
+    after `i + 1` attention passes), because that is what the checkpoints were
+    trained with; applying it once would change the logits of every head but the
+    first.
+    """
+
+    def __init__(self, classifier):
+        super(FusedClassifier, self).__init__()
+        cfg = classifier.cfg
+        if cfg.global_pool == 'PCAM':
+            raise ValueError('PCAM pooling needs the per-head logit maps and cannot be fused')
+        if len(set(cfg.num_classes)) != 1:
+            raise ValueError('Heads with different numbers of classes cannot be grouped')
+
+        self.cfg = cfg
+        self.backbone = classifier.backbone
+        self.global_pool = classifier.global_pool
+        self.attention_map = classifier.attention_map
+        self.num_heads = len(cfg.num_classes)
+
+        weights, biases = [], []
+        for index in range(self.num_heads):
+            fc = getattr(classifier, "fc_" + str(index))
+            # (num_class, C)
+            weight = fc.weight.detach().flatten(1)
+            bias = fc.bias.detach()
+            if cfg.fc_bn:
+                bn = getattr(classifier, "bn_" + str(index))
+                scale = bn.weight.detach() / torch.sqrt(bn.running_var + bn.eps)
+                shift = bn.bias.detach() - bn.running_mean * scale
+                bias = bias + weight @ shift
+                weight = weight * scale
+            weights.append(weight)
+            biases.append(bias)
+
+        in_channels = weights[0].shape[1]
+        self.head = nn.Conv2d(
+            in_channels * self.num_heads,
+            sum(cfg.num_classes),
+            kernel_size=1,
+            groups=self.num_heads,
+            bias=True)
+        with torch.no_grad():
+            self.head.weight.copy_(torch.cat(weights)[:, :, None, None])
+            self.head.bias.copy_(torch.cat(biases))
+        self.eval()
+
+    def forward(self, x):
+        feat_map = self.backbone(x)
+        feats = list()
+        for _ in range(self.num_heads):
+            if self.cfg.attention_map != "None":
+                feat_map = self.attention_map(feat_map)
+            feats.append(self.global_pool(feat_map, None))
+
+        # (N, num_heads * C, 1, 1) -> (N, sum(num_classes))
+        logits = self.head(torch.cat(feats, 1)).flatten(1)
+        return (list(logits.split(self.cfg.num_classes, 1)), list())
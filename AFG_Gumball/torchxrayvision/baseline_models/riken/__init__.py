@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Tuple
 
 import torch
 import torch.nn as nn
@@ -50,6 +50,12 @@ class AgeModel(nn.Module):
     targets: List[str] = ["Age"]
     """"""
 
+    resolution: int = 320
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self):
 
         super(AgeModel, self).__init__()
@@ -80,7 +86,7 @@ class AgeModel(nn.Module):
     def forward(self, x):
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 320, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Tuple
 
 import torch
 import torch.nn as nn
@@ -39,6 +39,12 @@ class ViewModel(nn.Module):
     targets: List[str] = ['Frontal', 'Lateral']
     """"""
 
+    resolution: int = 224
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self):
 
         super(ViewModel, self).__init__()
@@ -72,7 +78,7 @@ class ViewModel(nn.Module):
     def forward(self, x):
         x = x.repeat(1, 3, 1, 1)
         
-        x = utils.fix_resolution(x, 224, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         # expecting values between [-1024,1024]
@@ -6,7 +6,6 @@ import random
 import sys
 import tarfile
 import warnings
-import zipfile
 
 import imageio
 import numpy as np
@@ -17,6 +16,7 @@ import skimage.transform
 from skimage.io import imread
 import torch
 from torchvision import transforms
+from tqdm.autonotebook import tqdm
 from . import utils
 
 default_pathologies = [
@@ -122,6 +122,68 @@ exist in the dataset then a NaN will be put in place of the label.
     dataset.pathologies = pathologies
 
 
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _group_rows(keys, where=None):
+    """Groups row positions by key so a per-image lookup is a dict access
+    instead of a scan over the whole annotation csv.
+
+    Args:
+        :keys: One key (e.g. image id) per row.
+        :where: Optional boolean array, only rows where it is True are indexed.
+
+    Returns a dict of key -> array of row positions, in csv order.
+    """
+    keys = np.asarray(keys)
+    positions = np.arange(len(keys)) if where is None else np.flatnonzero(where)
+    keys = keys[positions]
+    order = np.argsort(keys, kind="stable")
+    unique, starts = np.unique(keys[order], return_index=True)
+    return dict(zip(unique.tolist(), np.split(positions[order], starts[1:])))
+
+
+def rle_decode(rle, width, height, size=None):
+    """Decodes a run-length encoded mask (the SIIM/Kaggle format) into a
+    uint8 image of 0 and 1.
+
+    The runs are (offset, length) pairs over the pixels in column-major
+    order, each offset counted from the end of the previous run.
+
+    Args:
+        :rle: The encoded pixels, space separated integers.
+        :width: Width of the encoded image.
+        :height: Height of the encoded image.
+        :size: Optional (height, width) to decode straight to, taking the
+            nearest pixel like `skimage.transform.resize(..., order=0)` does
+            for integer images, without allocating the full size mask.
+    """
+    runs = np.array(rle.split(), dtype=np.int64)
+    lengths = runs[1::2]
+    ends = np.cumsum(runs[0::2] + lengths)
+    starts = ends - lengths
+
+    out_height, out_width = (height, width) if size is None else tuple(size)
+    if (out_height, out_width) == (height, width):
+        # Set the covered pixels directly, the encoding is column-major
+        starts = np.minimum(starts, width * height)
+        lengths = np.minimum(ends, width * height) - starts
+        covered = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        mask = np.zeros(width * height, dtype=np.uint8)
+        mask[covered] = 1
+        return np.ascontiguousarray(mask.reshape(width, height).T)
+
+    rows = (2 * np.arange(out_height) + 1) * height // (2 * out_height)
+    cols = (2 * np.arange(out_width) + 1) * width // (2 * out_width)
+
+    # Column-major position of every output pixel, then the run it may fall in
+    positions = cols[None, :] * height + rows[:, None]
+    run = np.searchsorted(ends, positions, side="right")
+    inside = run < len(ends)
+    inside[inside] = starts[run[inside]] <= positions[inside]
+    return inside.view(np.uint8)
+
+
 class Dataset:
     """The datasets in this library aim to fit a simple interface where the
     imgpath and csvpath are specified. Some datasets require more than one
@@ -151,7 +213,8 @@ class Dataset:
     referenced publication should explain each field. Each row aligns with 
     the elements of the dataset so indexing using .iloc will work. Alignment 
     between the DataFrame and the dataset items will be maintained when using 
-    tools from this library. """
+    tools from this library. `__getitem__` does not read it: the columns it
+    needs are copied to NumPy arrays (e.g. `.imgids`) at construction time. """
 
     def totals(self) -> Dict[str, Dict[str, int]]:
         """Compute counts of pathologies.
@@ -380,6 +443,142 @@ class SubsetDataset(Dataset):
         return self.dataset[self.idxs[idx]]
 
 
+CACHE_IMAGES = "images.npy"
+CACHE_INDEX = "index.npz"
+CACHE_CSV = "csv.csv.gz"
+
+
+def _quantize(img, dtype):
+    maxval = np.iinfo(dtype).max
+    img = (img + 1024) * (maxval / 2048)
+    return np.clip(np.rint(img, out=img), 0, maxval, out=img).astype(dtype)
+
+
+def build_cache(dataset, resolution, dtype=np.uint8, path=None, num_workers=0):
+    """Write the images of a dataset into a single packed, memory-mappable
+    array so it can be served by `CachedDataset` without decoding, 
+    normalizing or resizing anything.
+
+    Each image is center cropped and resized to `resolution` (unless the
+    dataset transform already produced that size), then stored as
+    uint8/uint16 in `path/images.npy`. The labels, pathologies and the
+    dataset index of every row go to `path/index.npz`, and `.csv` (if any)
+    to `path/csv.csv.gz`.
+
+    8-bit images that are not resampled round-trip exactly with uint8. For
+    16-bit sources or resampled images use uint16, which is within
+    2048 / 65535 of the float image.
+
+    .. code-block:: python
+
+        d = xrv.datasets.NIH_Dataset(imgpath="...")
+        xrv.datasets.build_cache(d, 224, np.uint8, "nih-224")
+        cached = xrv.datasets.CachedDataset("nih-224")
+
+    Args:
+        :dataset: The dataset to cache. `data_aug` must be None, random
+            augmentation would be frozen into the cache.
+        :resolution: Side of the square images in the cache.
+        :dtype: np.uint8 or np.uint16.
+        :path: Output directory (default: `<dataset class>-<resolution>`).
+        :num_workers: DataLoader workers used to read the dataset.
+
+    Returns: The cache directory.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.uint8, np.uint16):
+        raise ValueError("dtype must be np.uint8 or np.uint16")
+    if getattr(dataset, "data_aug", None) is not None:
+        raise ValueError("Set data_aug=None before caching, augmentation must run after loading from the cache")
+
+    path = path or "{}-{}".format(dataset.__class__.__name__, resolution)
+    os.makedirs(path, exist_ok=True)
+
+    images = np.lib.format.open_memmap(os.path.join(path, CACHE_IMAGES), mode="w+", dtype=dtype,
+                                       shape=(len(dataset), resolution, resolution))
+    crop = XRayCenterCrop()
+    resize = XRayResizer(resolution)
+
+    loader = torch.utils.data.DataLoader(dataset, batch_size=None, num_workers=num_workers)
+    for row, sample in enumerate(tqdm(loader, total=len(dataset))):
+        img = np.asarray(sample["img"], dtype=np.float32)
+        if img.ndim == 2:
+            img = img[None, :, :]
+        if img.shape[1:] != (resolution, resolution):
+            img = resize(crop(img))
+        images[row] = _quantize(img[0], dtype)
+    images.flush()
+    del images
+
+    np.savez(os.path.join(path, CACHE_INDEX),
+             labels=np.asarray(dataset.labels, dtype=np.float32),
+             pathologies=np.asarray(dataset.pathologies, dtype=str),
+             source_idx=np.arange(len(dataset)),
+             source=np.asarray(dataset.string() if hasattr(dataset, "string") else repr(dataset)))
+    if getattr(dataset, "csv", None) is not None:
+        dataset.csv.to_csv(os.path.join(path, CACHE_CSV), index=False)
+    return path
+
+
+class CachedDataset(Dataset):
+    """Serves a dataset written by `build_cache`.
+
+    Images are read from a memory-mapped array: a sample is a zero-copy
+    slice of the cache, dequantized to the usual float32 [-1024, 1024]
+    `[1, H, W]` image. `transform` and `data_aug` are applied as in the other
+    datasets. Masks are not cached.
+
+    .. code-block:: python
+
+        cached = xrv.datasets.CachedDataset("nih-224", data_aug=...)
+        # Output:
+        CachedDataset num_samples=30805 resolution=224 dtype=uint8
+        └ of NIH_Dataset num_samples=30805 views=['PA'] data_aug=None
+    """
+
+    def __init__(self, path, transform=None, data_aug=None):
+        super(CachedDataset, self).__init__()
+        self.path = path
+        self.transform = transform
+        self.data_aug = data_aug
+
+        self.images = np.load(os.path.join(path, CACHE_IMAGES), mmap_mode="r")
+        self.maxval = np.iinfo(self.images.dtype).max
+
+        with np.load(os.path.join(path, CACHE_INDEX)) as index:
+            self.labels = index["labels"]
+            self.pathologies = index["pathologies"].tolist()
+            self.source_idx = index["source_idx"]
+            self.source = str(index["source"])
+
+        csvpath = os.path.join(path, CACHE_CSV)
+        self.csv = pd.read_csv(csvpath) if os.path.isfile(csvpath) else None
+
+    def string(self):
+        return self.__class__.__name__ + " num_samples={} resolution={} dtype={}\n".format(
+            len(self), self.images.shape[-1], self.images.dtype) + "└ of " + self.source.replace("\n", "\n  ")
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get_raw(self, idx) -> np.ndarray:
+        """The stored uint8/uint16 image, a read-only view into the cache."""
+        return self.images[idx]
+
+    def __getitem__(self, idx):
+        sample = {}
+        sample["idx"] = idx
+        sample["lab"] = self.labels[idx]
+
+        img = self.images[idx]
+        sample["img"] = ((2 * (img.astype(np.float32) / self.maxval) - 1.) * 1024)[None, :, :]
+
+        sample = apply_transforms(sample, self.transform)
+        sample = apply_transforms(sample, self.data_aug)
+
+        return sample
+
+
 class NIH_Dataset(Dataset):
     """NIH ChestX-ray14 dataset
 
@@ -467,6 +666,9 @@ class NIH_Dataset(Dataset):
         # change label name to match
         self.pathology_maskscsv.loc[self.pathology_maskscsv["Finding Label"] == "Infiltrate", "Finding Label"] = "Infiltration"
         self.csv["has_masks"] = self.csv["Image Index"].isin(self.pathology_maskscsv["Image Index"])
+        self.mask_index = None
+        if self.pathology_masks:
+            self.index_masks()
 
         ####### pathology masks ########
         # Get our classes.
@@ -492,6 +694,8 @@ class NIH_Dataset(Dataset):
         self.csv['sex_male'] = self.csv['Patient Gender'] == 'M'
         self.csv['sex_female'] = self.csv['Patient Gender'] == 'F'
 
+        self.imgids = self.csv['Image Index'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -503,7 +707,7 @@ class NIH_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['Image Index'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid)
         img = imread(img_path)
 
@@ -517,20 +721,29 @@ class NIH_Dataset(Dataset):
 
         return sample
 
+    def index_masks(self):
+        """Groups the bounding boxes by image once, so get_mask_dict
+        does not scan the whole bbox csv for every sample."""
+        self.mask_index = _group_rows(self.pathology_maskscsv["Image Index"].to_numpy())
+        self.mask_labels = self.pathology_maskscsv["Finding Label"].to_numpy()
+        self.mask_boxes = self.pathology_maskscsv[["x", "y", "w", "h"]].to_numpy(dtype=float)
+
     def get_mask_dict(self, image_name, this_size):
         base_size = 1024
         scale = this_size / base_size
 
-        images_with_masks = self.pathology_maskscsv[self.pathology_maskscsv["Image Index"] == image_name]
+        if self.mask_index is None:
+            self.index_masks()
+        rows = self.mask_index.get(image_name, _NO_ROWS)
         path_mask = {}
 
-        for i in range(len(images_with_masks)):
-            row = images_with_masks.iloc[i]
+        for row in rows:
+            label = self.mask_labels[row]
 
             # Don't add masks for labels we don't have
-            if row["Finding Label"] in self.pathologies:
+            if label in self.pathologies:
                 mask = np.zeros([this_size, this_size])
-                xywh = np.asarray([row.x, row.y, row.w, row.h])
+                xywh = self.mask_boxes[row]
                 xywh = xywh * scale
                 xywh = xywh.astype(int)
                 mask[xywh[1]:xywh[1] + xywh[3], xywh[0]:xywh[0] + xywh[2]] = 1
@@ -538,7 +751,7 @@ class NIH_Dataset(Dataset):
                 # Resize so image resizing works
                 mask = mask[None, :, :]
 
-                path_mask[self.pathologies.index(row["Finding Label"])] = mask
+                path_mask[self.pathologies.index(label)] = mask
         return path_mask
 
 
@@ -635,6 +848,12 @@ class RSNA_Pneumonia_Dataset(Dataset):
         # patientid
         self.csv["patientid"] = self.csv["patientId"].astype(str)
 
+        self.mask_index = None
+        if self.pathology_masks:
+            self.index_masks()
+
+        self.imgids = self.csv['patientId'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -646,7 +865,7 @@ class RSNA_Pneumonia_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['patientId'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid + self.extension)
 
         if self.use_pydicom:
@@ -669,12 +888,20 @@ class RSNA_Pneumonia_Dataset(Dataset):
 
         return sample
 
+    def index_masks(self):
+        """Groups the bounding boxes by patient once, so get_mask_dict
+        does not scan the whole raw csv for every sample."""
+        self.mask_index = _group_rows(self.raw_csv["patientId"].to_numpy())
+        self.mask_boxes = self.raw_csv[["x", "y", "width", "height"]].to_numpy(dtype=float)
+
     def get_mask_dict(self, image_name, this_size):
 
         base_size = 1024
         scale = this_size / base_size
 
-        images_with_masks = self.raw_csv[self.raw_csv["patientId"] == image_name]
+        if self.mask_index is None:
+            self.index_masks()
+        rows = self.mask_index.get(image_name, _NO_ROWS)
         path_mask = {}
 
         # All masks are for both pathologies
@@ -684,9 +911,8 @@ class RSNA_Pneumonia_Dataset(Dataset):
             # Don't add masks for labels we don't have
             if patho in self.pathologies:
 
-                for i in range(len(images_with_masks)):
-                    row = images_with_masks.iloc[i]
-                    xywh = np.asarray([row.x, row.y, row.width, row.height])
+                for row in rows:
+                    xywh = self.mask_boxes[row]
                     xywh = xywh * scale
                     xywh = xywh.astype(int)
                     mask[xywh[1]:xywh[1] + xywh[3], xywh[0]:xywh[0] + xywh[2]] = 1
@@ -771,6 +997,8 @@ class NIH_Google_Dataset(Dataset):
         self.pathologies = np.char.replace(self.pathologies, "Nodule or mass", "Nodule/Mass")
         self.pathologies = list(self.pathologies)
 
+        self.imgids = self.csv['Image Index'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -782,7 +1010,7 @@ class NIH_Google_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['Image Index'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid)
         img = imread(img_path)
 
@@ -946,6 +1174,8 @@ class PC_Dataset(Dataset):
         self.csv['sex_male'] = self.csv['PatientSex_DICOM'] == 'M'
         self.csv['sex_female'] = self.csv['PatientSex_DICOM'] == 'F'
 
+        self.imgids = self.csv['ImageID'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -957,7 +1187,7 @@ class PC_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['ImageID'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid)
         img = imread(img_path)
 
@@ -1084,6 +1314,9 @@ class CheX_Dataset(Dataset):
         self.csv['sex_male'] = self.csv['Sex'] == 'Male'
         self.csv['sex_female'] = self.csv['Sex'] == 'Female'
 
+        # clean up path in csv so the user can specify the path
+        self.imgids = self.csv['Path'].str.replace("CheXpert-v1.0-small/", "", regex=False).str.replace("CheXpert-v1.0/", "", regex=False).to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -1095,9 +1328,7 @@ class CheX_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['Path'].iloc[idx]
-        # clean up path in csv so the user can specify the path
-        imgid = imgid.replace("CheXpert-v1.0-small/", "").replace("CheXpert-v1.0/", "")
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid)
         img = imread(img_path)
 
@@ -1200,6 +1431,10 @@ class MIMIC_Dataset(Dataset):
         # patientid
         self.csv["patientid"] = self.csv["subject_id"].astype(str)
 
+        self.subjectids = self.csv["subject_id"].astype(str).to_numpy()
+        self.studyids = self.csv["study_id"].astype(str).to_numpy()
+        self.dicomids = self.csv["dicom_id"].astype(str).to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -1211,9 +1446,9 @@ class MIMIC_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        subjectid = str(self.csv.iloc[idx]["subject_id"])
-        studyid = str(self.csv.iloc[idx]["study_id"])
-        dicom_id = str(self.csv.iloc[idx]["dicom_id"])
+        subjectid = self.subjectids[idx]
+        studyid = self.studyids[idx]
+        dicom_id = self.dicomids[idx]
 
         img_path = os.path.join(self.imgpath, "p" + subjectid[:2], "p" + subjectid, "s" + studyid, dicom_id + ".jpg")
         img = imread(img_path)
@@ -1365,6 +1600,8 @@ class Openi_Dataset(Dataset):
         # patientid
         self.csv["patientid"] = self.csv["uid"].astype(str)
 
+        self.imgids = self.csv['imageid'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={}".format(len(self))
 
@@ -1376,7 +1613,7 @@ class Openi_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imageid = self.csv.iloc[idx].imageid
+        imageid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imageid + ".png")
         img = imread(img_path)
 
@@ -1473,14 +1710,15 @@ class COVID19_Dataset(Dataset):
         self.csv = self.csv.reset_index()
 
         if self.semantic_masks:
-            temp = zipfile.ZipFile(self.semantic_masks_v7labs_lungs_path)
-            self.semantic_masks_v7labs_lungs_namelist = temp.namelist()
+            self.semantic_masks_v7labs_lungs_namelist = utils.open_zip(self.semantic_masks_v7labs_lungs_path).namelist()
 
         # add consistent csv values
 
         # offset_day_int
         self.csv["offset_day_int"] = self.csv["offset"]
 
+        self.imgids = self.csv['filename'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -1492,7 +1730,7 @@ class COVID19_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['filename'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid)
         img = imread(img_path)
 
@@ -1511,14 +1749,13 @@ class COVID19_Dataset(Dataset):
         archive_path = "semantic_masks_v7labs_lungs/" + image_name
         semantic_masks = {}
         if archive_path in self.semantic_masks_v7labs_lungs_namelist:
-            with zipfile.ZipFile(self.semantic_masks_v7labs_lungs_path).open(archive_path) as file:
-                mask = imageio.imread(file.read())
+            mask = imageio.imread(utils.read_zip_member(self.semantic_masks_v7labs_lungs_path, archive_path))
 
-                mask = (mask == 255).astype(np.float)
-                # Reshape so image resizing works
-                mask = mask[None, :, :]
+            mask = (mask == 255).astype(np.float64)
+            # Reshape so image resizing works
+            mask = mask[None, :, :]
 
-                semantic_masks["Lungs"] = mask
+            semantic_masks["Lungs"] = mask
 
         return semantic_masks
 
@@ -1584,6 +1821,8 @@ class NLMTB_Dataset(Dataset):
         self.labels = self.csv["label"].values.reshape(-1, 1)
         self.pathologies = ["Tuberculosis"]
 
+        self.imgids = self.csv['fname'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -1596,8 +1835,7 @@ class NLMTB_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        item = self.csv.iloc[idx]
-        img_path = os.path.join(self.imgpath, "CXR_png", item["fname"])
+        img_path = os.path.join(self.imgpath, "CXR_png", self.imgids[idx])
         img = imread(img_path)
 
         sample["img"] = normalize(img, maxval=255, reshape=True)
@@ -1654,6 +1892,9 @@ class SIIM_Pneumothorax_Dataset(Dataset):
         self.csv = self.csv.reset_index()
 
         self.csv["has_masks"] = self.csv[" EncodedPixels"] != "-1"
+        self.mask_index = None
+        if self.pathology_masks:
+            self.index_masks()
 
         # To figure out the paths
         # TODO: make faster
@@ -1666,6 +1907,8 @@ class SIIM_Pneumothorax_Dataset(Dataset):
             _cache_dict["siim_file_map"] = file_map
         self.file_map = _cache_dict["siim_file_map"]
 
+        self.imgids = self.csv['ImageId'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} data_aug={}".format(len(self), self.data_aug)
 
@@ -1677,7 +1920,7 @@ class SIIM_Pneumothorax_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['ImageId'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = self.file_map[imgid + ".dcm"]
 
         try:
@@ -1696,42 +1939,30 @@ class SIIM_Pneumothorax_Dataset(Dataset):
 
         return sample
 
+    def index_masks(self):
+        """Groups the encoded masks by image once, so get_pathology_mask_dict
+        does not scan the whole csv for every sample."""
+        self.mask_index = _group_rows(self.csv["ImageId"].to_numpy(), where=self.csv["has_masks"].to_numpy())
+        self.mask_rles = self.csv[" EncodedPixels"].to_numpy()
+
     def get_pathology_mask_dict(self, image_name, this_size):
 
         base_size = 1024
-        images_with_masks = self.csv[np.logical_and(self.csv["ImageId"] == image_name,
-                                                    self.csv[" EncodedPixels"] != "-1")]
+        if self.mask_index is None:
+            self.index_masks()
+        rows = self.mask_index.get(image_name, _NO_ROWS)
         path_mask = {}
 
-        # From kaggle code
-        def rle2mask(rle, width, height):
-            mask = np.zeros(width * height)
-            array = np.asarray([int(x) for x in rle.split()])
-            starts = array[0::2]
-            lengths = array[1::2]
-
-            current_position = 0
-            for index, start in enumerate(starts):
-                current_position += start
-                mask[current_position:current_position + lengths[index]] = 1
-                current_position += lengths[index]
-
-            return mask.reshape(width, height)
-
-        if len(images_with_masks) > 0:
+        if len(rows) > 0:
             # Using a for loop so it is consistent with the other code
             for patho in ["Pneumothorax"]:
                 mask = np.zeros([this_size, this_size])
 
                 # don't add masks for labels we don't have
                 if patho in self.pathologies:
-
-                    for i in range(len(images_with_masks)):
-                        row = images_with_masks.iloc[i]
-                        mask = rle2mask(row[" EncodedPixels"], base_size, base_size)
-                        mask = mask.T
-                        mask = skimage.transform.resize(mask, (this_size, this_size), mode='constant', order=0)
-                        mask = mask.round()  # make 0,1
+                    # Each row replaced the previous mask, so only the last one is decoded
+                    mask = rle_decode(self.mask_rles[rows[-1]], base_size, base_size, (this_size, this_size))
+                    mask = mask.astype(np.float64)
 
                 # reshape so image resizing works
                 mask = mask[None, :, :]
@@ -1825,6 +2056,12 @@ class VinBrain_Dataset(Dataset):
 
         self.csv = self.csv.reset_index()
 
+        self.mask_index = None
+        if self.pathology_masks:
+            self.index_masks()
+
+        self.imgids = self.csv['image_id'].to_numpy()
+
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
 
@@ -1836,7 +2073,7 @@ class VinBrain_Dataset(Dataset):
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
 
-        imgid = self.csv['image_id'].iloc[idx]
+        imgid = self.imgids[idx]
         img_path = os.path.join(self.imgpath, imgid + ".dicom")
 
         try:
@@ -1873,20 +2110,31 @@ class VinBrain_Dataset(Dataset):
 
         return sample
 
+    def index_masks(self):
+        """Groups the bounding boxes by image once, so get_mask_dict
+        does not filter and regroup the whole raw csv for every sample."""
+        self.mask_index = _group_rows(self.rawcsv["image_id"].to_numpy())
+        self.mask_classes = self.rawcsv["class_name"].to_numpy()
+        self.mask_boxes = self.rawcsv[["y_min", "y_max", "x_min", "x_max"]].to_numpy(dtype=float)
+
     def get_mask_dict(self, image_name, this_size):
 
         c, h, w = this_size
 
         path_mask = {}
-        rows = self.rawcsv[self.rawcsv.image_id.str.contains(image_name)]
+        if self.mask_index is None:
+            self.index_masks()
+        rows = self.mask_index.get(image_name, _NO_ROWS)
+        classes = self.mask_classes[rows]
 
         for i, pathology in enumerate(self.pathologies):
-            for group_name, df_group in rows.groupby("class_name"):
+            for group_name in np.unique(classes):
                 if (group_name.lower() == pathology.lower()) or ((pathology in self.mapping) and (group_name in self.mapping[pathology])):
 
                     mask = np.zeros([h, w])
-                    for idx, row in df_group.iterrows():
-                        mask[int(row.y_min):int(row.y_max), int(row.x_min):int(row.x_max)] = 1
+                    for row in rows[classes == group_name]:
+                        y_min, y_max, x_min, x_max = self.mask_boxes[row]
+                        mask[int(y_min):int(y_max), int(x_min):int(x_max)] = 1
 
                     path_mask[i] = mask[None, :, :]
 
@@ -1988,6 +2236,10 @@ class ObjectCXR_Dataset(Dataset):
     https://jfhealthcare.github.io/object-CXR/
 
     https://academictorrents.com/details/fdc91f11d7010f7259a05403fc9d00079a09f5d5
+
+    The images are read from the zip file through one handle per process
+    (see `utils.open_zip`). With use_mmap=True, images stored without
+    compression are sliced out of a memory map of the archive instead.
     """
 
     def __init__(self,
@@ -1995,12 +2247,14 @@ class ObjectCXR_Dataset(Dataset):
                  csvpath,
                  transform=None,
                  data_aug=None,
-                 seed=0
+                 seed=0,
+                 use_mmap=False
                  ):
         super(ObjectCXR_Dataset, self).__init__()
 
         np.random.seed(seed)  # Reset the seed so all runs are the same.
         self.imgzippath = imgzippath
+        self.use_mmap = use_mmap
         self.csvpath = csvpath
         self.transform = transform
         self.data_aug = data_aug
@@ -2019,7 +2273,16 @@ class ObjectCXR_Dataset(Dataset):
 
         self.csv["has_masks"] = ~self.csv["annotation"].isnull()
 
-        self.imgzip = zipfile.ZipFile(self.imgzippath)
+        # Opened up front so a bad path fails here, not in a DataLoader worker
+        utils.open_zip(self.imgzippath)
+        if self.use_mmap:
+            utils.zip_member_offsets(self.imgzippath)
+
+        self.imgids = self.csv['image_name'].to_numpy()
+
+    @property
+    def imgzip(self):
+        return utils.open_zip(self.imgzippath)
 
     def string(self):
         return self.__class__.__name__ + " num_samples={} views={} data_aug={}".format(len(self), self.views, self.data_aug)
@@ -2032,10 +2295,9 @@ class ObjectCXR_Dataset(Dataset):
         sample = {}
         sample["idx"] = idx
         sample["lab"] = self.labels[idx]
-        imgid = self.csv.iloc[idx]["image_name"]
+        imgid = self.imgids[idx]
 
-        with zipfile.ZipFile(self.imgzippath).open("train/" + imgid) as file:
-            sample["img"] = imageio.imread(file.read())
+        sample["img"] = imageio.imread(utils.read_zip_member(self.imgzippath, "train/" + imgid, self.use_mmap))
 
         sample["img"] = normalize(sample["img"], maxval=255, reshape=True)
 
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 import torch
 import torch.nn as nn
@@ -106,6 +106,22 @@ class Model:
     to pathology names as follows:
     """
 
+    resolution: int
+    """Each classifier publishes the square input resolution it was trained
+    on. Inputs of another size are resized inside `forward`, which costs an
+    interpolation per batch, so preprocess straight to this size instead:
+
+    .. code-block:: python
+
+        img = xrv.utils.load_image(path)  # [-1024, 1024]
+        img = skimage.transform.resize(img, (1, model.resolution, model.resolution))
+    """
+
+    normalization: Tuple[float, float]
+    """The input pixel range the model expects, (-1024, 1024) for every
+    model in the library.
+    """
+
     def features(self, x: torch.Tensor) -> torch.Tensor:
         """The pre-trained models can also be used as features extractors for
         semi-supervised training or transfer learning tasks. A feature vector
@@ -220,6 +236,12 @@ class DenseNet(nn.Module):
     ]
     """"""
 
+    resolution: int = 224
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self,
                  growth_rate=32,
                  block_config=(6, 12, 24, 16),
@@ -320,7 +342,7 @@ class DenseNet(nn.Module):
             return "XRV-DenseNet"
 
     def features2(self, x):
-        x = utils.fix_resolution(x, 224, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         features = self.features(x)
@@ -329,7 +351,7 @@ class DenseNet(nn.Module):
         return out
 
     def forward(self, x):
-        x = utils.fix_resolution(x, 224, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         features = self.features2(x)
@@ -385,6 +407,12 @@ class ResNet(nn.Module):
     ]
     """"""
 
+    resolution: int = 512
+    """Native (square) input resolution. Inputs of another size are resized in `forward`."""
+
+    normalization: Tuple[float, float] = (-1024, 1024)
+    """Expected input pixel range."""
+
     def __init__(self, weights: str = None, apply_sigmoid: bool = False, cache_dir: str = None):
         super(ResNet, self).__init__()
 
@@ -428,7 +456,7 @@ class ResNet(nn.Module):
             return "XRV-ResNet"
 
     def features(self, x):
-        x = utils.fix_resolution(x, 512, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         x = self.model.conv1(x)
@@ -446,7 +474,7 @@ class ResNet(nn.Module):
         return x
 
     def forward(self, x):
-        x = utils.fix_resolution(x, 512, self)
+        x = utils.fix_resolution(x, self.resolution, self)
         utils.warn_normalization(x)
 
         out = self.model(x)
@@ -4,6 +4,9 @@ import numpy as np
 import skimage
 import torch
 import os
+import mmap
+import struct
+import zipfile
 
 from os import PathLike
 from numpy import ndarray
@@ -85,21 +88,112 @@ def load_image(fname: str):
     return img
 
 
-def read_xray_dcm(path: PathLike, voi_lut: bool = False, fix_monochrome: bool = True) -> ndarray:
+def _import_pydicom():
+    try:
+        import pydicom
+    except ImportError:
+        raise Exception("Missing Package Pydicom. Try installing it by running `pip install pydicom`.")
+    return pydicom
+
+
+def read_xray_dcm_header(path):
+    """Read only the header of a dicom-like file (`stop_before_pixels`) and
+    check that it holds a supported X-ray image.
+
+    Args:
+        path: path or file-like object of the dicom file
+
+    Returns:
+        pydicom Dataset without pixel data
+    """
+    pydicom = _import_pydicom()
+
+    ds = pydicom.dcmread(path, force=True, stop_before_pixels=True)
+
+    for tag in ("PhotometricInterpretation", "Rows", "Columns", "BitsStored"):
+        if tag not in ds:
+            raise ValueError(f"Missing DICOM tag `{tag}`, this does not look like an X-ray image.")
+
+    # we have not tested RGB, YBR_FULL, or YBR_FULL_422 yet.
+    if ds.PhotometricInterpretation not in ['MONOCHROME1', 'MONOCHROME2']:
+        raise NotImplementedError(f'PhotometricInterpretation `{ds.PhotometricInterpretation}` is not yet supported.')
+    return ds
+
+
+def downsample_integer(data: ndarray, factor: int) -> ndarray:
+    """Shrink an integer image by averaging `factor` x `factor` blocks,
+    without going through float. Trailing rows/columns that don't fill a
+    block are dropped."""
+    if factor <= 1:
+        return data
+
+    h, w = data.shape[0] // factor, data.shape[1] // factor
+    blocks = data[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    summed = blocks.sum(axis=(1, 3), dtype=np.uint32)
+    summed += (factor * factor) // 2  # round to nearest
+    summed //= factor * factor
+    return summed.astype(data.dtype)
+
+
+def read_xray_dcm_uint(path, fix_monochrome: bool = True, min_size: int = None):
+    """Decode the pixels of a dicom-like file once, as uint16.
+
+    Args:
+        path: path or file-like object of the dicom file
+        fix_monochrome (bool, optional): Convert dicom interpretation MONOCHROME1 to MONOCHROME2. Defaults to True.
+        min_size (int, optional): downsample by the largest integer factor that
+            keeps the short side >= `min_size`, before any float conversion.
+
+    Signed images (`PixelRepresentation` 1) are shifted by 2**(BitsStored-1),
+    so their full range maps onto [0, max possible pixel value].
+
+    Returns:
+        tuple: (uint16 2D image, max possible pixel value from the header)
+    """
+    pydicom = _import_pydicom()
+
+    ds = pydicom.dcmread(path, force=True)
+    if ds.PhotometricInterpretation not in ['MONOCHROME1', 'MONOCHROME2']:
+        raise NotImplementedError(f'PhotometricInterpretation `{ds.PhotometricInterpretation}` is not yet supported.')
+    max_possible_pixel_val = (2**ds.BitsStored - 1)
+
+    data = ds.pixel_array
+    if ds.get("PixelRepresentation", 0) == 1:
+        # Signed pixels: shift [-2**(BitsStored-1), 2**(BitsStored-1)) to [0, 2**BitsStored)
+        # so the cast does not wrap negatives around to ~65535
+        data = (data.astype(np.int32) + 2**(ds.BitsStored - 1)).astype(np.uint16)
+    elif data.dtype != np.uint16:
+        data = data.astype(np.uint16)
+
+    if min_size:
+        data = downsample_integer(data, min(data.shape[:2]) // min_size)
+
+    # `MONOCHROME1` have an inverted view; Bones are black; background is white
+    if fix_monochrome and ds.PhotometricInterpretation == "MONOCHROME1":
+        warnings.warn(f"Coverting MONOCHROME1 to MONOCHROME2 interpretation for file: {path}. Can be avoided by setting `fix_monochrome=False`")
+        data = np.subtract(max_possible_pixel_val, data, dtype=np.uint16)
+
+    return data, max_possible_pixel_val
+
+
+def read_xray_dcm(path: PathLike, voi_lut: bool = False, fix_monochrome: bool = True, min_size: int = None) -> ndarray:
     """read a dicom-like file and convert to numpy array 
 
     Args:
         path (PathLike): path to the dicom file
         voi_lut (bool, optional): transform image to be human viewable. Defaults to False.
         fix_monochrome (bool, optional): Convert dicom interpretation MONOCHROME1 to MONOCHROME2. Defaults to True.
+        min_size (int, optional): downsample by an integer factor (keeping the
+            short side >= `min_size`) before converting to float. Not applied with `voi_lut`.
 
     Returns:
         ndarray: 2D single array image for a dicom image scaled between -1024, 1024
     """
-    try:
-        import pydicom
-    except ImportError:
-        raise Exception("Missing Package Pydicom. Try installing it by running `pip install pydicom`.")
+    pydicom = _import_pydicom()
+
+    if not voi_lut:
+        data, max_possible_pixel_val = read_xray_dcm_uint(path, fix_monochrome, min_size)
+        return normalize(data, max_possible_pixel_val)
 
     # get the pixel array
     ds = pydicom.dcmread(path, force=True)
@@ -113,8 +207,7 @@ def read_xray_dcm(path: PathLike, voi_lut: bool = False, fix_monochrome: bool =
     data = ds.pixel_array
     
     # LUT for human friendly view
-    if voi_lut:
-        data = pydicom.pixel_data_handlers.util.apply_voi_lut(data, ds, index=0)
+    data = pydicom.pixel_data_handlers.util.apply_voi_lut(data, ds, index=0)
 
     # `MONOCHROME1` have an inverted view; Bones are black; background is white
     # https://web.archive.org/web/20150920230923/http://www.mccauslandcenter.sc.edu/mricro/dicom/index.html
@@ -147,9 +240,16 @@ def infer(model: torch.nn.Module, dataset: torch.utils.data.Dataset, threads=4,
 
 
 warning_log = {}
+resize_fallback_count = {}
 
 def fix_resolution(x, resolution: int, model):
-    """Check resolution of input and resize to match requested."""
+    """Check resolution of input and resize to match requested.
+
+    This is only a shape check when the input is already at the native
+    resolution (see `model.resolution`). The resize fallback is counted per
+    model in `resize_fallback_count` so callers that forget to preprocess at
+    the right size can be found (see `get_resize_fallback_count`).
+    """
 
     if len(x.shape) == 3:
         # Extend to be 4D
@@ -159,6 +259,8 @@ def fix_resolution(x, resolution: int, model):
         raise Exception(f"Height and width of the image must be the same. Input: {x.shape[2]} != {x.shape[3]}. Perform a center crop first.")
     
     if (x.shape[2] != resolution) | (x.shape[3] != resolution):
+        name = repr(model)
+        resize_fallback_count[name] = resize_fallback_count.get(name, 0) + 1
         if not hash(model) in warning_log:
             print("Warning: Input size ({}x{}) is not the native resolution ({}x{}) for this model. A resize will be performed but this could impact performance.".format(x.shape[2], x.shape[3], resolution, resolution))
             warning_log[hash(model)] = True
@@ -166,6 +268,159 @@ def fix_resolution(x, resolution: int, model):
     return x
 
 
+def get_resize_fallback_count(model=None) -> int:
+    """Number of times `fix_resolution` had to resize an input, for one
+    model or all models."""
+    if model is not None:
+        return resize_fallback_count.get(repr(model), 0)
+    return sum(resize_fallback_count.values())
+
+
+# Modules whose output is a new tensor, so a ReLU right after them can run in place
+_FRESH_OUTPUT = (torch.nn.Conv2d, torch.nn.ConvTranspose2d, torch.nn.BatchNorm2d, torch.nn.GroupNorm, torch.nn.Linear)
+
+
+def _fold_batchnorms(module) -> int:
+    folded = sum(_fold_batchnorms(child) for child in module.children())
+
+    # Sequential containers run their children in order; other modules can
+    # declare (conv, norm) attribute pairs they apply back to back in `_fuse_pairs`.
+    pairs = list(getattr(module, "_fuse_pairs", ()))
+    if isinstance(module, torch.nn.Sequential):
+        names = list(module._modules)
+        pairs += list(zip(names, names[1:]))
+
+    for conv_name, bn_name in pairs:
+        conv, bn = getattr(module, conv_name), getattr(module, bn_name)
+        if (type(conv) is torch.nn.Conv2d and type(bn) is torch.nn.BatchNorm2d
+                and bn.track_running_stats and conv.out_channels == bn.num_features):
+            setattr(module, conv_name, torch.nn.utils.fusion.fuse_conv_bn_eval(conv, bn))
+            setattr(module, bn_name, torch.nn.Identity())
+            folded += 1
+    return folded
+
+
+def _inplace_relus(module) -> int:
+    swapped = sum(_inplace_relus(child) for child in module.children())
+
+    if isinstance(module, torch.nn.Sequential):
+        previous = None
+        for child in module.children():
+            if type(child) is torch.nn.ReLU and not child.inplace and isinstance(previous, _FRESH_OUTPUT):
+                child.inplace = True
+                swapped += 1
+            if not isinstance(child, torch.nn.Identity):
+                previous = child
+    return swapped
+
+
+def optimize_for_inference(model: torch.nn.Module, channels_last: bool = True) -> torch.nn.Module:
+    """Rewrite an eval-mode model in place for faster inference.
+
+    - Every BatchNorm2d that directly follows a Conv2d (inside an
+      `nn.Sequential`, or a pair listed in a module's `_fuse_pairs`) is folded
+      into the convolution and replaced by `nn.Identity`.
+    - ReLUs that directly follow a module producing a new tensor are switched
+      to `inplace=True`.
+    - With `channels_last`, 4D parameters are stored in channels-last memory
+      format, so convolutions run on NHWC kernels.
+
+    The outputs are numerically equivalent (up to float rounding). The folded
+    model can no longer be trained, and forward hooks on a convolution followed
+    by an in-place ReLU see the activation after the ReLU.
+
+    Returns the same model, with the counts in `model.inference_optimizations`.
+    """
+    if model.training:
+        raise ValueError("optimize_for_inference needs a model in eval mode, call model.eval() first")
+
+    with torch.no_grad():
+        folded = _fold_batchnorms(model)
+        swapped = _inplace_relus(model)
+        if channels_last:
+            model.to(memory_format=torch.channels_last)
+
+    model.inference_optimizations = {
+        "folded_batchnorms": folded,
+        "inplace_relus": swapped,
+        "channels_last": channels_last,
+    }
+    return model
+
+
+# ZipFile handles by path, for the process in _zip_handles_pid. A handle
+# inherited over fork shares its file offset with the parent, so each
+# process (e.g. every DataLoader worker) opens its own.
+_zip_handles = {}
+_zip_handles_pid = None
+# Read-only maps and member offsets have no per-process state, forks can keep them
+_zip_mmaps = {}
+_zip_member_offsets = {}
+
+
+def open_zip(path: PathLike) -> zipfile.ZipFile:
+    """Open a zip file once per process and return the same handle after.
+
+    Datasets call this on every sample instead of opening the archive again,
+    which re-reads the whole central directory. The handles are reopened in
+    a forked child, so it is safe to use from DataLoader workers.
+    """
+    global _zip_handles_pid
+    if _zip_handles_pid != os.getpid():
+        _zip_handles.clear()
+        _zip_handles_pid = os.getpid()
+
+    path = os.fspath(path)
+    if path not in _zip_handles:
+        _zip_handles[path] = zipfile.ZipFile(path)
+    return _zip_handles[path]
+
+
+def zip_member_offsets(path: PathLike) -> dict:
+    """Where the data of each stored (uncompressed) member of a zip file
+    starts, as `{name: (offset, size)}`. Built once per path.
+
+    The offset comes from each member's local header, whose name and extra
+    fields can differ in length from the central directory.
+    """
+    path = os.fspath(path)
+    if path not in _zip_member_offsets:
+        offsets = {}
+        with open(path, "rb") as f:
+            for info in open_zip(path).infolist():
+                if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:  # compressed or encrypted
+                    continue
+                f.seek(info.header_offset)
+                header = f.read(zipfile.sizeFileHeader)
+                if header[:4] != zipfile.stringFileHeader:
+                    raise zipfile.BadZipFile("Bad local header for {} in {}".format(info.filename, path))
+                name_length, extra_length = struct.unpack("<HH", header[26:30])
+                offsets[info.filename] = (info.header_offset + zipfile.sizeFileHeader + name_length + extra_length, info.file_size)
+        _zip_member_offsets[path] = offsets
+    return _zip_member_offsets[path]
+
+
+def read_zip_member(path: PathLike, name: str, use_mmap: bool = False) -> bytes:
+    """Read one member of a zip file through the per-process handle of `open_zip`.
+
+    With `use_mmap`, stored members are sliced straight out of a memory map of
+    the archive using `zip_member_offsets`, skipping the ZipFile machinery;
+    compressed members are still read through ZipFile.
+    """
+    path = os.fspath(path)
+    if use_mmap:
+        offsets = zip_member_offsets(path)
+        if name in offsets:
+            if path not in _zip_mmaps:
+                with open(path, "rb") as f:
+                    _zip_mmaps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            offset, size = offsets[name]
+            return _zip_mmaps[path][offset:offset + size]
+
+    with open_zip(path).open(name) as file:
+        return file.read()
+
+
 def warn_normalization(x):
     """Check normalization of input and warn if possibly wrong. When 
     processing an image that may likely not have the correct 
@@ -1,12 +1,36 @@
-from .image_loader import load_xray_image, process_xray_image
-from .gradcam import compute_gradcam
-from .segmentation import get_body_part_segment
-from .enums import BodyPart
+from .image_loader import load_xray_image, process_xray_image, process_xray_batch, ingest_xray_image, load_analysis_tensor, ImageDecodeError
+from .preprocessing import preprocess_xray, decode_xray, plan_preprocessing, PreprocessingPlan
+from .gradcam import GradCAM, compute_gradcam, compute_gradcams, render_heatmap
+from .segmentation import get_body_part_segment, get_body_part_segments, get_label_map, label_map_regions, segmentation_service
+from .colormap import overlay_heatmap, encode_overlay
+from .enums import BodyPart, HeatmapFormat
+from .model_utils import warmup_models, model_registry, get_model_version
 
 __all__ = [
     "load_xray_image",
     "process_xray_image",
+    "process_xray_batch",
+    "ingest_xray_image",
+    "load_analysis_tensor",
+    "ImageDecodeError",
+    "preprocess_xray",
+    "decode_xray",
+    "plan_preprocessing",
+    "PreprocessingPlan",
+    "GradCAM",
     "compute_gradcam",
+    "compute_gradcams",
+    "render_heatmap",
+    "overlay_heatmap",
+    "encode_overlay",
     "get_body_part_segment",
-    "BodyPart"
+    "get_body_part_segments",
+    "get_label_map",
+    "label_map_regions",
+    "segmentation_service",
+    "BodyPart",
+    "HeatmapFormat",
+    "warmup_models",
+    "model_registry",
+    "get_model_version"
 ]
\ No newline at end of file
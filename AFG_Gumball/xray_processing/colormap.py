@@ -0,0 +1,129 @@
+import functools
+import io
+
+import numpy as np
+from PIL import Image
+
+# Dữ liệu phân đoạn tuyến tính của các colormap (giống matplotlib): (vị trí, giá trị, giá trị)
+_SEGMENT_DATA = {
+    "jet": {
+        "red": ((0.0, 0, 0), (0.35, 0, 0), (0.66, 1, 1), (0.89, 1, 1), (1.0, 0.5, 0.5)),
+        "green": ((0.0, 0, 0), (0.125, 0, 0), (0.375, 1, 1), (0.64, 1, 1), (0.91, 0, 0), (1.0, 0, 0)),
+        "blue": ((0.0, 0.5, 0.5), (0.11, 1, 1), (0.34, 1, 1), (0.65, 0, 0), (1.0, 0, 0)),
+    },
+    "gray": {
+        "red": ((0.0, 0, 0), (1.0, 1, 1)),
+        "green": ((0.0, 0, 0), (1.0, 1, 1)),
+        "blue": ((0.0, 0, 0), (1.0, 1, 1)),
+    },
+    "hot": {
+        "red": ((0.0, 0.0416, 0.0416), (0.365079, 1.0, 1.0), (1.0, 1.0, 1.0)),
+        "green": ((0.0, 0.0, 0.0), (0.365079, 0.0, 0.0), (0.746032, 1.0, 1.0), (1.0, 1.0, 1.0)),
+        "blue": ((0.0, 0.0, 0.0), (0.746032, 0.0, 0.0), (1.0, 1.0, 1.0)),
+    },
+    "bone": {
+        "red": ((0.0, 0.0, 0.0), (0.746032, 0.652778, 0.652778), (1.0, 1.0, 1.0)),
+        "green": ((0.0, 0.0, 0.0), (0.365079, 0.319444, 0.319444), (0.746032, 0.777778, 0.777778), (1.0, 1.0, 1.0)),
+        "blue": ((0.0, 0.0, 0.0), (0.365079, 0.444444, 0.444444), (1.0, 1.0, 1.0)),
+    },
+    "cool": {
+        "red": ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0)),
+        "green": ((0.0, 1.0, 1.0), (1.0, 0.0, 0.0)),
+        "blue": ((0.0, 1.0, 1.0), (1.0, 1.0, 1.0)),
+    },
+}
+
+
+def _build_lut(segment_data):
+    x = np.linspace(0, 1, 256)
+    channels = []
+    for channel in ("red", "green", "blue"):
+        points = np.array(segment_data[channel], dtype=np.float64)
+        channels.append(np.interp(x, points[:, 0], points[:, 1]))
+    return np.round(np.stack(channels, axis=-1) * 255).astype(np.uint8)
+
+
+# Bảng tra cứu uint8 [256, 3] cho từng colormap
+COLORMAPS = {name: _build_lut(data) for name, data in _SEGMENT_DATA.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _blend_lut(colormap: str, alpha: float):
+    """
+    Bảng tra cứu 2 chiều [256 (gray), 256 (heatmap), 3] cho phép trộn ảnh gốc và heatmap bằng một lần gather.
+    """
+    gray = COLORMAPS["gray"].astype(np.float32)[:, None, :]
+    heat = COLORMAPS[colormap].astype(np.float32)[None, :, :]
+    return np.round((1 - alpha) * gray + alpha * heat).astype(np.uint8)
+
+
+def colormap_index(values):
+    """
+    Chuyển giá trị trong khoảng [0, 1] (hoặc uint8) thành chỉ số LUT uint8, cùng quy tắc với matplotlib.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.uint8:
+        return values
+    return np.clip(values * 256, 0, 255).astype(np.uint8)
+
+
+def apply_colormap(values, colormap: str = "jet"):
+    """
+    Tô màu một mảng 2 chiều bằng LUT.
+
+    Args:
+        values: Mảng giá trị trong khoảng [0, 1] hoặc uint8, shape [H, W].
+        colormap (str): Tên colormap trong `COLORMAPS`.
+
+    Returns:
+        Ảnh RGB uint8, shape [H, W, 3].
+    """
+    return COLORMAPS[colormap][colormap_index(values)]
+
+
+def overlay_heatmap(cam, img, alpha: float = 0.5, colormap: str = "jet"):
+    """
+    Trộn heatmap (CAM) với ảnh gốc, chỉ dùng NumPy và LUT.
+
+    Args:
+        cam: CAM đã chuẩn hóa (float [0, 1] hoặc uint8), shape [h, w]. Nếu khác kích thước
+            ảnh gốc, CAM được phóng to bằng nội suy bilinear.
+        img: Ảnh gốc (giá trị bất kỳ), shape [H, W].
+        alpha (float): Độ đậm của heatmap.
+        colormap (str): Tên colormap trong `COLORMAPS`.
+
+    Returns:
+        Ảnh RGB uint8, shape [H, W, 3].
+    """
+    img = np.asarray(img, dtype=np.float32)
+    cam_index = colormap_index(cam)
+
+    if cam_index.shape != img.shape:
+        cam_index = np.asarray(
+            Image.fromarray(cam_index).resize((img.shape[1], img.shape[0]), Image.Resampling.BILINEAR)
+        )
+
+    img_min, img_max = img.min(), img.max()
+    gray_index = colormap_index((img - img_min) / (img_max - img_min + 1e-8))
+
+    return _blend_lut(colormap, float(alpha))[gray_index, cam_index]
+
+
+def encode_overlay(cam, img, image_format: str = "PNG", alpha: float = 0.5, colormap: str = "jet", **save_kwargs):
+    """
+    Tạo ảnh overlay đã mã hóa (PNG/JPEG) trực tiếp từ CAM.
+
+    Args:
+        cam: CAM đã chuẩn hóa, shape [h, w].
+        img: Ảnh gốc, shape [H, W].
+        image_format (str): Định dạng ảnh của PIL ("PNG", "JPEG", ...).
+        alpha (float): Độ đậm của heatmap.
+        colormap (str): Tên colormap trong `COLORMAPS`.
+        **save_kwargs: Tham số thêm cho `PIL.Image.save` (ví dụ `quality=90`).
+
+    Returns:
+        bytes: Dữ liệu ảnh đã mã hóa.
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(overlay_heatmap(cam, img, alpha, colormap)).save(buffer, format=image_format, **save_kwargs)
+    return buffer.getvalue()
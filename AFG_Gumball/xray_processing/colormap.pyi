@@ -0,0 +1,16 @@
+from typing import Any, Dict
+import numpy as np
+
+COLORMAPS: Dict[str, np.ndarray]
+
+def colormap_index(values: np.ndarray) -> np.ndarray: ...
+def apply_colormap(values: np.ndarray, colormap: str = ...) -> np.ndarray: ...
+def overlay_heatmap(cam: np.ndarray, img: np.ndarray, alpha: float = ..., colormap: str = ...) -> np.ndarray: ...
+def encode_overlay(
+    cam: np.ndarray,
+    img: np.ndarray,
+    image_format: str = ...,
+    alpha: float = ...,
+    colormap: str = ...,
+    **save_kwargs: Any
+) -> bytes: ...
@@ -14,4 +14,9 @@ class BodyPart(enum.Enum):
     FACIES_DIAPHRAGMATICA = 10
     MEDIASTINUM = 11
     WEASAND = 12
-    SPINE = 13
\ No newline at end of file
+    SPINE = 13
+
+class HeatmapFormat(enum.Enum):
+    OVERLAY = "overlay"             # Ảnh RGB float64 đã trộn với ảnh gốc, cùng kích thước ảnh đầu vào
+    CAM_UINT8 = "cam_uint8"         # CAM đã chuẩn hóa ở độ phân giải feature map, uint8 [0, 255]
+    CAM_FLOAT16 = "cam_float16"     # CAM đã chuẩn hóa ở độ phân giải feature map, float16 [0, 1]
@@ -1,8 +1,12 @@
+import threading
+import weakref
+
 import torch
 import torch.nn.functional as F
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
+
+from .colormap import overlay_heatmap
+from .enums import HeatmapFormat
 
 def find_target_layer(model):
     """
@@ -19,10 +23,8 @@ def find_target_layer(model):
         dense_net = base_model.model
     except AttributeError:
         raise AttributeError("Không thể truy cập mô hình DenseNet.")
-    try:
-        dense_net = dense_net.module
-    except AttributeError:
-        pass
+    # Classifier chỉ được bọc DataParallel khi chạy trên nhiều GPU
+    dense_net = getattr(dense_net, "module", dense_net)
     try:
         backbone = dense_net.backbone
         conv_layers = []
@@ -40,6 +42,184 @@ def find_target_layer(model):
     except AttributeError:
         raise AttributeError("Không tìm thấy backbone trong mô hình.")
 
+_target_layer_cache = weakref.WeakKeyDictionary()
+
+def get_target_layer(model):
+    """
+    Như `find_target_layer` nhưng lưu lại kết quả cho từng mô hình để không phải duyệt lại toàn bộ module.
+
+    Args:
+        model: Mô hình PyTorch.
+
+    Returns:
+        Lớp convolution cuối cùng.
+    """
+    target_layer = _target_layer_cache.get(model)
+    if target_layer is None:
+        target_layer = _target_layer_cache[model] = find_target_layer(model)
+    return target_layer
+
+
+class GradCAM:
+    """
+    Bộ tính Grad-CAM quản lý vòng đời hook trên lớp đích.
+
+    Hook chỉ tồn tại trong khối `with`, nên sau mỗi request mô hình dùng chung
+    không còn hook nào sót lại. Gradient được lấy trực tiếp theo activation bằng
+    `torch.autograd.grad`, không cần backward hook và không tích lũy `.grad`
+    vào tham số của mô hình.
+
+    .. code-block:: python
+
+        with GradCAM(model) as engine:
+            heatmaps = engine.compute(img_tensor, [0, 2])
+    """
+
+    def __init__(self, model, target_layer=None):
+        self.model = model
+        self.target_layer = target_layer if target_layer is not None else get_target_layer(model)
+        self._handles = []
+        self._local = threading.local()
+
+    def __enter__(self):
+        if not self._handles:
+            self._handles.append(self.target_layer.register_forward_hook(self._forward_hook))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remove_hooks()
+
+    def remove_hooks(self):
+        """
+        Gỡ toàn bộ hook đã đăng ký trên lớp đích.
+        """
+        for handle in self._handles:
+            handle.remove()
+        self._handles.clear()
+
+    def _forward_hook(self, module, input, output):
+        # Chỉ thu activation của lượt forward do chính luồng này khởi chạy
+        activations = getattr(self._local, "activations", None)
+        if activations is not None:
+            activations.append(output)
+
+    def forward(self, img_tensor):
+        """
+        Chạy một lượt forward (có gradient) và thu activation của lớp đích.
+
+        Đồ thị tính toán được giữ lại trong output, nên cùng một lượt forward
+        có thể dùng cho cả phân loại lẫn Grad-CAM (xem `compute_from_forward`).
+
+        Args:
+            img_tensor: Tensor ảnh đầu vào, shape [N, 1, H, W].
+
+        Returns:
+            tuple: (output của mô hình, activations của lớp đích).
+        """
+        if not self._handles:
+            with self:
+                return self.forward(img_tensor)
+
+        self._local.activations = []
+        try:
+            with torch.enable_grad():
+                output = self.model(img_tensor)
+            activation_list = self._local.activations
+        finally:
+            self._local.activations = None
+
+        if not activation_list:
+            raise RuntimeError("Không thu thập được activations.")
+
+        return output, activation_list[0]
+
+    def compute_from_forward(self, img_tensor, output, activations, target_class_indices,
+                             heatmap_format=HeatmapFormat.OVERLAY):
+        """
+        Tính heatmap Grad-CAM từ kết quả của `forward` mà không chạy lại mô hình.
+
+        Args:
+            img_tensor: Tensor ảnh đầu vào đã dùng cho `forward`.
+            output: Output của mô hình trả về từ `forward`.
+            activations: Activations trả về từ `forward`.
+            target_class_indices: Danh sách chỉ số các lớp bệnh lý cần tính Grad-CAM.
+            heatmap_format (HeatmapFormat): Định dạng heatmap trả về.
+
+        Returns:
+            dict: Ánh xạ chỉ số lớp -> heatmap theo `heatmap_format`.
+        """
+        return self.compute_batch_from_forward(
+            img_tensor, output, activations, [target_class_indices], heatmap_format
+        )[0]
+
+    def compute_batch_from_forward(self, img_tensor, output, activations, target_class_indices,
+                                   heatmap_format=HeatmapFormat.OVERLAY):
+        """
+        Tính heatmap Grad-CAM cho một lô ảnh từ kết quả của `forward`, mỗi ảnh một danh sách lớp riêng.
+
+        Gradient của hợp các lớp được tính bằng một lượt backward theo lô; do ở chế độ
+        eval các ảnh trong lô độc lập với nhau, gradient của từng ảnh không bị lẫn.
+
+        Args:
+            img_tensor: Tensor lô ảnh đã dùng cho `forward`, shape [N, 1, H, W].
+            output: Output của mô hình trả về từ `forward`.
+            activations: Activations trả về từ `forward`.
+            target_class_indices: Danh sách (mỗi ảnh một phần tử) các chỉ số lớp cần tính Grad-CAM.
+            heatmap_format (HeatmapFormat): Định dạng heatmap trả về.
+
+        Returns:
+            list[dict]: Với mỗi ảnh, ánh xạ chỉ số lớp -> heatmap theo `heatmap_format`.
+        """
+        target_class_indices = [list(indices) for indices in target_class_indices]
+        all_indices = sorted(set().union(*target_class_indices))
+        if not all_indices:
+            return [{} for _ in target_class_indices]
+
+        gradients = _batched_gradients(output, activations, all_indices)
+
+        # gradients: [K, N, C, h, w] -> cams: [K, N, h, w]
+        weights = torch.mean(gradients, dim=[3, 4], keepdim=True)
+        cams = F.relu(torch.mul(activations.detach().unsqueeze(0), weights).sum(dim=2))
+
+        # Chỉ giữ các cặp (lớp, ảnh) thực sự được yêu cầu
+        pairs = [(n, idx) for n, indices in enumerate(target_class_indices) for idx in indices]
+        cams = cams[[all_indices.index(idx) for _, idx in pairs], [n for n, _ in pairs]]
+
+        heatmaps = [{} for _ in target_class_indices]
+        if heatmap_format != HeatmapFormat.OVERLAY:
+            # Giữ CAM ở độ phân giải feature map, việc tô màu để dành cho lúc đọc
+            for (n, idx), gradcam in zip(pairs, cams.cpu().numpy()):
+                heatmaps[n][idx] = _encode_cam(_normalize_cam(gradcam), heatmap_format)
+            return heatmaps
+
+        cams = F.interpolate(cams.unsqueeze(1), size=img_tensor.shape[2:], mode='bilinear', align_corners=False)
+        cams = cams[:, 0].cpu().numpy()
+
+        img_np = img_tensor[:, 0].detach().cpu().numpy()
+        for (n, idx), gradcam in zip(pairs, cams):
+            heatmaps[n][idx] = _blend_heatmap(_normalize_cam(gradcam), img_np[n])
+
+        return heatmaps
+
+    def compute(self, img_tensor, target_class_indices, heatmap_format=HeatmapFormat.OVERLAY):
+        """
+        Tính heatmap Grad-CAM cho nhiều lớp bệnh lý với một lượt forward duy nhất.
+
+        Args:
+            img_tensor: Tensor ảnh đầu vào, shape [1, 1, H, W].
+            target_class_indices: Danh sách chỉ số các lớp bệnh lý cần tính Grad-CAM.
+            heatmap_format (HeatmapFormat): Định dạng heatmap trả về.
+
+        Returns:
+            dict: Ánh xạ chỉ số lớp -> heatmap theo `heatmap_format`.
+        """
+        target_class_indices = list(target_class_indices)
+        if not target_class_indices:
+            return {}
+
+        output, activations = self.forward(img_tensor)
+        return self.compute_from_forward(img_tensor, output, activations, target_class_indices, heatmap_format)
+
 def compute_gradcam(model, img_tensor, target_class_idx):
     """
     Tính toán heatmap Grad-CAM cho một lớp bệnh lý cụ thể.
@@ -52,42 +232,82 @@ def compute_gradcam(model, img_tensor, target_class_idx):
     Returns:
         Ảnh heatmap kết hợp với ảnh gốc.
     """
-    activation_list = []
-    gradient_list = []
+    with GradCAM(model) as engine:
+        return engine.compute(img_tensor, [target_class_idx])[target_class_idx]
 
-    def forward_hook(module, input, output):
-        activation_list.append(output)
+def compute_gradcams(model, img_tensor, target_class_indices, heatmap_format=HeatmapFormat.OVERLAY):
+    """
+    Tính toán heatmap Grad-CAM cho nhiều lớp bệnh lý với một lượt forward duy nhất.
 
-    def backward_hook(module, grad_in, grad_out):
-        gradient_list.append(grad_out[0])
+    Activation được thu thập một lần, sau đó gradient của tất cả các lớp được tính
+    cùng lúc bằng một lượt backward theo lô (`is_grads_batched`).
 
-    target_layer = find_target_layer(model)
-    target_layer.register_forward_hook(forward_hook)
-    target_layer.register_backward_hook(backward_hook)
+    Args:
+        model: Mô hình PyTorch.
+        img_tensor: Tensor ảnh đầu vào, shape [1, 1, H, W].
+        target_class_indices: Danh sách chỉ số các lớp bệnh lý cần tính Grad-CAM.
+        heatmap_format (HeatmapFormat): Định dạng heatmap trả về.
 
-    output = model(img_tensor)
-    model.zero_grad()
-    output[:, target_class_idx].backward()
+    Returns:
+        dict: Ánh xạ chỉ số lớp -> heatmap theo `heatmap_format`.
+    """
+    with GradCAM(model) as engine:
+        return engine.compute(img_tensor, target_class_indices, heatmap_format)
 
-    if not activation_list or not gradient_list:
-        raise RuntimeError("Không thu thập được activations hoặc gradients.")
+def render_heatmap(cam, img):
+    """
+    Tô màu CAM thô (định dạng `HeatmapFormat.CAM_*`) và trộn với ảnh gốc, dùng khi đọc kết quả.
 
-    activations = activation_list[0]
-    gradients = gradient_list[0]
+    Args:
+        cam: CAM đã chuẩn hóa ở độ phân giải feature map, shape [h, w] (uint8 hoặc float16).
+        img: Ảnh gốc, mảng numpy [H, W] hoặc tensor [1, 1, H, W].
 
-    weights = torch.mean(gradients, dim=[2, 3], keepdim=True)
-    gradcam = torch.mul(activations, weights).sum(dim=1, keepdim=True)
-    gradcam = F.relu(gradcam)
-    gradcam = F.interpolate(gradcam, size=img_tensor.shape[2:], mode='bilinear', align_corners=False)
-    gradcam = gradcam.squeeze().detach().cpu().numpy()
-    gradcam = (gradcam - gradcam.min()) / (gradcam.max() - gradcam.min() + 1e-8)
+    Returns:
+        Ảnh heatmap kết hợp với ảnh gốc, shape [H, W, 3].
+    """
+    if isinstance(img, torch.Tensor):
+        img = img.detach().cpu().reshape(img.shape[-2:]).numpy()
+
+    cam = np.asarray(cam)
+    scale = 255.0 if np.issubdtype(cam.dtype, np.integer) else 1.0
+    cam = torch.from_numpy(cam.astype(np.float32) / scale)[None, None]
+    cam = F.interpolate(cam, size=img.shape[-2:], mode='bilinear', align_corners=False)
 
-    img_np = img_tensor[0, 0].detach().cpu().numpy()
-    heatmap_rgb = cm.jet(gradcam)[:, :, :3]
-    overlay = (img_np - img_np.min()) / (img_np.max() - img_np.min())
-    overlay = plt.cm.gray(overlay)[:, :, :3]
-    alpha = 0.5
-    combined = (1 - alpha) * overlay + alpha * heatmap_rgb
-    combined = np.clip(combined, 0, 1)
+    return _blend_heatmap(_normalize_cam(cam[0, 0].numpy()), img)
 
-    return combined
\ No newline at end of file
+def _batched_gradients(output, activations, target_class_indices):
+    """
+    Tính gradient của từng lớp theo activations, shape [K, N, C, h, w].
+    """
+    grad_outputs = torch.zeros((len(target_class_indices),) + tuple(output.shape),
+                               dtype=output.dtype, device=output.device)
+    for i, idx in enumerate(target_class_indices):
+        grad_outputs[i, :, idx] = 1
+
+    try:
+        gradients, = torch.autograd.grad(output, activations, grad_outputs=grad_outputs,
+                                         retain_graph=True, is_grads_batched=True)
+    except RuntimeError:
+        # Một số phép toán không hỗ trợ vmap, quay về backward tuần tự trên cùng một đồ thị
+        gradients = torch.stack([
+            torch.autograd.grad(output, activations, grad_outputs=grad_output, retain_graph=True)[0]
+            for grad_output in grad_outputs
+        ])
+
+    return gradients
+
+def _normalize_cam(gradcam):
+    return (gradcam - gradcam.min()) / (gradcam.max() - gradcam.min() + 1e-8)
+
+def _encode_cam(gradcam, heatmap_format):
+    if heatmap_format == HeatmapFormat.CAM_UINT8:
+        return np.round(gradcam * 255).astype(np.uint8)
+    elif heatmap_format == HeatmapFormat.CAM_FLOAT16:
+        return gradcam.astype(np.float16)
+    raise ValueError(f"Định dạng heatmap không hợp lệ: {heatmap_format}")
+
+def _blend_heatmap(gradcam, img_np):
+    """
+    Tô màu heatmap (jet) và trộn với ảnh gốc (gray).
+    """
+    return overlay_heatmap(gradcam, img_np, alpha=0.5, colormap="jet") / 255.0
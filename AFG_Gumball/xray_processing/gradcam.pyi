@@ -1,4 +1,42 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import torch
 import numpy as np
+from .enums import HeatmapFormat
 
-def compute_gradcam(model: torch.nn.Module, img_tensor: torch.Tensor, target_class_idx: int) -> np.ndarray: ...
\ No newline at end of file
+def find_target_layer(model: torch.nn.Module) -> torch.nn.Conv2d: ...
+def get_target_layer(model: torch.nn.Module) -> torch.nn.Conv2d: ...
+
+class GradCAM:
+    model: torch.nn.Module
+    target_layer: torch.nn.Module
+    def __init__(self, model: torch.nn.Module, target_layer: Optional[torch.nn.Module] = ...) -> None: ...
+    def __enter__(self) -> "GradCAM": ...
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None: ...
+    def remove_hooks(self) -> None: ...
+    def forward(self, img_tensor: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]: ...
+    def compute_from_forward(
+        self,
+        img_tensor: torch.Tensor,
+        output: torch.Tensor,
+        activations: torch.Tensor,
+        target_class_indices: Iterable[int],
+        heatmap_format: HeatmapFormat = ...
+    ) -> Dict[int, np.ndarray]: ...
+    def compute_batch_from_forward(
+        self,
+        img_tensor: torch.Tensor,
+        output: torch.Tensor,
+        activations: torch.Tensor,
+        target_class_indices: Iterable[Iterable[int]],
+        heatmap_format: HeatmapFormat = ...
+    ) -> List[Dict[int, np.ndarray]]: ...
+    def compute(self, img_tensor: torch.Tensor, target_class_indices: Iterable[int], heatmap_format: HeatmapFormat = ...) -> Dict[int, np.ndarray]: ...
+
+def compute_gradcam(model: torch.nn.Module, img_tensor: torch.Tensor, target_class_idx: int) -> np.ndarray: ...
+def compute_gradcams(
+    model: torch.nn.Module,
+    img_tensor: torch.Tensor,
+    target_class_indices: Iterable[int],
+    heatmap_format: HeatmapFormat = ...
+) -> Dict[int, np.ndarray]: ...
+def render_heatmap(cam: np.ndarray, img: Union[np.ndarray, torch.Tensor]) -> np.ndarray: ...
@@ -1,106 +1,232 @@
-import skimage.io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import torch
-import torchvision.transforms as transforms
 from PIL import Image
-import io
-from ..torchxrayvision import datasets
+from ..torchxrayvision import baseline_models
 from .model_utils import get_model
+from .preprocessing import preprocess_xray, plan_preprocessing, decode_xray
+from .gradcam import GradCAM
+from .enums import HeatmapFormat
+
+ANALYSIS_TENSOR_EXT = ".npy"
+ANALYSIS_TENSOR_DTYPE = np.float16
+
+class ImageDecodeError(ValueError):
+    """
+    Ảnh đầu vào không đọc hoặc tiền xử lý được (lỗi của chính ảnh, không phải của mô hình).
+    """
 
 def load_xray_image(image_input):
     """
     Tải và tiền xử lý ảnh X-ray từ đường dẫn file hoặc image byte.
     
     Args:
-        image_input: Đường dẫn file ảnh (str) hoặc dữ liệu ảnh dạng bytes.
+        image_input: Đường dẫn file ảnh (str), dữ liệu ảnh dạng bytes, file DICOM
+            hoặc mảng numpy (xem `preprocessing.preprocess_xray`).
     
     Returns:
         Tensor ảnh X-ray đã tiền xử lý, shape [1, 512, 512].
     """
-    if isinstance(image_input, str):
-        try:
-            image = Image.open(image_input).convert("L")
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Không tìm thấy file {image_input}!")
-    elif isinstance(image_input, bytes):
-        image = Image.open(io.BytesIO(image_input)).convert("L")
-    else:
-        raise ValueError("image_input phải là đường dẫn file (str) hoặc bytes!")
-    
-    image = image.resize((512, 512), Image.Resampling.LANCZOS)
-    
-    image_np = np.array(image)
-    
-    image_np = (image_np / 255.0) * 2048 - 1024
-    
-    image_tensor = torch.from_numpy(image_np).float().unsqueeze(0)
-
-    return image_tensor
+    return preprocess_xray(image_input, 512)
 
-def process_xray_image(
-        img_path: str,
-        threshold: float = 0.5
-    ):
+def _load_analysis_tensor(image, plan):
     """
-    Xử lý ảnh X-quang để phân loại bệnh lý và tạo heatmap Grad-CAM.
-    
+    Đọc và tiền xử lý ảnh X-quang cho mô hình phân loại.
+
     Args:
-        img_path (str): Đường dẫn tới ảnh X-quang.
-        threshold (float): Xác suất tối thiểu
-        
+        image: Đường dẫn tới ảnh (kể cả DICOM), đường dẫn tới tensor `.npy` tạo bởi
+            `ingest_xray_image`, bytes, hoặc mảng numpy đã giải mã (giá trị 0-255).
+        plan (PreprocessingPlan): Kế hoạch tiền xử lý của mô hình (xem `plan_preprocessing`).
+
     Returns:
-        tuple:
-            - pathologies_above_threshold (list): Danh sách tuple (tên_bệnh_lý, xác_suất) cho các bệnh lý có xác suất > threshold.
-            - gradcam_images (list): Danh sách dictionary chứa thông tin bệnh lý và ảnh heatmap.
+        Tensor ảnh đã tiền xử lý, shape [1, resolution, resolution].
     """
-    try:
-        model = get_model()
-        model.eval()
+    if isinstance(image, (str, os.PathLike)):
+        if os.fspath(image).endswith(ANALYSIS_TENSOR_EXT):
+            return load_analysis_tensor(image)
+
+    return plan(image)
+
+def _to_display_uint8(image):
+    """
+    Kéo giãn ảnh 16 bit theo min/max của chính nó về uint8 để hiển thị.
+    """
+    low, high = int(image.min()), int(image.max())
+    display = np.subtract(image, low, dtype=np.float32)
+    display *= 255 / max(high - low, 1)
+    return display.astype(np.uint8)
+
+def ingest_xray_image(image_input, tensor_path, display_path=None):
+    """
+    Giải mã ảnh X-quang tải lên đúng một lần, lưu tensor đã chuẩn hóa cho phân tích
+    và (tùy chọn) ảnh JPEG để hiển thị.
+
+    Tensor được tính từ điểm ảnh gốc (không qua JPEG nén mất dữ liệu) và lưu ở dạng
+    float16 `.npy`, để các tác vụ phân tích đọc trực tiếp bằng memory-map.
+
+    Ảnh được giải mã bằng `decode_xray` như `preprocess_xray`: DICOM và PNG 16 bit giữ nguyên
+    uint16 (DICOM thu nhỏ theo hệ số nguyên), JPEG giải mã thẳng ở độ phân giải nhỏ hơn.
+    Ảnh JPEG hiển thị được tạo từ chính ảnh đã giải mã đó (cạnh ngắn vẫn >= 512).
+
+    Args:
+        image_input: Đường dẫn file ảnh (kể cả DICOM) hoặc dữ liệu ảnh dạng bytes.
+        tensor_path: Đường dẫn file `.npy` để lưu tensor [1, 512, 512] trong khoảng [-1024, 1024].
+        display_path: Đường dẫn file JPEG để hiển thị (bỏ qua nếu None).
 
-        img = skimage.io.imread(img_path)
+    Returns:
+        Tensor ảnh đã tiền xử lý, shape [1, 512, 512].
+    """
+    plan = plan_preprocessing(baseline_models.gumball.DenseNet)
 
-        if len(img.shape) > 2:
-            img = img[:, :, 0]
+    image, maxval = decode_xray(image_input, plan.resolution)
+    display = _to_display_uint8(image) if image.dtype == np.uint16 else image
 
-        if len(img.shape) < 2:
-            raise ValueError("Kích thước ảnh nhỏ hơn 2 chiều")
+    if display_path is not None:
+        Image.fromarray(display).save(display_path, "JPEG")
 
-        img = img.astype(np.float32)
+    img_tensor = plan.decoded(image, maxval)
+    save_analysis_tensor(img_tensor, tensor_path)
 
-        img = (img / 255.0) * 2048 - 1024
+    return img_tensor
 
-        img = img[None, :, :]
+def save_analysis_tensor(img_tensor, tensor_path):
+    """
+    Lưu tensor ảnh đã tiền xử lý ra file `.npy` (float16).
+    """
+    np.save(tensor_path, img_tensor.detach().cpu().numpy().astype(ANALYSIS_TENSOR_DTYPE))
 
-        img_tensor = torch.from_numpy(img).float()
+def load_analysis_tensor(tensor_path):
+    """
+    Đọc tensor ảnh đã tiền xử lý bằng memory-map.
 
-        transform = transforms.Compose([
-            transforms.Resize((512, 512)),
-            datasets.XRayCenterCrop(),
-        ])
+    Args:
+        tensor_path: Đường dẫn file `.npy` tạo bởi `ingest_xray_image`.
 
-        img_tensor = transform(img_tensor)
-        img_tensor = img_tensor.unsqueeze(0)
-        img_tensor.requires_grad_(True)
+    Returns:
+        Tensor float32, shape [1, 512, 512].
+    """
+    return torch.from_numpy(np.load(tensor_path, mmap_mode="r").astype(np.float32))
 
-        with torch.no_grad():
-            preds = model(img_tensor).cpu()
-            output = zip(model.pathologies, map(float, preds[0]))
+def _try_load_analysis_tensor(image, plan):
+    try:
+        return _load_analysis_tensor(image, plan)
+    except Exception as e:
+        print(f"Lỗi khi xử lý ảnh: {str(e)}")
+        error = ImageDecodeError(str(e))
+        error.__cause__ = e
+        return error
+
+def process_xray_batch(
+        images,
+        threshold: float = 0.5,
+        batch_size: int = 8,
+        heatmap_format: HeatmapFormat = HeatmapFormat.OVERLAY,
+        return_exceptions: bool = False
+    ):
+    """
+    Xử lý nhiều ảnh X-quang cùng lúc: giải mã song song, chạy mô hình theo lô
+    và chỉ tính Grad-CAM cho các bệnh lý vượt ngưỡng.
 
-        pathologies_above_threshold = [(k, v) for k, v in output if v > threshold]
+    Args:
+        images: Danh sách đường dẫn ảnh, đường dẫn tensor `.npy` (xem `ingest_xray_image`)
+            hoặc mảng numpy đã giải mã (giá trị 0-255).
+        threshold (float): Xác suất tối thiểu
+        batch_size (int): Số ảnh tối đa trong một lượt forward.
+        heatmap_format (HeatmapFormat): Định dạng heatmap (xem `process_xray_image`).
+        return_exceptions (bool): Nếu True, ảnh bị lỗi trả về chính exception thay vì ([], []),
+            để phân biệt lỗi với ảnh không có bệnh lý. Lỗi đọc ảnh là `ImageDecodeError`,
+            còn lỗi của mô hình (tải, forward) giữ nguyên kiểu.
 
-        from .gradcam import compute_gradcam
-        gradcam_images = []
-        for pathology, prob in pathologies_above_threshold:
-            target_class_idx = model.pathologies.index(pathology)
-            heatmap = compute_gradcam(model, img_tensor, target_class_idx)
-            gradcam_images.append({
-                "pathology": pathology,
-                "probability": prob,
-                "heatmap": heatmap
-            })
+    Returns:
+        list: Mỗi ảnh một tuple (pathologies_above_threshold, gradcam_images), giống kết quả
+        của `process_xray_image`. Ảnh bị lỗi trả về ([], []) (hoặc exception, xem `return_exceptions`).
+    """
+    images = list(images)
+    results = [([], []) for _ in images]
+    if not images:
+        return results
 
-        return pathologies_above_threshold, gradcam_images
+    def failed(e):
+        return e if return_exceptions else ([], [])
 
+    try:
+        model = get_model()
     except Exception as e:
         print(f"Lỗi khi xử lý ảnh: {str(e)}")
-        return [], []
\ No newline at end of file
+        return [failed(e) for _ in images]
+
+    # Thu phóng ngay khi giải mã về độ phân giải gốc của mô hình
+    plan = plan_preprocessing(model)
+    with ThreadPoolExecutor(max_workers=min(len(images), os.cpu_count() or 1)) as executor:
+        tensors = list(executor.map(lambda image: _try_load_analysis_tensor(image, plan), images))
+
+    valid = []
+    for i, tensor in enumerate(tensors):
+        if isinstance(tensor, Exception):
+            results[i] = failed(tensor)
+        else:
+            valid.append(i)
+
+    for start in range(0, len(valid), batch_size):
+        batch_indices = valid[start:start + batch_size]
+        try:
+            img_tensor = torch.stack([tensors[i] for i in batch_indices])
+
+            # Một lượt forward duy nhất cho cả phân loại và Grad-CAM
+            with GradCAM(model) as engine:
+                output, activations = engine.forward(img_tensor)
+
+            preds = output.detach().cpu()
+            pathologies_batch = [
+                [(k, v) for k, v in zip(model.pathologies, map(float, pred)) if v > threshold]
+                for pred in preds
+            ]
+
+            # Không có bệnh lý nào vượt ngưỡng thì bỏ qua backward
+            target_class_indices = [
+                [model.pathologies.index(pathology) for pathology, _ in pathologies]
+                for pathologies in pathologies_batch
+            ]
+            heatmaps_batch = engine.compute_batch_from_forward(
+                img_tensor, output, activations, target_class_indices, heatmap_format
+            )
+
+            for i, pathologies, indices, heatmaps in zip(batch_indices, pathologies_batch, target_class_indices, heatmaps_batch):
+                gradcam_images = []
+                for (pathology, prob), target_class_idx in zip(pathologies, indices):
+                    gradcam_images.append({
+                        "pathology": pathology,
+                        "probability": prob,
+                        "heatmap": heatmaps[target_class_idx]
+                    })
+                results[i] = (pathologies, gradcam_images)
+
+        except Exception as e:
+            print(f"Lỗi khi xử lý ảnh: {str(e)}")
+            for i in batch_indices:
+                results[i] = failed(e)
+
+    return results
+
+def process_xray_image(
+        img_path: str,
+        threshold: float = 0.5,
+        heatmap_format: HeatmapFormat = HeatmapFormat.OVERLAY
+    ):
+    """
+    Xử lý ảnh X-quang để phân loại bệnh lý và tạo heatmap Grad-CAM.
+    
+    Args:
+        img_path (str): Đường dẫn tới ảnh X-quang.
+        threshold (float): Xác suất tối thiểu
+        heatmap_format (HeatmapFormat): Định dạng heatmap. `CAM_UINT8`/`CAM_FLOAT16` lưu CAM thô
+            ở độ phân giải feature map (tô màu lúc đọc bằng `render_heatmap`), nhỏ hơn nhiều so với `OVERLAY`.
+        
+    Returns:
+        tuple:
+            - pathologies_above_threshold (list): Danh sách tuple (tên_bệnh_lý, xác_suất) cho các bệnh lý có xác suất > threshold.
+            - gradcam_images (list): Danh sách dictionary chứa thông tin bệnh lý và ảnh heatmap.
+    """
+    return process_xray_batch([img_path], threshold, batch_size=1, heatmap_format=heatmap_format)[0]
@@ -1,5 +1,27 @@
-from typing import Union
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
 import torch
+from .enums import HeatmapFormat
 
-def load_xray_image(image_input: Union[str, bytes]) -> torch.Tensor: ...
-def process_xray_image(image_input: Union[str, bytes], threshold: float = ...) -> dict: ...
\ No newline at end of file
+ANALYSIS_TENSOR_EXT: str
+ANALYSIS_TENSOR_DTYPE: type
+
+class ImageDecodeError(ValueError): ...
+
+def load_xray_image(image_input: Union[str, os.PathLike, bytes, np.ndarray]) -> torch.Tensor: ...
+def process_xray_image(image_input: Union[str, bytes], threshold: float = ..., heatmap_format: HeatmapFormat = ...) -> dict: ...
+def process_xray_batch(
+    images: Iterable[Union[str, os.PathLike, np.ndarray]],
+    threshold: float = ...,
+    batch_size: int = ...,
+    heatmap_format: HeatmapFormat = ...,
+    return_exceptions: bool = ...
+) -> List[Union[Tuple[List[Tuple[str, float]], List[Dict[str, Any]]], Exception]]: ...
+def ingest_xray_image(
+    image_input: Union[str, os.PathLike, bytes],
+    tensor_path: Union[str, os.PathLike],
+    display_path: Optional[Union[str, os.PathLike]] = ...
+) -> torch.Tensor: ...
+def save_analysis_tensor(img_tensor: torch.Tensor, tensor_path: Union[str, os.PathLike]) -> None: ...
+def load_analysis_tensor(tensor_path: Union[str, os.PathLike]) -> torch.Tensor: ...
@@ -1,21 +1,224 @@
-from ..torchxrayvision import baseline_models
+import functools
+import hashlib
+import os
+import threading
+import time
 
-def get_model():
+import torch
+
+from ..torchxrayvision import baseline_models, utils as xrv_utils
+from .torchscript import ScriptedModel
+from .quantization import PRECISIONS, QuantizedModel
+
+
+class ModelRegistry:
+    """
+    Bộ nhớ đệm mô hình dùng chung cho toàn tiến trình.
+
+    Mỗi mô hình được khóa theo lớp mô hình và các tham số khởi tạo (file trọng số,
+    thư mục cache, ...) nên chỉ được tải đúng một lần, kể cả khi nhiều luồng
+    cùng yêu cầu. Mô hình trả về luôn ở chế độ eval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._key_locks = {}
+        self._load_times = {}
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _make_key(model_cls, kwargs):
+        return (model_cls, tuple(sorted(kwargs.items())))
+
+    @staticmethod
+    def _key_name(key):
+        """
+        Tên dễ đọc của khóa cache, ví dụ "gumball.DenseNet(device='cuda')".
+        """
+        def name_of(value):
+            if isinstance(value, type):
+                return f"{value.__module__.rsplit('.', 1)[-1]}.{value.__qualname__}"
+            return repr(value)
+
+        model_cls, kwargs = key
+        args = ", ".join(f"{name}={name_of(value)}" for name, value in kwargs)
+        return f"{name_of(model_cls)}({args})"
+
+    def get(self, model_cls, **kwargs) -> torch.nn.Module:
+        """
+        Lấy mô hình từ bộ nhớ đệm, tải mới nếu chưa có.
+
+        Args:
+            model_cls: Lớp mô hình trong `baseline_models` (ví dụ `gumball.DenseNet`).
+            **kwargs: Tham số khởi tạo của mô hình, là một phần của khóa cache.
+
+        Returns:
+            Mô hình đã được tải, ở chế độ eval.
+        """
+        key = self._make_key(model_cls, kwargs)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._hits += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Khóa riêng cho từng mô hình để việc tải mô hình lớn không chặn các mô hình khác
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._hits += 1
+                    return model
+                self._misses += 1
+
+            start = time.perf_counter()
+            model = model_cls(**kwargs)
+            model.eval()
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._models[key] = model
+                self._load_times[self._key_name(key)] = elapsed
+
+        return model
+
+    def warmup(self, *model_classes, run_forward: bool = True):
+        """
+        Tải trước các mô hình (gọi khi worker khởi động) để request đầu tiên không phải chờ.
+
+        Args:
+            *model_classes: Các lớp mô hình cần tải.
+            run_forward (bool): Chạy thử một lượt forward để khởi tạo bộ nhớ và kernel.
+        """
+        for model_cls in model_classes:
+            model = self.get(model_cls)
+            if run_forward:
+                resolution = getattr(model, "resolution", 512)
+                dummy = torch.linspace(-1024, 1024, resolution * resolution).view(1, 1, resolution, resolution)
+                with torch.inference_mode():
+                    model(dummy)
+
+    def stats(self) -> dict:
+        """
+        Thống kê bộ nhớ đệm: số lần hit/miss, thời gian tải (giây) của từng mô hình (theo khóa cache)
+        và số lần mô hình phải tự thu phóng đầu vào sai độ phân giải (`fix_resolution`).
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "loaded": len(self._models),
+                "load_times": dict(self._load_times),
+                "resize_fallbacks": dict(xrv_utils.resize_fallback_count),
+            }
+
+    def clear(self):
+        """
+        Xóa toàn bộ mô hình đã tải.
+        """
+        with self._lock:
+            self._models.clear()
+            self._key_locks.clear()
+            self._load_times.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+model_registry = ModelRegistry()
+
+
+def get_model(torchscript: bool = False, precision: str = "fp32", device=None):
     """
     Tải mô hình DenseNet cho phân loại bệnh lý.
-    
+
+    Args:
+        torchscript (bool): Dùng bản TorchScript đã freeze (xem `torchscript.py`), nhanh hơn
+            nhưng chỉ để suy luận, không tính được Grad-CAM.
+        precision (str): "fp32" hoặc "int8". Bản int8 (xem `quantization.py`) có backbone
+            lượng tử hóa, nhanh hơn nhiều trên CPU nhưng chỉ để suy luận. Không dùng cùng `torchscript`.
+        device: Thiết bị chạy mô hình eager fp32 (mặc định CPU, ví dụ "cuda" hoặc "cuda:1").
+
     Returns:
-        Mô hình DenseNet đã được tải.
+        Mô hình DenseNet đã được tải (dùng chung trong tiến trình).
     """
-    model = baseline_models.gumball.DenseNet()
-    return model
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision phải là một trong {PRECISIONS}, nhận được {precision!r}")
+    if device is not None and (torchscript or precision != "fp32"):
+        raise ValueError("device chỉ áp dụng cho mô hình eager fp32")
+    if precision == "int8":
+        if torchscript:
+            raise ValueError("Mô hình int8 không hỗ trợ torchscript")
+        return model_registry.get(QuantizedModel, source_cls=baseline_models.gumball.DenseNet)
+    if torchscript:
+        return model_registry.get(ScriptedModel, source_cls=baseline_models.gumball.DenseNet)
+    if device is not None:
+        return model_registry.get(baseline_models.gumball.DenseNet, device=str(device))
+    return model_registry.get(baseline_models.gumball.DenseNet)
 
-def get_segmentation_model():
+def get_segmentation_model(torchscript: bool = False):
     """
     Tải mô hình PSPNet cho phân đoạn.
-    
+
+    Args:
+        torchscript (bool): Dùng bản TorchScript đã freeze (xem `torchscript.py`).
+
+    Returns:
+        Mô hình PSPNet đã được tải (dùng chung trong tiến trình).
+    """
+    if torchscript:
+        return model_registry.get(ScriptedModel, source_cls=baseline_models.gumball.PSPNet)
+    return model_registry.get(baseline_models.gumball.PSPNet)
+
+def get_baseline_model(model_cls, **kwargs):
+    """
+    Tải một mô hình bất kỳ trong `baseline_models` qua bộ nhớ đệm chung.
+
+    Args:
+        model_cls: Lớp mô hình (ví dụ `baseline_models.riken.AgeModel`).
+        **kwargs: Tham số khởi tạo của mô hình.
+
     Returns:
-        Mô hình PSPNet đã được tải.
+        Mô hình đã được tải.
+    """
+    return model_registry.get(model_cls, **kwargs)
+
+@functools.lru_cache(maxsize=None)
+def _weights_fingerprint(weights_path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(weights_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{os.path.basename(weights_path)}:{digest.hexdigest()[:16]}"
+
+def get_model_version(model=None) -> str:
+    """
+    Định danh phiên bản của mô hình phân loại, tính từ nội dung file trọng số.
+    Dùng làm một phần khóa cache kết quả, nên thay trọng số sẽ tự vô hiệu hóa cache cũ.
+
+    Args:
+        model: Mô hình cần lấy phiên bản (mặc định là mô hình của `get_model`).
+
+    Returns:
+        str: "<tên file trọng số>:<sha256 rút gọn>".
+    """
+    model = model if model is not None else get_model()
+    weights_path = model.weights_filename_local
+    stat = os.stat(weights_path)
+    return _weights_fingerprint(weights_path, stat.st_size, stat.st_mtime_ns)
+
+def warmup_models(run_forward: bool = True):
+    """
+    Tải trước mô hình phân loại và phân đoạn, dùng khi worker khởi động.
+
+    Args:
+        run_forward (bool): Chạy thử một lượt forward sau khi tải.
     """
-    seg_model = baseline_models.gumball.PSPNet()
-    return seg_model
\ No newline at end of file
+    model_registry.warmup(
+        baseline_models.gumball.DenseNet,
+        baseline_models.gumball.PSPNet,
+        run_forward=run_forward,
+    )
@@ -1,6 +1,19 @@
-from typing import List, Tuple, Dict, Any
-import numpy as np
+from typing import List, Tuple, Dict, Any, Optional, Type, Union
+import torch
 from ..torchxrayvision import baseline_models
 
-def get_model() -> baseline_models.chexpert.DenseNet: ...
-def process_xray_image(img_path: str) -> Tuple[List[Tuple[str, float]], List[Dict[str, Any]]]: ...
\ No newline at end of file
+class ModelRegistry:
+    def __init__(self) -> None: ...
+    def get(self, model_cls: Type[torch.nn.Module], **kwargs: Any) -> torch.nn.Module: ...
+    def warmup(self, *model_classes: Type[torch.nn.Module], run_forward: bool = ...) -> None: ...
+    def stats(self) -> Dict[str, Any]: ...
+    def clear(self) -> None: ...
+
+model_registry: ModelRegistry
+
+def get_model(torchscript: bool = ..., precision: str = ..., device: Optional[Union[str, torch.device]] = ...) -> baseline_models.gumball.DenseNet: ...
+def get_segmentation_model(torchscript: bool = ...) -> baseline_models.gumball.PSPNet: ...
+def get_baseline_model(model_cls: Type[torch.nn.Module], **kwargs: Any) -> torch.nn.Module: ...
+def get_model_version(model: torch.nn.Module = ...) -> str: ...
+def warmup_models(run_forward: bool = ...) -> None: ...
+def process_xray_image(img_path: str) -> Tuple[List[Tuple[str, float]], List[Dict[str, Any]]]: ...
@@ -0,0 +1,197 @@
+import io
+import os
+from typing import NamedTuple, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+
+from ..torchxrayvision import utils as xrv_utils
+
+DICOM_EXTENSIONS = (".dcm", ".dicom")
+DEFAULT_RESOLUTION = 512
+DEFAULT_NORMALIZATION = (-1024, 1024)
+
+
+def is_dicom(image_input):
+    """
+    Kiểm tra đầu vào (đường dẫn hoặc bytes) có phải file DICOM không, theo đuôi file hoặc mã "DICM".
+    """
+    if isinstance(image_input, (str, os.PathLike)):
+        if os.fspath(image_input).lower().endswith(DICOM_EXTENSIONS):
+            return True
+        with open(image_input, "rb") as f:
+            header = f.read(132)
+    elif isinstance(image_input, (bytes, bytearray, memoryview)):
+        header = bytes(image_input[:132])
+    else:
+        return False
+    # Tiền tố 128 byte + "DICM"
+    return header[128:132] == b"DICM"
+
+
+def _decode_dicom(image_input, resolution=None):
+    if isinstance(image_input, (bytes, bytearray, memoryview)):
+        image_input = io.BytesIO(image_input)
+
+    # Giải mã điểm ảnh một lần thành uint16, thu nhỏ theo hệ số nguyên trước khi chuyển sang float
+    return xrv_utils.read_xray_dcm_uint(image_input, min_size=resolution)
+
+
+def _decode_pil(image_input, resolution=None):
+    if isinstance(image_input, (bytes, bytearray, memoryview)):
+        image_input = io.BytesIO(image_input)
+
+    with Image.open(image_input) as image:
+        if resolution is not None:
+            # JPEG: giải mã thẳng ở độ phân giải nhỏ hơn (DCT scaling), cạnh ngắn vẫn >= resolution
+            image.draft("L", (resolution, resolution))
+
+        if image.mode in ("I;16", "I;16B", "I;16L"):
+            return np.asarray(image, dtype=np.uint16), 65535
+        if image.mode != "L":
+            image = image.convert("L")
+        return np.asarray(image), 255
+
+
+def decode_xray(image_input, resolution=None):
+    """
+    Giải mã ảnh X-quang thành mảng số nguyên 2 chiều, không qua float.
+
+    Args:
+        image_input: Đường dẫn file, bytes, file-like, file DICOM, hoặc mảng numpy
+            (kể cả mảng memory-map), shape [H, W] hoặc [H, W, C]. Mảng uint16 được hiểu
+            là ảnh 16 bit, các kiểu khác là giá trị 0-255.
+        resolution (int): Nếu có, cho phép thu nhỏ ảnh ngay khi giải mã (JPEG: DCT scaling,
+            DICOM: lấy trung bình khối theo hệ số nguyên), miễn là cạnh ngắn vẫn không nhỏ hơn `resolution`.
+
+    Returns:
+        tuple: (mảng uint8/uint16 [H, W], giá trị lớn nhất có thể của điểm ảnh).
+    """
+    if isinstance(image_input, np.ndarray):
+        image = image_input
+        if image.ndim > 2:
+            image = image[:, :, 0]
+        if image.ndim < 2:
+            raise ValueError("Kích thước ảnh nhỏ hơn 2 chiều")
+        return image, 65535 if image.dtype == np.uint16 else 255
+
+    try:
+        if is_dicom(image_input):
+            return _decode_dicom(image_input, resolution)
+        return _decode_pil(image_input, resolution)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Không tìm thấy file {image_input}!")
+
+
+def center_crop(image):
+    """
+    Cắt vùng vuông ở giữa theo cạnh dài (giống `XRayCenterCrop`), trả về view không sao chép.
+    """
+    h, w = image.shape[:2]
+    size = min(h, w)
+    top = h // 2 - size // 2
+    left = w // 2 - size // 2
+    return image[top:top + size, left:left + size]
+
+
+def resize(image, resolution):
+    """
+    Thu phóng ảnh vuông uint8/uint16 về [resolution, resolution] bằng bộ lọc bilinear
+    có khử răng cưa của PIL, giữ nguyên kiểu số nguyên.
+    """
+    if image.shape[0] == resolution and image.shape[1] == resolution:
+        return np.asarray(image)
+
+    if image.dtype not in (np.uint8, np.uint16):
+        pil_image = Image.fromarray(np.ascontiguousarray(image, dtype=np.float32), mode="F")
+    else:
+        pil_image = Image.fromarray(np.ascontiguousarray(image))
+    return np.asarray(pil_image.resize((resolution, resolution), Image.Resampling.BILINEAR))
+
+
+def normalize_(image, maxval, out=None, normalization=DEFAULT_NORMALIZATION):
+    """
+    Chuẩn hóa về khoảng `normalization` (mặc định [-1024, 1024]) bằng float32, tính tại chỗ trên `out`.
+
+    Args:
+        image: Mảng số nguyên [H, W].
+        maxval: Giá trị lớn nhất có thể của điểm ảnh.
+        out: Mảng float32 [H, W] để ghi kết quả (tạo mới nếu None).
+        normalization: Khoảng giá trị (min, max) đầu ra.
+
+    Returns:
+        Mảng float32 [H, W].
+    """
+    low, high = normalization
+    if out is None:
+        out = np.empty(image.shape, dtype=np.float32)
+    np.multiply(image, np.float32((high - low) / maxval), out=out, casting="unsafe")
+    out += np.float32(low)
+    return out
+
+
+def preprocess_xray(image_input, resolution: int = DEFAULT_RESOLUTION, normalization=DEFAULT_NORMALIZATION):
+    """
+    Tiền xử lý chuẩn cho ảnh X-quang: giải mã thành số nguyên, cắt vuông ở giữa,
+    thu phóng về `resolution` rồi chuẩn hóa về [-1024, 1024] bằng float32.
+
+    Args:
+        image_input: Đường dẫn file, bytes, file-like, file DICOM hoặc mảng numpy (xem `decode_xray`).
+        resolution (int): Kích thước cạnh ảnh đầu ra.
+        normalization: Khoảng giá trị (min, max) đầu ra.
+
+    Returns:
+        Tensor float32, shape [1, resolution, resolution].
+    """
+    image, maxval = decode_xray(image_input, resolution)
+    return preprocess_decoded(image, maxval, resolution, normalization)
+
+
+def preprocess_decoded(image, maxval, resolution: int = DEFAULT_RESOLUTION, normalization=DEFAULT_NORMALIZATION):
+    """
+    Phần sau giải mã của `preprocess_xray`, cho ảnh đã có từ `decode_xray`.
+
+    Args:
+        image: Mảng số nguyên [H, W].
+        maxval: Giá trị lớn nhất có thể của điểm ảnh.
+        resolution (int): Kích thước cạnh ảnh đầu ra.
+        normalization: Khoảng giá trị (min, max) đầu ra.
+
+    Returns:
+        Tensor float32, shape [1, resolution, resolution].
+    """
+    image = resize(center_crop(image), resolution)
+    return torch.from_numpy(normalize_(image, maxval, normalization=normalization)).unsqueeze(0)
+
+
+class PreprocessingPlan(NamedTuple):
+    """
+    Cách tiền xử lý ảnh cho một mô hình: thu phóng ngay khi giải mã về đúng độ phân giải
+    gốc của mô hình, để `utils.fix_resolution` trong `forward` không phải nội suy lại.
+    """
+    resolution: int
+    normalization: Tuple[float, float]
+
+    def __call__(self, image_input):
+        return preprocess_xray(image_input, self.resolution, self.normalization)
+
+    def decoded(self, image, maxval):
+        return preprocess_decoded(image, maxval, self.resolution, self.normalization)
+
+
+def plan_preprocessing(model):
+    """
+    Lập kế hoạch tiền xử lý từ metadata `resolution`/`normalization` mà mô hình công bố.
+
+    Args:
+        model: Mô hình trong `torchxrayvision` (có thể được bọc trong `DataParallel`).
+
+    Returns:
+        PreprocessingPlan: Gọi trực tiếp với ảnh đầu vào để nhận tensor [1, resolution, resolution].
+    """
+    model = getattr(model, "module", model)
+    return PreprocessingPlan(
+        resolution=getattr(model, "resolution", DEFAULT_RESOLUTION),
+        normalization=tuple(getattr(model, "normalization", DEFAULT_NORMALIZATION)),
+    )
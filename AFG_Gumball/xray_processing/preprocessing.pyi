@@ -0,0 +1,26 @@
+import os
+from typing import Any, NamedTuple, Optional, Tuple, Union
+import numpy as np
+import torch
+
+DICOM_EXTENSIONS: Tuple[str, ...]
+DEFAULT_RESOLUTION: int
+DEFAULT_NORMALIZATION: Tuple[float, float]
+
+ImageInput = Union[str, os.PathLike, bytes, Any, np.ndarray]
+
+def is_dicom(image_input: ImageInput) -> bool: ...
+def decode_xray(image_input: ImageInput, resolution: Optional[int] = ...) -> Tuple[np.ndarray, int]: ...
+def center_crop(image: np.ndarray) -> np.ndarray: ...
+def resize(image: np.ndarray, resolution: int) -> np.ndarray: ...
+def normalize_(image: np.ndarray, maxval: float, out: Optional[np.ndarray] = ..., normalization: Tuple[float, float] = ...) -> np.ndarray: ...
+def preprocess_xray(image_input: ImageInput, resolution: int = ..., normalization: Tuple[float, float] = ...) -> torch.Tensor: ...
+def preprocess_decoded(image: np.ndarray, maxval: float, resolution: int = ..., normalization: Tuple[float, float] = ...) -> torch.Tensor: ...
+
+class PreprocessingPlan(NamedTuple):
+    resolution: int
+    normalization: Tuple[float, float]
+    def __call__(self, image_input: ImageInput) -> torch.Tensor: ...
+    def decoded(self, image: np.ndarray, maxval: float) -> torch.Tensor: ...
+
+def plan_preprocessing(model: torch.nn.Module) -> PreprocessingPlan: ...
@@ -0,0 +1,225 @@
+"""
+Lượng tử hóa int8 (post-training static quantization) cho mô hình phân loại gumball trên CPU.
+
+Backbone DenseNet121 (phần chiếm gần hết thời gian suy luận) được lượng tử hóa bằng FX
+graph mode với một tập ảnh hiệu chỉnh; attention map và các head phân loại giữ float32.
+
+    python -m AFG_Gumball.xray_processing.quantization --calibration-dir calib/ --eval-dir samples/
+"""
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from ..torchxrayvision import baseline_models
+from .preprocessing import DICOM_EXTENSIONS, plan_preprocessing
+
+PRECISIONS = ("fp32", "int8")
+QUANTIZED_EXT = ".pt"
+CALIBRATION_DIR_ENV = "GUMBALL_CALIBRATION_DIR"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png") + DICOM_EXTENSIONS
+
+# Thuộc tính của mô hình gốc được giữ lại trên `QuantizedModel`
+_METADATA = ("targets", "pathologies", "resolution", "normalization", "weights_filename_local")
+
+
+def quantized_weights_path(model):
+    """
+    Đường dẫn file trọng số int8 tương ứng với file trọng số float của mô hình
+    (kèm backend lượng tử hóa, vì tham số đã đóng gói phụ thuộc vào backend).
+    """
+    return f"{model.weights_filename_local}.int8-{torch.backends.quantized.engine}{QUANTIZED_EXT}"
+
+
+def list_images(directory, limit=None):
+    """
+    Liệt kê ảnh X-quang (JPEG, PNG, DICOM) trong thư mục, theo thứ tự tên file.
+    """
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(IMAGE_EXTENSIONS))
+    return [os.path.join(directory, name) for name in names[:limit]]
+
+
+def _classifier(model):
+    # Bỏ lớp bọc `DataParallel` (nếu có) quanh `Classifier`
+    return getattr(model.model, "module", model.model)
+
+
+def _prepare_backbone(model):
+    classifier = _classifier(model)
+    resolution = getattr(model, "resolution", 512)
+    example = (torch.zeros(1, 3, resolution, resolution),)
+    qconfig_mapping = get_default_qconfig_mapping(torch.backends.quantized.engine)
+    classifier.backbone = prepare_fx(classifier.backbone.eval(), qconfig_mapping, example)
+    return classifier
+
+
+def _batches(images, plan, batch_size):
+    for start in range(0, len(images), batch_size):
+        yield torch.stack([plan(image) for image in images[start:start + batch_size]])
+
+
+def quantize_model(model, calibration_images, batch_size: int = 8):
+    """
+    Lượng tử hóa tĩnh backbone của mô hình gumball DenseNet sang int8.
+
+    Args:
+        model: Mô hình `gumball.DenseNet` float32 (không bị thay đổi).
+        calibration_images: Danh sách ảnh hiệu chỉnh (đường dẫn hoặc mảng numpy), nên là
+            ảnh thật cùng phân phối với dữ liệu suy luận (vài chục ảnh là đủ).
+        batch_size (int): Số ảnh trong một lượt forward khi hiệu chỉnh.
+
+    Returns:
+        Bản sao của mô hình với backbone int8, chỉ dùng để suy luận (không tính được Grad-CAM).
+    """
+    calibration_images = list(calibration_images)
+    if not calibration_images:
+        raise ValueError("Cần ít nhất một ảnh để hiệu chỉnh lượng tử hóa")
+
+    model = copy.deepcopy(model).eval()
+    plan = plan_preprocessing(model)
+    classifier = _prepare_backbone(model)
+
+    with torch.inference_mode():
+        for batch in _batches(calibration_images, plan, batch_size):
+            model(batch)
+
+    classifier.backbone = convert_fx(classifier.backbone)
+    return model
+
+
+def save_quantized(model, path):
+    """
+    Lưu trọng số backbone int8 (kèm scale/zero point), ghi ra file tạm rồi đổi tên.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(_classifier(model).backbone.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_quantized(model, path):
+    """
+    Dựng lại backbone int8 trên mô hình float vừa tải rồi nạp trọng số đã lượng tử hóa
+    từ `save_quantized`, không cần hiệu chỉnh lại.
+    """
+    classifier = _prepare_backbone(model)
+    classifier.backbone = convert_fx(classifier.backbone)
+    classifier.backbone.load_state_dict(torch.load(path, map_location="cpu"))
+    return model.eval()
+
+
+class QuantizedModel(torch.nn.Module):
+    """
+    Mô hình gumball DenseNet với backbone int8, giữ nguyên metadata của mô hình gốc
+    (`pathologies`, `resolution`, ...). Chỉ dùng để suy luận, không tính được Grad-CAM.
+
+    File trọng số int8 được tạo lần đầu (hoặc khi file trọng số float mới hơn) bằng cách
+    hiệu chỉnh trên các ảnh trong `calibration_dir`, mặc định lấy từ biến môi trường
+    `GUMBALL_CALIBRATION_DIR`.
+    """
+
+    def __init__(self, source_cls, calibration_dir=None):
+        super().__init__()
+        model = source_cls()
+        path = quantized_weights_path(model)
+
+        if not os.path.isfile(path) or os.path.getmtime(path) < os.path.getmtime(model.weights_filename_local):
+            calibration_dir = calibration_dir or os.environ.get(CALIBRATION_DIR_ENV)
+            if not calibration_dir:
+                raise FileNotFoundError(
+                    f"Không tìm thấy trọng số int8 {path}. Chạy "
+                    f"`python -m AFG_Gumball.xray_processing.quantization --calibration-dir <thư mục ảnh>` "
+                    f"hoặc đặt biến môi trường {CALIBRATION_DIR_ENV}."
+                )
+            self.model = quantize_model(model, list_images(calibration_dir))
+            save_quantized(self.model, path)
+        else:
+            self.model = load_quantized(model, path)
+
+        self.quantized_path = path
+        for name in _METADATA:
+            if hasattr(model, name):
+                setattr(self, name, getattr(model, name))
+        self._repr = f"{model!r}-int8"
+
+    def forward(self, x):
+        return self.model(x)
+
+    def __repr__(self):
+        return self._repr
+
+
+def drift_report(float_model, quantized_model, images, threshold: float = 0.5, batch_size: int = 8) -> dict:
+    """
+    So sánh đầu ra của mô hình int8 với mô hình float trên một tập ảnh mẫu.
+
+    Args:
+        float_model: Mô hình float32 tham chiếu.
+        quantized_model: Mô hình int8 (ví dụ từ `quantize_model` hoặc `QuantizedModel`).
+        images: Danh sách ảnh (đường dẫn hoặc mảng numpy).
+        threshold (float): Ngưỡng xác suất để so sánh kết luận có/không có bệnh lý.
+        batch_size (int): Số ảnh trong một lượt forward.
+
+    Returns:
+        dict: {"images", "max_abs_diff", "mean_abs_diff", "agreement", "pathologies": {tên: {...}}},
+        trong đó `agreement` là tỉ lệ kết luận (xác suất > threshold) trùng nhau.
+    """
+    images = list(images)
+    plan = plan_preprocessing(float_model)
+
+    float_probs, quantized_probs = [], []
+    with torch.inference_mode():
+        for batch in _batches(images, plan, batch_size):
+            float_probs.append(float_model(batch).cpu().numpy())
+            quantized_probs.append(quantized_model(batch).cpu().numpy())
+
+    float_probs = np.concatenate(float_probs)
+    quantized_probs = np.concatenate(quantized_probs)
+    diff = np.abs(float_probs - quantized_probs)
+    agree = (float_probs > threshold) == (quantized_probs > threshold)
+
+    return {
+        "images": len(images),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "agreement": float(agree.mean()),
+        "pathologies": {
+            name: {
+                "max_abs_diff": float(diff[:, i].max()),
+                "mean_abs_diff": float(diff[:, i].mean()),
+                "agreement": float(agree[:, i].mean()),
+            }
+            for i, name in enumerate(float_model.pathologies)
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lượng tử hóa int8 mô hình gumball DenseNet và báo cáo sai lệch.")
+    parser.add_argument("--calibration-dir", required=True, help="Thư mục ảnh dùng để hiệu chỉnh.")
+    parser.add_argument("--eval-dir", default=None, help="Thư mục ảnh để so sánh với mô hình float (mặc định bỏ qua).")
+    parser.add_argument("--limit", type=int, default=None, help="Số ảnh tối đa mỗi thư mục.")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--report", default=None, help="Ghi báo cáo sai lệch ra file JSON.")
+    args = parser.parse_args(argv)
+
+    float_model = baseline_models.gumball.DenseNet().eval()
+    quantized = quantize_model(float_model, list_images(args.calibration_dir, args.limit))
+    print(f"int8: {save_quantized(quantized, quantized_weights_path(float_model))}")
+
+    if args.eval_dir:
+        report = drift_report(float_model, quantized, list_images(args.eval_dir, args.limit), args.threshold)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+import numpy as np
+import torch
+
+PRECISIONS: Tuple[str, ...]
+QUANTIZED_EXT: str
+CALIBRATION_DIR_ENV: str
+IMAGE_EXTENSIONS: Tuple[str, ...]
+
+def quantized_weights_path(model: torch.nn.Module) -> str: ...
+def list_images(directory: Union[str, os.PathLike], limit: Optional[int] = ...) -> List[str]: ...
+def quantize_model(
+    model: torch.nn.Module,
+    calibration_images: Iterable[Union[str, os.PathLike, np.ndarray]],
+    batch_size: int = ...
+) -> torch.nn.Module: ...
+def save_quantized(model: torch.nn.Module, path: Union[str, os.PathLike]) -> Union[str, os.PathLike]: ...
+def load_quantized(model: torch.nn.Module, path: Union[str, os.PathLike]) -> torch.nn.Module: ...
+
+class QuantizedModel(torch.nn.Module):
+    model: torch.nn.Module
+    quantized_path: str
+    targets: List[str]
+    pathologies: List[str]
+    resolution: int
+    normalization: Tuple[float, float]
+    weights_filename_local: str
+    def __init__(self, source_cls: Type[torch.nn.Module], calibration_dir: Optional[Union[str, os.PathLike]] = ...) -> None: ...
+    def forward(self, x: torch.Tensor) -> torch.Tensor: ...
+
+def drift_report(
+    float_model: torch.nn.Module,
+    quantized_model: torch.nn.Module,
+    images: Iterable[Union[str, os.PathLike, np.ndarray]],
+    threshold: float = ...,
+    batch_size: int = ...
+) -> Dict[str, Any]: ...
+
+def main(argv: Optional[Sequence[str]] = ...) -> None: ...
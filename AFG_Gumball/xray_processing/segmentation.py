@@ -1,19 +1,18 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import torch
 import torch.nn.functional as F
 from .model_utils import get_segmentation_model
 from .enums import BodyPart
 
-def get_body_part_segment(image, part: BodyPart):
-    """
-    Trả về vùng phân đoạn của một bộ phận cơ thể cụ thể từ ảnh X-ray.
+NUM_BODY_PARTS = len(BodyPart)
+BACKGROUND_LABEL = 255  # Giá trị trong bản đồ nhãn cho điểm ảnh không thuộc bộ phận nào
 
-    Args:
-        image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
-        part: Bộ phận cơ thể cần lấy vùng phân đoạn (BodyPart enum).
 
-    Returns:
-        Tensor vùng phân đoạn của bộ phận được chỉ định, shape [512, 512].
-    """
+def _pad_to_square(image):
     _, h, w = image.shape
     if h != w:
         diff = abs(h - w)
@@ -25,16 +24,212 @@ def get_body_part_segment(image, part: BodyPart):
             top = diff // 2
             bottom = diff - top
             padding = (0, 0, top, bottom)
-        
+
         image = F.pad(image, padding, mode='constant', value=0)
 
-    seg_model = get_segmentation_model()
-    
-    output = seg_model(image.unsqueeze(0))
-    
-    assert output.shape == (1, 14, 512, 512), f"Output shape không khớp: {output.shape}"
-    
-    part_index = part.value
-    segment = output[0, part_index, :, :]
-    
-    return segment
\ No newline at end of file
+    return image
+
+
+def _image_hash(image):
+    image = np.ascontiguousarray(image.detach().cpu().numpy())
+    digest = hashlib.sha256(f"{image.dtype.str}{image.shape};".encode())
+    digest.update(image.data)
+    return digest.hexdigest()
+
+
+class SegmentationService:
+    """
+    Phân đoạn giải phẫu bằng PSPNet với bộ nhớ đệm theo ảnh.
+
+    Mỗi ảnh chỉ chạy mô hình một lần: toàn bộ kết quả [14, 512, 512] được ghi nhớ theo
+    hash của ảnh (LRU), nên lấy nhiều bộ phận của cùng một ảnh không phải chạy lại mô hình.
+    Kết quả trả về dùng chung với bộ nhớ đệm, không được sửa trực tiếp. Nhiều luồng cùng
+    yêu cầu một ảnh chưa có trong bộ nhớ đệm chỉ chạy mô hình một lần.
+
+    Args:
+        cache_size (int): Số ảnh tối đa được ghi nhớ.
+        torchscript (bool): Chạy PSPNet bằng bản TorchScript đã freeze.
+    """
+
+    def __init__(self, cache_size: int = 8, torchscript: bool = False):
+        self.cache_size = cache_size
+        self.torchscript = torchscript
+        self._lock = threading.Lock()
+        self._outputs = OrderedDict()
+        self._key_locks = {}
+        self._hits = 0
+        self._misses = 0
+
+    def segment(self, image):
+        """
+        Chạy phân đoạn (hoặc lấy từ bộ nhớ đệm) cho một ảnh.
+
+        Args:
+            image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+
+        Returns:
+            Tensor logit của 14 bộ phận, shape [14, 512, 512].
+        """
+        key = _image_hash(image)
+
+        with self._lock:
+            output = self._cached(key)
+            if output is not None:
+                return output
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Khóa riêng cho từng ảnh: các luồng đến sau chờ lượt chạy đang diễn ra thay vì chạy lại
+        with key_lock:
+            with self._lock:
+                output = self._cached(key)
+                if output is not None:
+                    return output
+                self._misses += 1
+
+            try:
+                seg_model = get_segmentation_model(torchscript=self.torchscript)
+                with torch.inference_mode():
+                    output = seg_model(_pad_to_square(image).unsqueeze(0))
+
+                assert output.shape == (1, NUM_BODY_PARTS, 512, 512), f"Output shape không khớp: {output.shape}"
+                output = output[0]
+
+                with self._lock:
+                    self._outputs[key] = output
+                    while len(self._outputs) > self.cache_size:
+                        self._outputs.popitem(last=False)
+            finally:
+                # Khóa chỉ cần khi đang chạy; bỏ đi để không giữ một khóa cho mỗi ảnh đã gặp
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+        return output
+
+    def _cached(self, key):
+        # Gọi khi đang giữ self._lock
+        output = self._outputs.get(key)
+        if output is not None:
+            self._outputs.move_to_end(key)
+            self._hits += 1
+        return output
+
+    def get_segments(self, image, parts=None):
+        """
+        Lấy vùng phân đoạn của nhiều bộ phận từ cùng một lượt chạy mô hình.
+
+        Args:
+            image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+            parts: Danh sách bộ phận (BodyPart enum), mặc định là tất cả.
+
+        Returns:
+            dict: {BodyPart: Tensor logit shape [512, 512]}.
+        """
+        output = self.segment(image)
+        parts = list(BodyPart) if parts is None else parts
+        return {part: output[part.value] for part in parts}
+
+    def get_label_map(self, image, threshold=0.5):
+        """
+        Bản đồ nhãn: chỉ số bộ phận có logit lớn nhất tại mỗi điểm ảnh (giá trị của BodyPart).
+
+        Args:
+            image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+            threshold: Điểm ảnh có xác suất (sigmoid) cao nhất nhỏ hơn ngưỡng này được gán
+                `BACKGROUND_LABEL`. None để lấy argmax thuần.
+
+        Returns:
+            Tensor uint8, shape [512, 512].
+        """
+        output = self.segment(image)
+        max_logits, label_map = output.max(dim=0)
+        label_map = label_map.to(torch.uint8)
+        if threshold is not None:
+            label_map[torch.sigmoid(max_logits) < threshold] = BACKGROUND_LABEL
+        return label_map
+
+    def stats(self) -> dict:
+        """
+        Thống kê bộ nhớ đệm: số lần hit/miss và số ảnh đang được ghi nhớ.
+        """
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "cached": len(self._outputs)}
+
+    def clear(self):
+        """
+        Xóa toàn bộ kết quả đã ghi nhớ.
+        """
+        with self._lock:
+            self._outputs.clear()
+            self._key_locks.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+segmentation_service = SegmentationService()
+
+
+def label_map_regions(label_map):
+    """
+    Tính diện tích và khung bao của từng bộ phận trong bản đồ nhãn.
+
+    Args:
+        label_map: Bản đồ nhãn uint8 [H, W] (giá trị của BodyPart hoặc `BACKGROUND_LABEL`),
+            ví dụ từ `get_label_map`.
+
+    Returns:
+        dict: {tên BodyPart: {"area": số điểm ảnh, "bbox": [x_min, y_min, x_max, y_max]}},
+        chỉ gồm các bộ phận xuất hiện trong ảnh. Khung bao tính cả hai biên.
+    """
+    label_map = np.asarray(label_map.cpu() if torch.is_tensor(label_map) else label_map)
+    areas = np.bincount(label_map.ravel(), minlength=BACKGROUND_LABEL + 1)
+
+    regions = {}
+    for part in BodyPart:
+        if not areas[part.value]:
+            continue
+        mask = label_map == part.value
+        ys = np.flatnonzero(mask.any(axis=1))
+        xs = np.flatnonzero(mask.any(axis=0))
+        regions[part.name] = {
+            "area": int(areas[part.value]),
+            "bbox": [int(xs[0]), int(ys[0]), int(xs[-1]), int(ys[-1])],
+        }
+    return regions
+
+
+def get_body_part_segment(image, part: BodyPart):
+    """
+    Trả về vùng phân đoạn của một bộ phận cơ thể cụ thể từ ảnh X-ray.
+
+    Args:
+        image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+        part: Bộ phận cơ thể cần lấy vùng phân đoạn (BodyPart enum).
+
+    Returns:
+        Tensor vùng phân đoạn của bộ phận được chỉ định, shape [512, 512].
+    """
+    return segmentation_service.segment(image)[part.value]
+
+def get_body_part_segments(image, parts=None):
+    """
+    Trả về vùng phân đoạn của nhiều bộ phận với một lượt chạy mô hình.
+
+    Args:
+        image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+        parts: Danh sách bộ phận (BodyPart enum), mặc định là tất cả.
+
+    Returns:
+        dict: {BodyPart: Tensor shape [512, 512]}.
+    """
+    return segmentation_service.get_segments(image, parts)
+
+def get_label_map(image, threshold=0.5):
+    """
+    Trả về bản đồ nhãn uint8 [512, 512] (giá trị của BodyPart), nhỏ hơn 56 lần so với toàn bộ logit.
+
+    Args:
+        image: Ảnh X-ray đã được tiền xử lý. (Tensor, shape [1, H, W] hoặc [C, H, W])
+        threshold: Ngưỡng xác suất cho nền (xem `SegmentationService.get_label_map`).
+    """
+    return segmentation_service.get_label_map(image, threshold)
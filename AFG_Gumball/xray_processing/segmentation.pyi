@@ -1,4 +1,24 @@
+from typing import Any, Dict, Iterable, Optional
 import torch
 from .enums import BodyPart
 
-def get_body_part_segment(image: torch.Tensor, part: BodyPart) -> torch.Tensor: ...
\ No newline at end of file
+NUM_BODY_PARTS: int
+BACKGROUND_LABEL: int
+
+class SegmentationService:
+    cache_size: int
+    torchscript: bool
+    def __init__(self, cache_size: int = ..., torchscript: bool = ...) -> None: ...
+    def segment(self, image: torch.Tensor) -> torch.Tensor: ...
+    def get_segments(self, image: torch.Tensor, parts: Optional[Iterable[BodyPart]] = ...) -> Dict[BodyPart, torch.Tensor]: ...
+    def get_label_map(self, image: torch.Tensor, threshold: Optional[float] = ...) -> torch.Tensor: ...
+    def stats(self) -> Dict[str, Any]: ...
+    def clear(self) -> None: ...
+
+segmentation_service: SegmentationService
+
+def label_map_regions(label_map: torch.Tensor | Any) -> Dict[str, Dict[str, Any]]: ...
+
+def get_body_part_segment(image: torch.Tensor, part: BodyPart) -> torch.Tensor: ...
+def get_body_part_segments(image: torch.Tensor, parts: Optional[Iterable[BodyPart]] = ...) -> Dict[BodyPart, torch.Tensor]: ...
+def get_label_map(image: torch.Tensor, threshold: Optional[float] = ...) -> torch.Tensor: ...
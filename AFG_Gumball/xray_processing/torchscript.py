@@ -0,0 +1,117 @@
+"""
+Xuất mô hình gumball sang TorchScript (trace + freeze) để suy luận nhanh hơn trên CPU.
+
+    python -m AFG_Gumball.xray_processing.torchscript --model densenet pspnet
+"""
+import argparse
+import os
+
+import torch
+
+from ..torchxrayvision import baseline_models
+from ..torchxrayvision import utils as xrv_utils
+
+TORCHSCRIPT_EXT = ".ts"
+
+# Thuộc tính của mô hình gốc được giữ lại trên `ScriptedModel`
+_METADATA = ("targets", "pathologies", "resolution", "normalization", "weights_filename_local")
+
+EXPORTABLE_MODELS = {
+    "densenet": baseline_models.gumball.DenseNet,
+    "pspnet": baseline_models.gumball.PSPNet,
+}
+
+
+def _trace_resolution(model):
+    return getattr(model, "resolution", 512)
+
+
+def torchscript_path(model):
+    """
+    Đường dẫn file TorchScript tương ứng với file trọng số của mô hình
+    (kèm phiên bản torch, vì file đã freeze không dùng được giữa các phiên bản).
+    """
+    return f"{model.weights_filename_local}.torch-{torch.__version__}{TORCHSCRIPT_EXT}"
+
+
+def export_torchscript(model, path=None, batch_size: int = 1):
+    """
+    Trace và freeze một mô hình eager, lưu thành file TorchScript.
+
+    Args:
+        model: Mô hình gumball đã tải (DenseNet hoặc PSPNet).
+        path: Đường dẫn file đầu ra (mặc định là `torchscript_path(model)`).
+        batch_size (int): Kích thước lô của input mẫu dùng để trace. Mô hình sau khi
+            trace vẫn chạy được với kích thước lô bất kỳ.
+
+    Returns:
+        str: Đường dẫn file đã lưu.
+    """
+    path = path or torchscript_path(model)
+    model = model.eval()
+
+    resolution = _trace_resolution(model)
+    example = torch.linspace(-1024, 1024, batch_size * resolution * resolution).view(batch_size, 1, resolution, resolution)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example, check_trace=False)
+        frozen = torch.jit.freeze(traced)
+
+    # Lưu ra file tạm rồi đổi tên, để worker khác không đọc phải file dở dang
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(frozen, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ScriptedModel(torch.nn.Module):
+    """
+    Mô hình gumball chạy bằng TorchScript, giữ nguyên metadata của mô hình gốc
+    (`pathologies`, `resolution`, ...). Chỉ dùng để suy luận: không có backbone eager
+    nên không tính được Grad-CAM.
+
+    File TorchScript được tạo tự động lần đầu (hoặc khi file trọng số mới hơn).
+    Mô hình được trace ở độ phân giải gốc, nên input có kích thước khác được resize
+    trước (qua `fix_resolution`, giống mô hình eager) thay vì chạy sai nhánh đã trace.
+    """
+
+    def __init__(self, source_cls):
+        super().__init__()
+        model = source_cls()
+        path = torchscript_path(model)
+
+        if not os.path.isfile(path) or os.path.getmtime(path) < os.path.getmtime(model.weights_filename_local):
+            export_torchscript(model, path)
+
+        self.scripted = torch.jit.load(path, map_location="cpu")
+        self.torchscript_path = path
+        self.input_resolution = _trace_resolution(model)
+        for name in _METADATA:
+            if hasattr(model, name):
+                setattr(self, name, getattr(model, name))
+        self._repr = f"{model!r}-torchscript"
+
+    def forward(self, x):
+        x = xrv_utils.fix_resolution(x, self.input_resolution, self)
+        return self.scripted(x)
+
+    def __repr__(self):
+        return self._repr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xuất mô hình gumball sang TorchScript.")
+    parser.add_argument("--model", nargs="+", choices=sorted(EXPORTABLE_MODELS), default=sorted(EXPORTABLE_MODELS))
+    parser.add_argument("--output-dir", default=None, help="Thư mục lưu (mặc định cạnh file trọng số).")
+    args = parser.parse_args(argv)
+
+    for name in args.model:
+        model = EXPORTABLE_MODELS[name]()
+        path = None
+        if args.output_dir:
+            path = os.path.join(args.output_dir, os.path.basename(torchscript_path(model)))
+        print(f"{name}: {export_torchscript(model, path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+from typing import Dict, List, Optional, Sequence, Tuple, Type, Union
+import torch
+
+TORCHSCRIPT_EXT: str
+EXPORTABLE_MODELS: Dict[str, Type[torch.nn.Module]]
+
+def torchscript_path(model: torch.nn.Module) -> str: ...
+def export_torchscript(model: torch.nn.Module, path: Optional[Union[str, os.PathLike]] = ..., batch_size: int = ...) -> str: ...
+
+class ScriptedModel(torch.nn.Module):
+    scripted: torch.jit.ScriptModule
+    torchscript_path: str
+    input_resolution: int
+    targets: List[str]
+    pathologies: List[str]
+    resolution: int
+    normalization: Tuple[float, float]
+    weights_filename_local: str
+    def __init__(self, source_cls: Type[torch.nn.Module]) -> None: ...
+    def forward(self, x: torch.Tensor) -> torch.Tensor: ...
+
+def main(argv: Optional[Sequence[str]] = ...) -> None: ...
@@ -12,6 +12,8 @@ from app.core.config import settings
 from app.core.security import create_task_token
 from app.core.storage import user_storage
 from app.tasks import convert_to_jpeg_task
+from ...AFG_Gumball.torchxrayvision.utils import read_xray_dcm_header
+from ...AFG_Gumball.xray_processing.preprocessing import DICOM_EXTENSIONS
 
 router = APIRouter()
 
@@ -24,25 +26,37 @@ def add_image(
     """
     Upload an image and store it in the user's folder.
     Automatically continue to convert image to jpeg.
+    DICOM files (`.dcm`) are accepted directly; only their header is read here.
     """
 
     if file.size > settings.MAX_FILE_UPLOAD_SIZE:
         raise HTTPException(status_code=400, detail="File size exceeded limit")
     
     try:
-        file_ext = os.path.splitext(file.filename)[1]
+        file_ext = os.path.splitext(file.filename)[1].lower()
 
         if file_ext not in settings.IMAGE_FILE_ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Image file extension not allowed")
+
+        if file_ext in DICOM_EXTENSIONS:
+            # Validate the header without decoding pixel data
+            try:
+                read_xray_dcm_header(file.file)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Unsupported DICOM file")
+            finally:
+                file.file.seek(0)
         
         user_folder = user_storage.dir_of(current_user.id)
         image_name = user_folder.add_scan(file_ext, file.file)
 
-        task = convert_to_jpeg_task.delay(current_user.id, image_name)
+        task = convert_to_jpeg_task.delay(current_user, image_name)
 
         return {
             "task_token": create_task_token(current_user, task)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to upload and process image")
     
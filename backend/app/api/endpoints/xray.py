@@ -10,7 +10,7 @@ from app.core.storage import user_storage
 from app.core.security import create_task_token
 from app.models import User
 from app.tasks import \
-    analyze_xray_task, \
+    analyze_xray_task, segment_xray_task, \
     friendly_ai_xray_analysis_task, expert_ai_xray_analysis_task # , \
     # create_medical_record_task, validate_diagnosis_task, enhance_medical_record_task
 from app.utils.db_wrapper import AsyncDBWrapper
@@ -49,6 +49,26 @@ async def analyze_xray(
     }
 
 
+@router.post("/segment-xray")
+async def segment_xray(
+    current_user: User = Depends(deps.get_current_active_user),
+    scan_id: str = Body(..., embed=True),
+):
+    """
+    Endpoint to segment the anatomy of an analyzed xray image.
+    """
+    user_folder = user_storage.dir_of(current_user.id)
+    if not user_folder.analyzed_image(scan_id).exists():
+        raise HTTPException(status_code=400, detail="Invalid scan ID")
+    if user_folder.segmentation(scan_id).exists():
+        raise HTTPException(status_code=400, detail="Segmentation already existed")
+
+    segment_task = segment_xray_task.delay(current_user, scan_id)
+    return {
+        "task_token": create_task_token(current_user, segment_task)
+    }
+
+
 @router.post("/friendly-analysis")
 async def friendly_suggest_treatment(
     current_user: User = Depends(deps.get_current_active_user),
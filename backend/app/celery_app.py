@@ -1,4 +1,6 @@
 from celery import Celery
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import worker_process_init, worker_ready
 from app.core.config import settings
 
 celery_app = Celery(
@@ -7,4 +9,27 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND,
 )
 celery_app.conf.result_expires = settings.CELERY_RESULT_EXPIRE_SECONDS
-celery_app.conf.task_routes = {"app.tasks.*": {"queue": "ai_queue"}}
\ No newline at end of file
+celery_app.conf.task_routes = {"app.tasks.*": {"queue": "ai_queue"}}
+
+
+def _warmup_ai_models():
+    from ...AFG_Gumball.xray_processing import warmup_models
+    warmup_models()
+
+
+@worker_process_init.connect
+def warmup_ai_models(**kwargs):
+    """
+    Load the AI models once per prefork child process so the first task doesn't pay for it.
+    """
+    _warmup_ai_models()
+
+
+@worker_ready.connect
+def warmup_ai_models_in_worker(sender=None, **kwargs):
+    """
+    Thread (and solo) pools run tasks in the main worker process and never send
+    `worker_process_init`, so load the models there once the worker is up.
+    """
+    if not isinstance(getattr(sender, "pool", None), PreforkPool):
+        _warmup_ai_models()
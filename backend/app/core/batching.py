@@ -0,0 +1,120 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrently running tasks for up to `window_ms` milliseconds
+    (or until `max_batch_size` items are pending), then processes them with a single call to
+    `batch_function`. Each caller gets a `Future` resolved with its own result.
+
+    `batch_function` receives a list of items and must return one result per item, in order.
+    A result that is an exception instance is raised to that item's caller only.
+    The worker thread is started lazily, so it's safe to create the batcher before Celery forks.
+    """
+
+    def __init__(
+        self,
+        batch_function: Callable[[list], Sequence[Any]],
+        max_batch_size: int,
+        window_ms: float,
+        name: str = "batcher",
+    ):
+        self._batch_function = batch_function
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._batch_sizes = Counter()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for the next batch.
+        """
+        future = Future()
+        self._ensure_started().put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """
+        Submit an item and block until its result is ready.
+        """
+        return self.submit(item).result()
+
+    def stats(self) -> dict:
+        """
+        Achieved batch sizes since the worker process started.
+        """
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            items = sum(size * count for size, count in self._batch_sizes.items())
+            return {
+                "batches": batches,
+                "items": items,
+                "mean_batch_size": items / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def _ensure_started(self) -> queue.Queue:
+        with self._lock:
+            # Threads don't survive a fork, so (re)start one per process
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._batch_sizes.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _run(self):
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: list):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+
+        start = time.perf_counter()
+        try:
+            results = list(self._batch_function(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        with self._lock:
+            self._batch_sizes[len(batch)] += 1
+        logger.info(f"{self.name}: processed batch of {len(batch)} in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+CACHE_EXT = ".h5"
+
+
+class InferenceCache:
+    """
+    Content-addressed store of analysis results (`.h5`), shared by every user.
+
+    Entries are keyed by a hash of the decoded pixel data together with everything that
+    changes the output (model version, threshold, heatmap format), so re-uploading the same
+    study reuses the previous result instead of running inference again. Results are shared
+    by hard link when possible, so a cached result costs no extra disk space.
+
+    Entries are evicted least-recently-used first (by mtime, refreshed on every hit) once the
+    cache grows past `max_bytes`. Evicting an entry never touches the users' own links to it.
+    Only entries that no user folder links to anymore (`st_nlink == 1`) count towards
+    `max_bytes` and are evicted, since deleting a linked entry would free no disk space.
+
+    `store` keeps a running total of those bytes and only scans the whole cache when the total
+    goes over budget, or when the last scan is older than `rescan_seconds` (users deleting their
+    results change the total without going through the cache).
+    """
+
+    def __init__(self, root: os.PathLike, max_bytes: int, rescan_seconds: float = 3600):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Unknown until the first scan
+        self._scanned_at = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _pixel_data(image_path: os.PathLike) -> np.ndarray:
+        if os.fspath(image_path).endswith(".npy"):
+            return np.load(image_path, mmap_mode="r")
+        with Image.open(image_path) as image:
+            return np.asarray(image.convert("L"))
+
+    def key_for(self, image_path: os.PathLike, **params) -> str:
+        """
+        Cache key of an image: the hash of its decoded pixels plus the given parameters
+        (e.g. `model_version`, `threshold`, `heatmap_format`).
+        """
+        pixels = self._pixel_data(image_path)
+
+        digest = hashlib.sha256()
+        for name, value in sorted(params.items()):
+            digest.update(f"{name}={value};".encode())
+        digest.update(f"{pixels.dtype.str}{pixels.shape};".encode())
+        digest.update(np.ascontiguousarray(pixels).data)
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{CACHE_EXT}"
+
+    def fetch(self, key: str, dest: os.PathLike) -> bool:
+        """
+        Place the cached result for `key` at `dest`. Returns False on a cache miss.
+        """
+        cached = self.path_for(key)
+        try:
+            _link_or_copy(cached, dest)
+            os.utime(cached)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return False
+
+        with self._lock:
+            self._hits += 1
+        return True
+
+    @staticmethod
+    def _owned_bytes(path: Path) -> int:
+        # Bytes that deleting the entry would free: none while a user folder still links to it
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return 0
+        return stat.st_size if stat.st_nlink == 1 else 0
+
+    def store(self, key: str, src: os.PathLike):
+        """
+        Add a freshly computed result to the cache, then evict old entries if it's over budget.
+        """
+        cached = self.path_for(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        replaced = self._owned_bytes(cached)
+
+        # Link under a temporary name first so concurrent readers never see a partial entry
+        tmp_path = cached.with_name(f"{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        _link_or_copy(src, tmp_path)
+        tmp_path.replace(cached)
+
+        added = self._owned_bytes(cached)
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += added - replaced
+            needs_scan = (
+                self._total_bytes is None
+                or self._total_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at > self.rescan_seconds
+            )
+        if needs_scan:
+            self.evict()
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Scan the cache and delete least recently used entries until the bytes it alone holds
+        fit in `max_bytes`. Entries still linked from a user folder are neither counted nor deleted.
+
+        Returns:
+            Number of entries removed.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for entry in self.root.glob(f"*/*{CACHE_EXT}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_nlink == 1:
+                entries.append((stat.st_mtime_ns, stat.st_size, entry))
+                total += stat.st_size
+
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self._scanned_at = time.monotonic()
+
+        if removed:
+            with self._lock:
+                self._evictions += removed
+            logger.info(f"Inference cache: evicted {removed} entries, {total} bytes left")
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters since the worker process started.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+def _link_or_copy(src: os.PathLike, dest: os.PathLike):
+    try:
+        os.link(src, dest)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Different filesystem or no hard link support
+        shutil.copyfile(src, dest)
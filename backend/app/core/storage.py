@@ -12,7 +12,7 @@ from typing import Optional, Callable, Generator
 from app.core.config import settings
 from app.extypes import DiskOperationError, InvalidActionError
 from app.extypes.user_items import AIInspectionType
-from app.utils import load_analyzation_output
+from app.utils import load_analyzation_output, load_segmentation_output
 
 
 
@@ -23,10 +23,11 @@ UPLOADED_IMG_DIR = Path("uploaded_images")      # For uploaded xray images, but
 ANALYZED_IMG_DIR = Path("analyzed_images")      # Analyzed xray images moves here
 ANALYSIS_DIR = Path("analysis")                 # Analysis from AI
 HEATMAP_DIR = Path("heatmap")                   # Heatmaps are saved in a separate directory
+SEGMENTATION_DIR = Path("segmentation")         # Anatomical label maps (PNG) with per-part regions
 INSPECTION_DIR = Path("inspections")            # Inspections from AI
 DIAGNOSIS_DIR = Path("diagnosis")               # Diagnosis from AI
 TREATMENTS_DIR = Path("treatments")             # Suggested treatments by AI
-USER_DIRS = 'UPLOADED_IMG_DIR', 'ANALYZED_IMG_DIR', 'ANALYSIS_DIR', 'HEATMAP_DIR', 'INSPECTION_DIR', 'DIAGNOSIS_DIR', 'TREATMENTS_DIR'
+USER_DIRS = 'UPLOADED_IMG_DIR', 'ANALYZED_IMG_DIR', 'ANALYSIS_DIR', 'HEATMAP_DIR', 'SEGMENTATION_DIR', 'INSPECTION_DIR', 'DIAGNOSIS_DIR', 'TREATMENTS_DIR'
 
 
 def _path_supplied(function):
@@ -288,15 +289,39 @@ class UserFolder(Storage):
     def read_analysis(self, scan_id: str):
         return load_analyzation_output(self._map_path(f"{scan_id}.h5", self.base_dir / ANALYSIS_DIR))
 
+    def segmentation(self, scan_id: str):
+        return self._map_path(f"{scan_id}.png", self.base_dir / SEGMENTATION_DIR)
+
+    def new_segmentation_name(self, scan_id: str):
+        path = self._map_path(f"{scan_id}.png", self.base_dir / SEGMENTATION_DIR)
+        if path.exists():
+            raise InvalidActionError("Segmentation already existed")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def read_segmentation(self, scan_id: str, with_label_map: bool = True):
+        return load_segmentation_output(self.segmentation(scan_id), with_label_map)
+
     def analyzed_image(self, scan_id: str):
         return self._map_path(f"{scan_id}.jpeg", self.base_dir / ANALYZED_IMG_DIR)
     
+    def analysis_tensor(self, scan_id: str):
+        """
+        Preprocessed model input written at upload time, so analysis doesn't decode the image again.
+        """
+        return self._map_path(f"{scan_id}.npy", self.base_dir / ANALYZED_IMG_DIR)
+    
     def uploaded_image(self, name: str):
         return self._map_path(name, self.base_dir / UPLOADED_IMG_DIR)
 
     def mark_analyzed_image(self, scan_id: str):
         analyzed_path = self.analyzed_image(scan_id)
         self.uploaded_image(f"{scan_id}.jpeg").replace(analyzed_path)
+
+        tensor_path = self.uploaded_image(f"{scan_id}.npy")
+        if tensor_path.exists():
+            tensor_path.replace(self.analysis_tensor(scan_id))
         return analyzed_path
 
     def add_scan(self, ext: str, buffer: BufferedIOBase):
@@ -1,19 +1,25 @@
-import os, json
+import os, json, logging
 from os import PathLike
 from pathlib import Path
 from typing import Callable, Any, Optional, List, Tuple
 
 from celery import shared_task
-from PIL import Image
 
+from app.core.batching import MicroBatcher
+from app.core.config import settings
 from app.core.email import send_email
-from app.core.storage import user_storage
+from app.core.inference_cache import InferenceCache
+from app.core.storage import base_storage, user_storage
 from app.extypes import ImageProcessingError, AITaskException, AIInspectionType
 from app.models import User
-from app.utils import change_ext, save_analyzation_output, load_analyzation_output
-from ...AFG_Gumball.xray_processing import process_xray_image
+from app.utils import change_ext, save_analyzation_output, load_analyzation_output, save_segmentation_output
+from ...AFG_Gumball.xray_processing import \
+    process_xray_batch, ingest_xray_image, load_xray_image, load_analysis_tensor, get_label_map, label_map_regions, \
+    get_model_version, HeatmapFormat, ImageDecodeError
 from ...AFG_Gumball.medical_ai import XrayAnalysisExpertAI, PatientAI, DoctorDiagnosticAI, DoctorEnhanceAI
 
+logger = logging.getLogger(__name__)
+
 
 ###################################################
 # NOTE: Tasks should only return intermediate link.
@@ -22,6 +28,29 @@ from ...AFG_Gumball.medical_ai import XrayAnalysisExpertAI, PatientAI, DoctorDia
 ###################################################
 
 
+# Concurrent analyze tasks in the same worker process share one batched forward pass.
+# Raw CAMs at feature-map resolution are stored and colorized when read.
+xray_batcher = MicroBatcher(
+    lambda img_paths: process_xray_batch(
+        img_paths,
+        threshold=settings.AI_PATHOLOGY_THRESHOLD,
+        batch_size=settings.AI_MAX_BATCH_SIZE,
+        heatmap_format=HeatmapFormat.CAM_UINT8,
+        # A failed image must raise in its task, not pass (and get cached) as "no findings"
+        return_exceptions=True,
+    ),
+    max_batch_size=settings.AI_MAX_BATCH_SIZE,
+    window_ms=settings.AI_BATCH_WINDOW_MS,
+    name="analyze_xray",
+)
+
+# Re-uploads of the same study reuse the stored result instead of running inference again.
+inference_cache = InferenceCache(
+    base_storage.new_dir(Path("inference_cache")),
+    max_bytes=settings.INFERENCE_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
 """
 Current implementation plan:
 + convert_to_jpeg_task
@@ -39,46 +68,106 @@ def send_email_task(email_to: str, subject: str, html_content: str) -> None:
 @shared_task(name="app.tasks.convert_to_jpeg")
 def convert_to_jpeg_task(user: User, img_name: str) -> str:
     """
-    Converts an image to JPEG format.
+    Converts an image to JPEG format and stores the preprocessed analysis tensor next to it.
     """
     user_dir = user_storage.dir_of(user.id)
     img_path = user_dir.uploaded_image(img_name)
-    scan_id = os.path.splitext(img_path.name)[1]
+    scan_id = os.path.splitext(img_path.name)[0]
 
     try:
-        img = Image.open(img_path)
-        
-        jpeg_path = change_ext(img_path, ".jpeg")
-        img.convert("L").save(jpeg_path, "JPEG")
+        # Decode once: the display JPEG and the analysis tensor both come from the original pixels
+        ingest_xray_image(
+            img_path,
+            tensor_path=change_ext(img_path, ".npy"),
+            display_path=change_ext(img_path, ".jpeg"),
+        )
         
         return scan_id
     except Exception as e:
         raise ImageProcessingError("Error converting image to JPEG") from e
     finally:
-        img_path.unlink(missing_ok=True)
+        # JPEG uploads are converted in place
+        if img_path.suffix != ".jpeg":
+            img_path.unlink(missing_ok=True)
     
 
+def _inference_cache_key(input_path: Path) -> Optional[str]:
+    if not settings.INFERENCE_CACHE_ENABLED:
+        return None
+    try:
+        return inference_cache.key_for(
+            input_path,
+            model_version=get_model_version(),
+            threshold=settings.AI_PATHOLOGY_THRESHOLD,
+            heatmap_format=HeatmapFormat.CAM_UINT8.value,
+        )
+    except Exception:
+        # The cache is only an optimization, never fail the analysis because of it
+        logger.exception("Failed to compute inference cache key")
+        return None
+
+
 @shared_task(name="app.tasks.analyze_xray")
 def analyze_xray_task(user: User, scan_id: str):
     """
     Analyzes a grayscale X-ray image for pathologies then save details into a file.
     """
     user_folder = user_storage.dir_of(user.id)
+    img_path = tensor_path = None
 
     try:
         img_path = user_folder.analyzed_image(scan_id)
+        tensor_path = user_folder.analysis_tensor(scan_id)
         
-        pathologies, gradcam_images = process_xray_image(img_path)
+        input_path = tensor_path if tensor_path.exists() else img_path
         save_path = user_folder.new_analysis_name(scan_id)
 
-        # Will separate heatmap soon to optimize performance
-        save_analyzation_output(save_path, pathologies, gradcam_images)
+        cache_key = _inference_cache_key(input_path)
+        if cache_key and inference_cache.fetch(cache_key, save_path):
+            return scan_id
+
+        pathologies, gradcam_images = xray_batcher(input_path)
+        save_analyzation_output(save_path, pathologies, gradcam_images, HeatmapFormat.CAM_UINT8.value)
+
+        if cache_key:
+            try:
+                inference_cache.store(cache_key, save_path)
+            except OSError:
+                logger.exception("Failed to store analysis in the inference cache")
         return scan_id
+    except ImageDecodeError as e:
+        # Remove the image only when the upload itself is unreadable
+        for path in (img_path, tensor_path):
+            if path is not None:
+                path.unlink(missing_ok=True)
+        raise ImageProcessingError("Error analyzing X-ray image") from e
     except Exception as e:
-        img_path.unlink() # Remove image if errored
+        # Inference errors (model load, OOM, ...) keep the upload so the task can be retried
         raise ImageProcessingError("Error analyzing X-ray image") from e
 
 
+@shared_task(name="app.tasks.segment_xray")
+def segment_xray_task(user: User, scan_id: str):
+    """
+    Segments the anatomy of an analyzed X-ray and saves the label map with per-part regions.
+    """
+    user_folder = user_storage.dir_of(user.id)
+    try:
+        save_path = user_folder.new_segmentation_name(scan_id)
+        tensor_path = user_folder.analysis_tensor(scan_id)
+
+        if tensor_path.exists():
+            image = load_analysis_tensor(tensor_path)
+        else:
+            image = load_xray_image(str(user_folder.analyzed_image(scan_id)))
+
+        label_map = get_label_map(image).numpy()
+        save_segmentation_output(save_path, label_map, label_map_regions(label_map))
+        return scan_id
+    except Exception as e:
+        raise ImageProcessingError("Error segmenting X-ray image") from e
+
+
 @shared_task(name="app.tasks.expert_analysis")
 def expert_ai_xray_analysis_task(
     user: User,
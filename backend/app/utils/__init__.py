@@ -3,7 +3,7 @@ from os import path as path_tool, PathLike
 from .db_wrapper import AsyncDBWrapper, DBWrapper
 from .lazy import lazy_bound_function, lazy_load_function
 from .ranges import TimeRange, AnyTime
-from .saver import save_analyzation_output, load_analyzation_output  # , load_heatmap, save_heatmap
+from .saver import save_analyzation_output, load_analyzation_output, save_segmentation_output, load_segmentation_output  # , load_heatmap, save_heatmap
 
 
 def change_ext(path: PathLike, ext: str):
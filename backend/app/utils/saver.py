@@ -1,8 +1,10 @@
+import json
 from os import PathLike
 
 import h5py
 import numpy as np
 from numpy import ndarray
+from PIL import Image, PngImagePlugin
 
 from app.core.storage import user_storage
 
@@ -10,14 +12,20 @@ from app.core.storage import user_storage
 def save_analyzation_output(
     file_name: PathLike,
     pathologies: list[tuple[str, float]],
-    gradcam_image: list[dict[str, str | float | ndarray]]
+    gradcam_image: list[dict[str, str | float | ndarray]],
+    heatmap_format: str = "overlay"
 ):
+    """
+    `heatmap_format` is the value of `HeatmapFormat` the heatmaps were computed with. Raw CAM
+    formats are stored at feature-map resolution and must be rendered with `render_heatmap` on read.
+    """
     with h5py.File(file_name, "w") as f:
         pathos = f.create_group("pathologies")
         pathos.create_dataset("name", data=np.array([name for name, _ in pathologies], dtype="S26"))
         pathos.create_dataset("probability", data=np.array([prob for _, prob in pathologies]))
 
         images = f.create_group("gradcam_image")
+        images.attrs["heatmap_format"] = heatmap_format
         for i, d in enumerate(gradcam_image):
             gradcam_i = images.create_group(str(i))
             gradcam_i.attrs["pathology"] = d["pathology"]
@@ -33,11 +41,13 @@ def load_analyzation_output(
         probabilities = f["pathologies/probability"][()]
         pathologies = tuple(zip(names, probabilities))
 
+        heatmap_format = f["gradcam_image"].attrs.get("heatmap_format", "overlay")
         gradcam_images = tuple(
             {
                 "pathology": group.attrs["pathology"],
                 "probability": group["probability"][()],
-                "heatmap": group["heatmap"][()]
+                "heatmap": group["heatmap"][()],
+                "heatmap_format": heatmap_format
             }
             for group in f["gradcam_image"].values()
         )
@@ -45,6 +55,36 @@ def load_analyzation_output(
     return pathologies, gradcam_images
 
 
+def save_segmentation_output(
+    file_name: PathLike,
+    label_map: ndarray,
+    regions: dict[str, dict]
+):
+    """
+    Store a uint8 segmentation label map (`BodyPart` values, 255 for background) as a PNG
+    (a few KB), with the per-part areas and bounding boxes (see `label_map_regions`) kept
+    as JSON in a text chunk.
+    """
+    info = PngImagePlugin.PngInfo()
+    info.add_text("regions", json.dumps(regions))
+    Image.fromarray(np.asarray(label_map, dtype=np.uint8)).save(file_name, format="PNG", pnginfo=info, optimize=True)
+
+
+def load_segmentation_output(
+    file_name: PathLike,
+    with_label_map: bool = True
+) -> tuple[ndarray | None, dict[str, dict]]:
+    """
+    Returns `(label_map, regions)`. Pass `with_label_map=False` to only read the PNG header
+    when the regions are enough.
+    """
+    with Image.open(file_name) as image:
+        regions = json.loads(image.text["regions"])
+        label_map = np.asarray(image) if with_label_map else None
+
+    return label_map, regions
+
+
 def save_heatmap(
     file_name: PathLike,
     heatmap: ndarray
@@ -1,5 +1,8 @@
 redis-server ./redis.conf
-celery -A celery_app.celery_app worker -Q ai_queue --loglevel=info
+REM Thread pool so concurrent analyze tasks can be micro-batched (see AI_BATCH_WINDOW_MS);
+REM models are warmed up on worker_ready (see celery_app.py). Tasks beyond AI_MAX_BATCH_SIZE
+REM wait for the next batch, so peak memory is bounded by the batch size, not the thread count
+celery -A celery_app.celery_app worker -Q ai_queue --pool threads --concurrency 8 --loglevel=info
 python main.py
 REM Optional: enable to monitor tasks
 REM celery -A celery_app.celery_app flower
\ No newline at end of file
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from app.core.batching import MicroBatcher
+
+
+def test_concurrent_submissions_are_batched():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        time.sleep(0.01)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=4, window_ms=100)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert all(len(call) <= 4 for call in calls)
+    assert len(calls) < 8
+
+    stats = batcher.stats()
+    assert stats["items"] == 8
+    assert stats["batches"] == len(calls)
+
+
+def test_batch_errors_reach_every_caller():
+    def fail(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, window_ms=10)
+    futures = [batcher.submit(i) for i in range(2)]
+
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=1)
+
+
+def test_item_errors_reach_only_their_caller():
+    def invert(items):
+        return [ZeroDivisionError(item) if item == 0 else 1 / item for item in items]
+
+    batcher = MicroBatcher(invert, max_batch_size=3, window_ms=50)
+    futures = [batcher.submit(i) for i in (0, 1, 2)]
+
+    with pytest.raises(ZeroDivisionError):
+        futures[0].result(timeout=1)
+    assert futures[1].result(timeout=1) == 1
+    assert futures[2].result(timeout=1) == 0.5
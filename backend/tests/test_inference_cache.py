@@ -0,0 +1,90 @@
+import os
+import shutil
+
+import numpy as np
+
+from app.core.inference_cache import InferenceCache
+
+
+def _write_tensor(path, seed):
+    np.save(path, np.random.default_rng(seed).standard_normal((1, 8, 8)).astype(np.float16))
+    return path
+
+
+def test_same_pixels_hit_the_cache(tmp_path):
+    cache = InferenceCache(tmp_path / "cache", max_bytes=1 << 20)
+    first = _write_tensor(tmp_path / "a.npy", 0)
+    reupload = _write_tensor(tmp_path / "b.npy", 0)
+
+    key = cache.key_for(first, model_version="v1", threshold=0.5)
+    assert key == cache.key_for(reupload, model_version="v1", threshold=0.5)
+    assert key != cache.key_for(reupload, model_version="v2", threshold=0.5)
+    assert key != cache.key_for(reupload, model_version="v1", threshold=0.6)
+
+    result = tmp_path / "result.h5"
+    assert not cache.fetch(key, result)
+    result.write_bytes(b"analysis")
+    cache.store(key, result)
+
+    reused = tmp_path / "reused.h5"
+    assert cache.fetch(key, reused)
+    assert reused.read_bytes() == b"analysis"
+    assert os.path.samefile(reused, result)
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = InferenceCache(tmp_path / "cache", max_bytes=1 << 20)
+
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        src = tmp_path / f"{key}.h5"
+        src.write_bytes(b"x" * 100)
+        cache.store(key, src)
+        src.unlink()  # The user deleted their result, only the cache holds it now
+        os.utime(cache.path_for(key), ns=(i * 10**9, i * 10**9))
+
+    hit = tmp_path / "hit.h5"
+    cache.fetch("aa01", hit)  # Refreshes the oldest entry
+    hit.unlink()
+    assert cache.evict(max_bytes=250) == 1
+
+    assert cache.path_for("aa01").exists()
+    assert not cache.path_for("bb02").exists()
+    assert cache.path_for("cc03").exists()
+
+
+def test_entries_linked_from_user_folders_are_not_counted(tmp_path):
+    cache = InferenceCache(tmp_path / "cache", max_bytes=150)
+
+    for key in ("aa01", "bb02"):
+        src = tmp_path / f"{key}.h5"
+        src.write_bytes(b"x" * 100)
+        cache.store(key, src)
+
+    # Deleting them would free no disk space, so they stay
+    assert cache.evict(max_bytes=0) == 0
+    assert cache.path_for("aa01").exists() and cache.path_for("bb02").exists()
+    # Users' own links survive eviction
+    (tmp_path / "aa01.h5").unlink()
+    assert cache.evict(max_bytes=0) == 1
+    assert (tmp_path / "bb02.h5").exists()
+
+
+def test_store_only_scans_when_over_budget(tmp_path, monkeypatch):
+    # Copied entries (another filesystem) count towards the budget as soon as they're stored
+    monkeypatch.setattr("app.core.inference_cache._link_or_copy", shutil.copyfile)
+    cache = InferenceCache(tmp_path / "cache", max_bytes=350)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda *args, **kwargs: scans.append(1) or evict(*args, **kwargs))
+
+    for i in range(5):
+        src = tmp_path / f"{i}.h5"
+        src.write_bytes(b"x" * 100)
+        cache.store(f"{i:02d}{i}", src)
+        if i == 0:
+            assert len(scans) == 1  # First store learns the current total
+
+    # 100, 200, 300 fit; 400 goes over budget and scans (evicting down to 300), then 400 again
+    assert len(scans) == 3
+    assert len(list((tmp_path / "cache").glob("*/*.h5"))) == 3
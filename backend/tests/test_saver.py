@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.utils import save_segmentation_output, load_segmentation_output
+
+
+def test_segmentation_output_round_trip(tmp_path):
+    label_map = np.full((512, 512), 255, dtype=np.uint8)
+    label_map[100:200, 50:150] = 4
+    label_map[300:310, 400:420] = 13
+    regions = {
+        "LEFT_LUNG": {"area": 100 * 100, "bbox": [50, 100, 149, 199]},
+        "HEART": {"area": 10 * 20, "bbox": [400, 300, 419, 309]},
+    }
+    file_name = tmp_path / "scan.png"
+    save_segmentation_output(file_name, label_map, regions)
+
+    loaded, loaded_regions = load_segmentation_output(file_name)
+    assert loaded.dtype == np.uint8 and loaded.shape == (512, 512)
+    np.testing.assert_array_equal(loaded, label_map)
+    assert (loaded == 255).sum() == 512 * 512 - 100 * 100 - 10 * 20
+    assert loaded_regions == regions
+    assert list(loaded_regions) == list(regions)
+
+    no_map, header_regions = load_segmentation_output(file_name, with_label_map=False)
+    assert no_map is None and header_regions == regions
@@ -0,0 +1,24 @@
+import time
+
+
+def bench(fn, *args, repeat: int = 5, number: int = 10, **kwargs) -> float:
+    """
+    Return the best average wall time (ms) of `fn(*args, **kwargs)` over `repeat` runs of `number` calls.
+    """
+    fn(*args, **kwargs)  # warm-up
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args, **kwargs)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return best * 1000
+
+
+def report(title: str, results: dict):
+    print(title)
+    baseline = next(iter(results.values()))
+    for name, ms in results.items():
+        print(f"  {name:<40} {ms:10.3f} ms  (x{baseline / ms:.1f})")
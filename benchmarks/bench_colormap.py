@@ -0,0 +1,40 @@
+"""
+LUT overlay renderer vs. the previous matplotlib colormap path.
+
+    python -m benchmarks.bench_colormap
+"""
+import numpy as np
+
+from AFG_Gumball.xray_processing.colormap import overlay_heatmap, encode_overlay
+from ._timing import bench, report
+
+
+def matplotlib_overlay(gradcam, img_np):
+    import matplotlib.cm as cm
+    import matplotlib.pyplot as plt
+
+    heatmap_rgb = cm.jet(gradcam)[:, :, :3]
+    overlay = (img_np - img_np.min()) / (img_np.max() - img_np.min())
+    overlay = plt.cm.gray(overlay)[:, :, :3]
+    alpha = 0.5
+    combined = (1 - alpha) * overlay + alpha * heatmap_rgb
+    return np.clip(combined, 0, 1)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    img = (rng.random((512, 512)) * 2048 - 1024).astype(np.float32)
+    cam = rng.random((512, 512))
+    cam_uint8 = (rng.random((16, 16)) * 255).astype(np.uint8)
+
+    report("Overlay 512x512 (jet over gray)", {
+        "matplotlib cm.jet + cm.gray (float64)": bench(matplotlib_overlay, cam, img),
+        "LUT overlay_heatmap (uint8)": bench(overlay_heatmap, cam, img),
+        "LUT overlay_heatmap from 16x16 uint8 CAM": bench(overlay_heatmap, cam_uint8, img),
+        "LUT encode_overlay -> PNG": bench(encode_overlay, cam_uint8, img, "PNG"),
+        "LUT encode_overlay -> JPEG": bench(encode_overlay, cam_uint8, img, "JPEG", quality=90),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Per-call cost of wrapping the gumball classifier in nn.DataParallel on CPU.
+
+    python -m benchmarks.bench_dataparallel
+
+The 1x1 convolution isolates the wrapper's dispatch overhead; the 512x512 classifier
+forward shows its share of a real pass.
+"""
+import torch
+from torch import nn
+
+from AFG_Gumball.torchxrayvision.baseline_models import gumball
+from ._timing import bench, report
+
+
+def run(module, x):
+    with torch.inference_mode():
+        module(x)
+
+
+def main():
+    tiny = nn.Conv2d(3, 1, 1)
+    x = torch.zeros(1, 3, 8, 8)
+    report("Dispatch only, 1x1 conv on 1x3x8x8 (per call)", {
+        "nn.DataParallel (CPU)": bench(run, nn.DataParallel(tiny), x, repeat=5, number=10000),
+        "bare module": bench(run, tiny, x, repeat=5, number=10000),
+    })
+
+    bare = gumball.DenseNet().model
+    x = torch.linspace(-2, 2, 3 * 512 * 512).view(1, 3, 512, 512)
+    report(f"Classifier forward, 1x3x512x512 ({torch.get_num_threads()} threads)", {
+        "nn.DataParallel (CPU)": bench(run, nn.DataParallel(bare), x, repeat=5, number=1),
+        "bare module": bench(run, bare, x, repeat=5, number=1),
+    })
+
+
+if __name__ == "__main__":
+    main()
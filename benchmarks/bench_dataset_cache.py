@@ -0,0 +1,72 @@
+"""
+Raw NIH_Dataset loading (PNG decode + normalize + XRayResizer) vs. the packed memory-mapped cache.
+
+    python -m benchmarks.bench_dataset_cache [num_images] [resolution]
+
+Uses synthetic 1024x1024 PNGs and a matching Data_Entry csv in a temporary directory.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from torchvision import transforms
+
+from AFG_Gumball.torchxrayvision import datasets
+from ._timing import report
+
+
+def make_nih(root, num_images):
+    rng = np.random.default_rng(0)
+    imgpath = os.path.join(root, "images")
+    os.makedirs(imgpath)
+    names = [f"{i:08d}_000.png" for i in range(num_images)]
+    for name in names:
+        Image.fromarray(rng.integers(0, 256, (1024, 1024), dtype=np.uint8)).save(os.path.join(imgpath, name))
+
+    csvpath = os.path.join(root, "Data_Entry.csv")
+    pd.DataFrame({
+        "Image Index": names,
+        "Finding Labels": rng.choice(["No Finding", "Effusion", "Mass|Nodule"], num_images),
+        "Patient ID": np.arange(num_images),
+        "Patient Age": 50,
+        "Patient Gender": "F",
+        "View Position": "PA",
+    }).to_csv(csvpath, index=False)
+    return imgpath, csvpath
+
+
+def samples_per_second(dataset):
+    start = time.perf_counter()
+    for idx in range(len(dataset)):
+        dataset[idx]
+    return len(dataset) / (time.perf_counter() - start)
+
+
+def main():
+    num_images = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    resolution = int(sys.argv[2]) if len(sys.argv) > 2 else 224
+
+    with tempfile.TemporaryDirectory() as root:
+        imgpath, csvpath = make_nih(root, num_images)
+        resize = transforms.Compose([datasets.XRayCenterCrop(), datasets.XRayResizer(resolution)])
+        raw = datasets.NIH_Dataset(imgpath, csvpath, unique_patients=False, transform=resize)
+
+        cached = {}
+        for dtype in (np.uint8, np.uint16):
+            path = datasets.build_cache(raw, resolution, dtype, os.path.join(root, f"cache-{np.dtype(dtype).name}"))
+            cached[np.dtype(dtype).name] = datasets.CachedDataset(path)
+
+        rates = {"raw (imread + normalize + resize)": samples_per_second(raw)}
+        rates.update({f"CachedDataset ({name})": samples_per_second(d) for name, d in cached.items()})
+
+        # Reported as ms per sample so the speedup column reads naturally
+        report(f"NIH_Dataset, {num_images} x 1024x1024 PNG -> {resolution}x{resolution}",
+               {name: 1000 / rate for name, rate in rates.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-item metadata lookup: pandas `.iloc` (old `__getitem__`) vs. the NumPy columns
+precomputed by the datasets, over 100k random indexes.
+
+    python -m benchmarks.bench_dataset_metadata [num_rows]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ._timing import bench, report
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    csv = pd.DataFrame({
+        "Image Index": [f"{i:08d}_000.png" for i in range(num_rows)],
+        "subject_id": rng.integers(10_000_000, 20_000_000, num_rows),
+        "study_id": rng.integers(50_000_000, 60_000_000, num_rows),
+        "dicom_id": [f"{i:040x}" for i in range(num_rows)],
+    })
+    idxs = rng.integers(0, num_rows, 100_000).tolist()
+
+    imgids = csv["Image Index"].to_numpy()
+    subjectids = csv["subject_id"].astype(str).to_numpy()
+    studyids = csv["study_id"].astype(str).to_numpy()
+    dicomids = csv["dicom_id"].astype(str).to_numpy()
+
+    def column_iloc():
+        for idx in idxs:
+            csv["Image Index"].iloc[idx]
+
+    def column_numpy():
+        for idx in idxs:
+            imgids[idx]
+
+    def mimic_iloc():
+        for idx in idxs:
+            str(csv.iloc[idx]["subject_id"])
+            str(csv.iloc[idx]["study_id"])
+            str(csv.iloc[idx]["dicom_id"])
+
+    def mimic_numpy():
+        for idx in idxs:
+            subjectids[idx]
+            studyids[idx]
+            dicomids[idx]
+
+    report("Image id lookup, 100k indexes (NIH, CheX, PC, ...)", {
+        "csv['Image Index'].iloc[idx]": bench(column_iloc, repeat=3, number=1),
+        "imgids[idx]": bench(column_numpy, repeat=3, number=1),
+    })
+    report("MIMIC path columns, 100k indexes", {
+        "3x csv.iloc[idx][column]": bench(mimic_iloc, repeat=3, number=1),
+        "3x NumPy column[idx]": bench(mimic_numpy, repeat=3, number=1),
+    })
+
+
+if __name__ == "__main__":
+    main()
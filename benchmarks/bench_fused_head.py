@@ -0,0 +1,45 @@
+"""
+Per-head classifier loop vs. the fused grouped-conv head (BatchNorm folded) of the gumball DenseNet (CPU).
+
+    python -m benchmarks.bench_fused_head
+"""
+import copy
+
+import torch
+from torch import nn
+
+from AFG_Gumball.torchxrayvision.baseline_models import gumball
+from ._timing import bench, report
+
+
+def run(module, x):
+    with torch.inference_mode():
+        module(x)
+
+
+def main():
+    reference = gumball.DenseNet(fuse_heads=False)
+    fused = gumball.DenseNet()
+
+    x = torch.linspace(-1024, 1024, 512 * 512).view(1, 1, 512, 512)
+    with torch.inference_mode():
+        feat_map = reference.model.backbone(x.repeat(1, 3, 1, 1) / 512)
+
+    # Same modules without the backbone: attention + pooling + heads on a precomputed feature map
+    heads = {}
+    for name, model in (("per-head loop", reference), ("fused head", fused)):
+        classifier = copy.deepcopy(model.model)
+        classifier.backbone = nn.Identity()
+        heads[name] = classifier
+
+    report(f"Heads only, feature map {tuple(feat_map.shape)} ({torch.get_num_threads()} threads)", {
+        name: bench(run, classifier, feat_map, repeat=5, number=20) for name, classifier in heads.items()
+    })
+    report("Full forward, 1x1x512x512", {
+        "per-head loop": bench(run, reference, x, repeat=3, number=1),
+        "fused head": bench(run, fused, x, repeat=3, number=1),
+    })
+
+
+if __name__ == "__main__":
+    main()
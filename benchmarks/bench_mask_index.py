@@ -0,0 +1,53 @@
+"""
+Per-item bounding-box lookup: boolean filter of the whole annotation csv
+(old `get_mask_dict`) vs. the image id -> rows index built at init, over 1000
+random images. Also times building the index once.
+
+    python -m benchmarks.bench_mask_index [num_rows]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from AFG_Gumball.torchxrayvision.datasets import _NO_ROWS, _group_rows
+
+from ._timing import bench, report
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    rng = np.random.default_rng(0)
+    # About 1.5 boxes per image, like the RSNA labels
+    image_ids = np.array([f"{i:036x}" for i in rng.integers(0, num_rows * 2 // 3, num_rows)], dtype=object)
+    csv = pd.DataFrame({
+        "patientId": image_ids,
+        "x": rng.uniform(0, 900, num_rows), "y": rng.uniform(0, 900, num_rows),
+        "width": rng.uniform(10, 100, num_rows), "height": rng.uniform(10, 100, num_rows),
+    })
+    names = rng.choice(image_ids, 1000).tolist()
+
+    index = _group_rows(csv["patientId"].to_numpy())
+    boxes = csv[["x", "y", "width", "height"]].to_numpy(dtype=float)
+
+    def scan():
+        for name in names:
+            rows = csv[csv["patientId"] == name]
+            for i in range(len(rows)):
+                row = rows.iloc[i]
+                np.asarray([row.x, row.y, row.width, row.height])
+
+    def lookup():
+        for name in names:
+            for row in index.get(name, _NO_ROWS):
+                boxes[row]
+
+    report("Bounding-box lookup, 1000 images, {} csv rows".format(num_rows), {
+        "csv[csv.id == name] + iloc": bench(scan, repeat=3, number=1),
+        "index[name] + NumPy boxes": bench(lookup, repeat=3, number=1),
+        "build index once": bench(_group_rows, csv["patientId"].to_numpy(), repeat=3, number=1),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Gumball DenseNet and PSPNet before/after `utils.optimize_for_inference` (CPU, 512x512).
+
+    python -m benchmarks.bench_optimize
+"""
+import torch
+
+from AFG_Gumball.torchxrayvision.baseline_models import gumball
+from AFG_Gumball.torchxrayvision.utils import optimize_for_inference
+from ._timing import bench, report
+
+
+def run(model, x):
+    with torch.inference_mode():
+        model(x)
+
+
+def main():
+    x = torch.linspace(-1024, 1024, 512 * 512).view(1, 1, 512, 512)
+
+    for model_cls in (gumball.DenseNet, gumball.PSPNet):
+        reference = model_cls(optimize=False)
+        folded = model_cls(optimize=False)
+        optimize_for_inference(folded.model, channels_last=False)
+        optimized = model_cls()
+
+        report(f"{reference!r}, 1x1x512x512 ({torch.get_num_threads()} threads)", {
+            "eager": bench(run, reference, x, repeat=5, number=1),
+            "BatchNorm folded": bench(run, folded, x, repeat=5, number=1),
+            "BatchNorm folded + channels_last": bench(run, optimized, x, repeat=5, number=1),
+        })
+
+
+if __name__ == "__main__":
+    main()
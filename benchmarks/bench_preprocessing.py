@@ -0,0 +1,79 @@
+"""
+Unified preprocessing vs. the two loaders it replaced.
+
+    python -m benchmarks.bench_preprocessing [image_path]
+"""
+import io
+import sys
+
+import numpy as np
+import skimage.io
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+from AFG_Gumball.torchxrayvision import datasets
+from AFG_Gumball.xray_processing.preprocessing import preprocess_xray
+from ._timing import bench, report
+
+
+def pil_lanczos_loader(image_input):
+    """Previous `load_xray_image`: PIL, LANCZOS squash to 512x512, float64 normalization."""
+    image = Image.open(image_input).convert("L")
+    image = image.resize((512, 512), Image.Resampling.LANCZOS)
+    image_np = (np.array(image) / 255.0) * 2048 - 1024
+    return torch.from_numpy(image_np).float().unsqueeze(0)
+
+
+def skimage_tensor_loader(image_input):
+    """Previous analysis path: skimage imread, tensor Resize, then XRayCenterCrop."""
+    img = skimage.io.imread(image_input)
+    if len(img.shape) > 2:
+        img = img[:, :, 0]
+    img = (img.astype(np.float32) / 255.0) * 2048 - 1024
+    transform = transforms.Compose([transforms.Resize((512, 512)), datasets.XRayCenterCrop()])
+    return transform(torch.from_numpy(img[None, :, :]).float())
+
+
+def synthetic_xray(height, width):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    img = 128 + 80 * np.sin(x / 97) * np.cos(y / 131) + rng.normal(0, 10, (height, width))
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+        title = sys.argv[1]
+    else:
+        buffer = io.BytesIO()
+        Image.fromarray(synthetic_xray(2500, 2048)).save(buffer, "JPEG", quality=95)
+        data = buffer.getvalue()
+        title = "synthetic 2048x2500 JPEG"
+
+    png = io.BytesIO()
+    Image.open(io.BytesIO(data)).convert("L").save(png, "PNG")
+    png = png.getvalue()
+
+    for name, payload in (("JPEG", data), ("PNG", png)):
+        report(f"Decode + preprocess to [1, 512, 512], {title} ({name})", {
+            "load_xray_image (PIL LANCZOS, float64)": bench(lambda: pil_lanczos_loader(io.BytesIO(payload)), number=5),
+            "analysis path (skimage + tensor Resize)": bench(lambda: skimage_tensor_loader(io.BytesIO(payload)), number=5),
+            "preprocess_xray (crop, resize, float32)": bench(preprocess_xray, payload, number=5),
+        })
+
+    array = Image.open(io.BytesIO(data)).convert("L")
+    array = np.asarray(array)
+    report("Preprocess an already decoded uint8 array", {
+        "tensor Resize + XRayCenterCrop": bench(
+            lambda: transforms.Resize((512, 512))(torch.from_numpy((array.astype(np.float32) / 255 * 2048 - 1024)[None])),
+            number=5,
+        ),
+        "preprocess_xray": bench(preprocess_xray, array, number=5),
+    })
+
+
+if __name__ == "__main__":
+    main()
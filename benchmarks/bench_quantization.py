@@ -0,0 +1,46 @@
+"""
+fp32 vs. int8 (static post-training quantization of the backbone) for the gumball classifier (CPU).
+
+    python -m benchmarks.bench_quantization [batch sizes...]
+
+Calibrates on synthetic images, so only the timings are meaningful here. Use
+`python -m AFG_Gumball.xray_processing.quantization --calibration-dir ... --eval-dir ...`
+for the accuracy-drift report on real studies.
+"""
+import sys
+
+import numpy as np
+import torch
+
+from AFG_Gumball.xray_processing.model_utils import get_model
+from AFG_Gumball.xray_processing.quantization import quantize_model
+from ._timing import bench, report
+
+
+def per_image_ms(model, batch_size):
+    x = torch.linspace(-1024, 1024, batch_size * 512 * 512).view(batch_size, 1, 512, 512)
+
+    def run():
+        with torch.inference_mode():
+            model(x)
+
+    return bench(run, repeat=3, number=1) / batch_size
+
+
+def main():
+    batch_sizes = [int(size) for size in sys.argv[1:]] or [1, 4, 16]
+
+    rng = np.random.default_rng(0)
+    calibration = [rng.integers(0, 256, (512, 512), dtype=np.uint8) for _ in range(8)]
+
+    fp32 = get_model()
+    int8 = quantize_model(fp32, calibration)
+    for batch_size in batch_sizes:
+        report(f"DenseNet, batch size {batch_size} (per image, {torch.get_num_threads()} threads)", {
+            "fp32": per_image_ms(fp32, batch_size),
+            f"int8 ({torch.backends.quantized.engine})": per_image_ms(int8, batch_size),
+        })
+
+
+if __name__ == "__main__":
+    main()
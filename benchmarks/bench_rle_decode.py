@@ -0,0 +1,56 @@
+"""
+SIIM mask decoding: the Kaggle `rle2mask` loop + float64 `skimage` resize
+(old `get_pathology_mask_dict`) vs. `rle_decode`, which writes uint8 and can
+decode straight to the target size.
+
+    python -m benchmarks.bench_rle_decode [num_runs]
+"""
+import sys
+
+import numpy as np
+import skimage.transform
+
+from AFG_Gumball.torchxrayvision.datasets import rle_decode
+
+from ._timing import bench, report
+
+
+def rle2mask(rle, width, height):
+    mask = np.zeros(width * height)
+    array = np.asarray([int(x) for x in rle.split()])
+    starts = array[0::2]
+    lengths = array[1::2]
+
+    current_position = 0
+    for index, start in enumerate(starts):
+        current_position += start
+        mask[current_position:current_position + lengths[index]] = 1
+        current_position += lengths[index]
+
+    return mask.reshape(width, height)
+
+
+def old_decode(rle, size):
+    mask = rle2mask(rle, 1024, 1024).T
+    mask = skimage.transform.resize(mask, (size, size), mode='constant', order=0)
+    return mask.round()
+
+
+def main():
+    num_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = np.random.default_rng(0)
+    # A pneumothorax-like blob: one run per column it covers
+    starts = np.sort(rng.choice(1024 * 1024 - 512, num_runs, replace=False))
+    lengths = np.minimum(rng.integers(50, 300, num_runs), np.diff(starts, append=1024 * 1024))
+    offsets = starts - np.concatenate([[0], (starts + lengths)[:-1]])
+    rle = " ".join(f"{offset} {length}" for offset, length in zip(offsets, lengths))
+
+    for size in [1024, 512, 224]:
+        report("Decode a {}-run mask to {}x{}".format(num_runs, size, size), {
+            "rle2mask + float64 resize": bench(old_decode, rle, size, repeat=5, number=3),
+            "rle_decode(size=...)": bench(rle_decode, rle, 1024, 1024, (size, size), repeat=5, number=3),
+        })
+
+
+if __name__ == "__main__":
+    main()
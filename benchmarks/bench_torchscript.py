@@ -0,0 +1,38 @@
+"""
+Eager vs. frozen TorchScript inference for the gumball classifier and PSPNet (CPU).
+
+    python -m AFG_Gumball.xray_processing.torchscript   # export once
+    python -m benchmarks.bench_torchscript [batch sizes...]
+"""
+import sys
+
+import torch
+
+from AFG_Gumball.xray_processing.model_utils import get_model, get_segmentation_model
+from ._timing import bench, report
+
+
+def per_image_ms(model, batch_size):
+    x = torch.linspace(-1024, 1024, batch_size * 512 * 512).view(batch_size, 1, 512, 512)
+
+    def run():
+        with torch.inference_mode():
+            model(x)
+
+    return bench(run, repeat=3, number=1) / batch_size
+
+
+def main():
+    batch_sizes = [int(size) for size in sys.argv[1:]] or [1, 4, 16]
+
+    for name, loader in (("DenseNet", get_model), ("PSPNet", get_segmentation_model)):
+        eager, scripted = loader(), loader(torchscript=True)
+        for batch_size in batch_sizes:
+            report(f"{name}, batch size {batch_size} (per image, {torch.get_num_threads()} threads)", {
+                "eager": per_image_ms(eager, batch_size),
+                "TorchScript (trace + freeze)": per_image_ms(scripted, batch_size),
+            })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Reading one member per sample from a zip of many small images: a new
+`zipfile.ZipFile` per sample (old `ObjectCXR_Dataset.__getitem__`) vs. the
+per-process handle of `utils.open_zip` vs. mmap slices of stored members.
+
+    python -m benchmarks.bench_zip_reader [num_members]
+"""
+import os
+import sys
+import tempfile
+import zipfile
+
+import numpy as np
+
+from AFG_Gumball.torchxrayvision import utils
+
+from ._timing import bench, report
+
+
+def main():
+    num_members = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "images.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+            for i in range(num_members):
+                zf.writestr(f"train/{i:05d}.jpg", rng.bytes(int(rng.integers(20_000, 60_000))))
+        names = [f"train/{i:05d}.jpg" for i in rng.integers(0, num_members, 200)]
+
+        def reopen():
+            for name in names:
+                with zipfile.ZipFile(path).open(name) as file:
+                    file.read()
+
+        def cached():
+            for name in names:
+                utils.read_zip_member(path, name)
+
+        def mmapped():
+            for name in names:
+                utils.read_zip_member(path, name, use_mmap=True)
+
+        report("200 reads from a {}-member zip".format(num_members), {
+            "ZipFile(path).open(name)": bench(reopen, repeat=3, number=1),
+            "read_zip_member (cached handle)": bench(cached, repeat=3, number=1),
+            "read_zip_member(use_mmap=True)": bench(mmapped, repeat=3, number=1),
+            "zip_member_offsets, once": bench(lambda: (utils._zip_member_offsets.clear(), utils.zip_member_offsets(path)), repeat=3, number=1),
+        })
+        utils._zip_mmaps.pop(path).close()
+        utils._zip_handles.pop(path).close()
+
+
+if __name__ == "__main__":
+    main()
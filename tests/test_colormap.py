@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+matplotlib = pytest.importorskip("matplotlib")
+
+from AFG_Gumball.xray_processing.colormap import COLORMAPS, encode_overlay, overlay_heatmap
+
+
+@pytest.mark.parametrize("name", sorted(COLORMAPS))
+def test_lut_matches_matplotlib(name):
+    expected = np.round(matplotlib.colormaps[name](np.arange(256))[:, :3] * 255)
+    np.testing.assert_allclose(COLORMAPS[name], expected, atol=1)
+
+
+def test_overlay_matches_matplotlib_blend():
+    rng = np.random.default_rng(0)
+    cam = rng.random((64, 64))
+    img = rng.random((64, 64)) * 2048 - 1024
+
+    gray = (img - img.min()) / (img.max() - img.min())
+    expected = 0.5 * matplotlib.colormaps["gray"](gray)[..., :3] + 0.5 * matplotlib.colormaps["jet"](cam)[..., :3]
+
+    overlay = overlay_heatmap(cam, img)
+    assert overlay.dtype == np.uint8 and overlay.shape == (64, 64, 3)
+    np.testing.assert_allclose(overlay / 255, expected, atol=2 / 255)
+
+
+def test_encode_overlay_upsamples_cam():
+    cam = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    img = np.zeros((128, 128), dtype=np.float32)
+
+    data = encode_overlay(cam, img, "PNG")
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("torch")
+pytest.importorskip("skimage")
+
+from torchvision import transforms
+
+from AFG_Gumball.torchxrayvision import datasets
+
+
+class _ArrayDataset(datasets.Dataset):
+    """8-bit images held in memory, loaded like the file-backed datasets."""
+
+    def __init__(self, images, transform=None):
+        super().__init__()
+        self.images = images
+        self.transform = transform
+        self.data_aug = None
+        self.pathologies = ["Effusion", "Mass"]
+        self.labels = np.random.default_rng(0).integers(0, 2, (len(images), 2)).astype(np.float32)
+        self.csv = pd.DataFrame({"Image Index": [f"{i}.png" for i in range(len(images))]})
+
+    def string(self):
+        return self.__class__.__name__ + " num_samples={}".format(len(self))
+
+    def __len__(self):
+        return len(self.images)
+
+    def __getitem__(self, idx):
+        sample = {"idx": idx, "lab": self.labels[idx]}
+        sample["img"] = datasets.normalize(self.images[idx], maxval=255, reshape=True)
+        return datasets.apply_transforms(sample, self.transform)
+
+
+def _images(shape, count=5):
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def test_uint8_cache_is_exact_without_resampling(tmp_path):
+    dataset = _ArrayDataset(_images((32, 32)))
+    cached = datasets.CachedDataset(datasets.build_cache(dataset, 32, np.uint8, str(tmp_path / "cache")))
+
+    assert len(cached) == len(dataset)
+    assert cached.pathologies == dataset.pathologies
+    assert list(cached.csv["Image Index"]) == list(dataset.csv["Image Index"])
+    for idx in range(len(dataset)):
+        expected, sample = dataset[idx], cached[idx]
+        np.testing.assert_array_equal(sample["img"], expected["img"])
+        np.testing.assert_array_equal(sample["lab"], expected["lab"])
+    assert not cached.get_raw(0).flags.writeable
+
+
+def test_uint16_cache_matches_resized_dataset(tmp_path):
+    resize = transforms.Compose([datasets.XRayCenterCrop(), datasets.XRayResizer(24)])
+    reference = _ArrayDataset(_images((40, 48)), transform=resize)
+
+    # The cache applies the same center crop + resize itself
+    path = datasets.build_cache(_ArrayDataset(_images((40, 48))), 24, np.uint16, str(tmp_path / "cache"))
+    cached = datasets.CachedDataset(path)
+
+    for idx in range(len(reference)):
+        assert cached[idx]["img"].shape == (1, 24, 24)
+        np.testing.assert_allclose(cached[idx]["img"], reference[idx]["img"], atol=2048 / 65535)
+
+
+def test_cache_refuses_data_augmentation(tmp_path):
+    dataset = _ArrayDataset(_images((32, 32)))
+    dataset.data_aug = transforms.RandomHorizontalFlip()
+    with pytest.raises(ValueError):
+        datasets.build_cache(dataset, 32, np.uint8, str(tmp_path / "cache"))
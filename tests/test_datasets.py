@@ -0,0 +1,162 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("torch")
+pytest.importorskip("skimage")
+Image = pytest.importorskip("PIL.Image")
+
+import skimage.transform
+
+from AFG_Gumball.torchxrayvision import datasets
+
+
+@pytest.fixture
+def nih(tmp_path):
+    """Five NIH-style images, each filled with its own pixel value, two of them AP."""
+    imgpath = tmp_path / "images"
+    imgpath.mkdir()
+    names = [f"{i:08d}_000.png" for i in range(5)]
+    for i, name in enumerate(names):
+        Image.fromarray(np.full((16, 16), 10 * (i + 1), dtype=np.uint8)).save(imgpath / name)
+
+    csvpath = tmp_path / "Data_Entry.csv"
+    pd.DataFrame({
+        "Image Index": names,
+        "Finding Labels": ["Effusion", "No Finding", "Mass", "Effusion|Mass", "No Finding"],
+        "Patient ID": range(5),
+        "Patient Age": 50,
+        "Patient Gender": "F",
+        "View Position": ["PA", "AP", "PA", "AP", "PA"],
+    }).to_csv(csvpath, index=False)
+    return str(imgpath), str(csvpath)
+
+
+def test_getitem_reads_precomputed_columns(nih):
+    imgpath, csvpath = nih
+    dataset = datasets.NIH_Dataset(imgpath, csvpath, views=["PA"])
+
+    assert list(dataset.imgids) == list(dataset.csv["Image Index"])
+    for idx in range(len(dataset)):
+        # The pixel value identifies the file that was read
+        value = 10 * (int(dataset.csv["Image Index"].iloc[idx][:8]) + 1)
+        np.testing.assert_array_equal(dataset[idx]["img"], datasets.normalize(np.full((16, 16), value), 255, reshape=True))
+
+
+def _scan_nih_masks(dataset, image_name, this_size):
+    """The per-sample filter get_mask_dict used before the bbox index."""
+    scale = this_size / 1024
+    rows = dataset.pathology_maskscsv[dataset.pathology_maskscsv["Image Index"] == image_name]
+    path_mask = {}
+    for i in range(len(rows)):
+        row = rows.iloc[i]
+        if row["Finding Label"] in dataset.pathologies:
+            mask = np.zeros([this_size, this_size])
+            xywh = (np.asarray([row.x, row.y, row.w, row.h]) * scale).astype(int)
+            mask[xywh[1]:xywh[1] + xywh[3], xywh[0]:xywh[0] + xywh[2]] = 1
+            path_mask[dataset.pathologies.index(row["Finding Label"])] = mask[None, :, :]
+    return path_mask
+
+
+def test_nih_mask_index_matches_scan(nih, tmp_path):
+    imgpath, csvpath = nih
+    bboxpath = tmp_path / "BBox_List.csv"
+    pd.DataFrame({
+        "Image Index": ["00000003_000.png", "00000000_000.png", "00000003_000.png", "00000000_000.png", "00000002_000.png"],
+        "Finding Label": ["Mass", "Effusion", "Effusion", "Effusion", "Infiltrate"],
+        "x": [100.5, 10, 300, 600, 0], "y": [200, 20.7, 40, 500, 0], "w": [64, 128, 256, 32, 1024], "h": [32, 64, 100.2, 48, 1024],
+        "_1": "", "_2": "", "_3": "",
+    }).to_csv(bboxpath, index=False)
+    dataset = datasets.NIH_Dataset(imgpath, csvpath, bbox_list_path=str(bboxpath), views=["PA", "AP"], pathology_masks=True)
+
+    assert dataset.mask_index is not None
+    for image_name in dataset.csv["Image Index"]:
+        expected = _scan_nih_masks(dataset, image_name, 64)
+        actual = dataset.get_mask_dict(image_name, 64)
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_array_equal(actual[key], expected[key])
+    assert dataset[0]["pathology_masks"].keys() == _scan_nih_masks(dataset, dataset.csv["Image Index"].iloc[0], 16).keys()
+
+
+def _scan_vinbrain_masks(dataset, image_name, this_size):
+    """The per-sample filter and groupby get_mask_dict used before the bbox index."""
+    c, h, w = this_size
+    path_mask = {}
+    rows = dataset.rawcsv[dataset.rawcsv.image_id.str.contains(image_name)]
+    for i, pathology in enumerate(dataset.pathologies):
+        for group_name, df_group in rows.groupby("class_name"):
+            if (group_name.lower() == pathology.lower()) or ((pathology in dataset.mapping) and (group_name in dataset.mapping[pathology])):
+                mask = np.zeros([h, w])
+                for idx, row in df_group.iterrows():
+                    mask[int(row.y_min):int(row.y_max), int(row.x_min):int(row.x_max)] = 1
+                path_mask[i] = mask[None, :, :]
+    return path_mask
+
+
+def test_vinbrain_mask_index_matches_scan(tmp_path):
+    csvpath = tmp_path / "train.csv"
+    pd.DataFrame({
+        "image_id": ["a1", "b2", "a1", "a1", "c3", "b2"],
+        "class_name": ["Pleural thickening", "No finding", "Aortic enlargement", "Pleural thickening", "Nodule/Mass", "Cardiomegaly"],
+        "x_min": [1, np.nan, 5.5, 20, 0, 3], "y_min": [2, np.nan, 6, 30, 0, 4],
+        "x_max": [10, np.nan, 25, 40, 8, 30], "y_max": [12, np.nan, 26.9, 50, 8, 20],
+    }).to_csv(csvpath, index=False)
+    dataset = datasets.VinBrain_Dataset(str(tmp_path), str(csvpath), pathology_masks=True)
+
+    for image_name in ["a1", "b2", "c3", "missing"]:
+        expected = _scan_vinbrain_masks(dataset, image_name, (1, 64, 48))
+        actual = dataset.get_mask_dict(image_name, (1, 64, 48))
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_array_equal(actual[key], expected[key])
+
+
+def _kaggle_rle2mask(rle, width, height):
+    """The loop SIIM_Pneumothorax_Dataset decoded masks with before rle_decode."""
+    mask = np.zeros(width * height)
+    array = np.asarray([int(x) for x in rle.split()])
+    current_position = 0
+    for start, length in zip(array[0::2], array[1::2]):
+        current_position += start
+        mask[current_position:current_position + length] = 1
+        current_position += length
+    return mask.reshape(width, height).T
+
+
+def _random_rle(rng, width, height, num_runs=200):
+    starts = np.sort(rng.choice(width * height - 64, num_runs, replace=False))
+    lengths = np.minimum(rng.integers(0, 64, num_runs), np.diff(starts, append=width * height))
+    offsets = starts - np.concatenate([[0], (starts + lengths)[:-1]])
+    return " ".join(f"{offset} {length}" for offset, length in zip(offsets, lengths))
+
+
+@pytest.mark.parametrize("width,height", [(1024, 1024), (40, 24)])
+def test_rle_decode_matches_kaggle_loop(width, height):
+    rle = _random_rle(np.random.default_rng(0), width, height)
+    expected = _kaggle_rle2mask(rle, width, height)
+
+    mask = datasets.rle_decode(rle, width, height)
+    assert mask.dtype == np.uint8 and mask.shape == (height, width)
+    np.testing.assert_array_equal(mask, expected)
+
+    for size in [(height // 3, width // 2), (2 * height + 1, 3 * width)]:
+        resized = skimage.transform.resize(expected.astype(np.uint8), size, mode="constant", order=0, preserve_range=True)
+        np.testing.assert_array_equal(datasets.rle_decode(rle, width, height, size), resized)
+
+    assert not datasets.rle_decode("", width, height).any()
+
+
+def test_siim_masks_match_kaggle_loop(tmp_path):
+    rng = np.random.default_rng(1)
+    rles = [_random_rle(rng, 1024, 1024) for _ in range(3)]
+    csvpath = tmp_path / "train-rle.csv"
+    pd.DataFrame({"ImageId": ["a", "b", "a", "c"], " EncodedPixels": [rles[0], "-1", rles[1], rles[2]]}).to_csv(csvpath, index=False)
+    dataset = datasets.SIIM_Pneumothorax_Dataset(str(tmp_path), str(csvpath), pathology_masks=True)
+
+    assert dataset.get_pathology_mask_dict("b", 1024) == {}
+    # As before, the last mask listed for an image is the one returned
+    for image_name, rle in [("a", rles[1]), ("c", rles[2])]:
+        mask = dataset.get_pathology_mask_dict(image_name, 1024)[0]
+        assert mask.shape == (1, 1024, 1024)
+        np.testing.assert_array_equal(mask[0], _kaggle_rle2mask(rle, 1024, 1024))
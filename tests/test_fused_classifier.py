@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from AFG_Gumball.torchxrayvision.baseline_models import gumball
+from AFG_Gumball.torchxrayvision.baseline_models.gumball.model.classifier import Classifier, FusedClassifier
+
+
+def _cfg(**overrides):
+    with open(os.path.join(os.path.dirname(gumball.__file__), "config", "example.json")) as f:
+        cfg = json.load(f)
+    cfg.update(pretrained=False, **overrides)
+    return type("Cfg", (), cfg)
+
+
+def _randomize_heads(classifier):
+    generator = torch.Generator().manual_seed(0)
+    with torch.no_grad():
+        for index in range(len(classifier.cfg.num_classes)):
+            fc = getattr(classifier, f"fc_{index}")
+            fc.weight.normal_(0, 0.05, generator=generator)
+            fc.bias.normal_(0, 0.5, generator=generator)
+            bn = getattr(classifier, f"bn_{index}")
+            bn.weight.uniform_(0.5, 1.5, generator=generator)
+            bn.bias.normal_(0, 0.5, generator=generator)
+            bn.running_mean.normal_(0, 0.5, generator=generator)
+            bn.running_var.uniform_(0.5, 2, generator=generator)
+
+
+@pytest.mark.parametrize("global_pool", ["AVG_MAX", "AVG"])
+def test_fused_head_matches_classifier(global_pool):
+    torch.manual_seed(0)
+    classifier = Classifier(_cfg(global_pool=global_pool)).eval()
+    _randomize_heads(classifier)
+    fused = FusedClassifier(classifier)
+
+    x = torch.randn(2, 3, 128, 128)
+    with torch.inference_mode():
+        expected, _ = classifier(x)
+        logits, _ = fused(x)
+
+    assert len(logits) == len(expected)
+    for actual, reference in zip(logits, expected):
+        torch.testing.assert_close(actual, reference, rtol=1e-4, atol=1e-5)
+
+
+def test_fused_head_matches_checkpoint():
+    weights = os.path.expanduser(os.path.join("~", ".torchxrayvision", "models_data", "gumball-DenseNet121_pre_train.pth"))
+    if not os.path.isfile(weights):
+        pytest.skip("gumball DenseNet checkpoint not downloaded")
+
+    reference = gumball.DenseNet(fuse_heads=False, optimize=False)
+    fused = gumball.DenseNet()
+
+    x = torch.linspace(-1024, 1024, 2 * 512 * 512).view(2, 1, 512, 512)
+    with torch.inference_mode():
+        torch.testing.assert_close(fused(x), reference(x), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,143 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+
+from torch import nn
+
+from AFG_Gumball.xray_processing.enums import HeatmapFormat
+from AFG_Gumball.xray_processing.gradcam import GradCAM, compute_gradcam, compute_gradcams, find_target_layer, get_target_layer, render_heatmap
+
+
+class _TinyClassifier(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.backbone = nn.Sequential(
+            nn.Conv2d(1, 4, 3, padding=1),
+            nn.ReLU(),
+            nn.Conv2d(4, 8, 3, stride=2, padding=1),
+        )
+        self.fc = nn.Linear(8, 3)
+
+    def forward(self, x):
+        return self.fc(self.backbone(x).mean(dim=(2, 3)))
+
+
+class _TinyModel(nn.Module):
+    """Same layout as `baseline_models.gumball.DenseNet` (`model.model.backbone`)."""
+
+    def __init__(self):
+        super().__init__()
+        self.model = _TinyClassifier()
+
+    def forward(self, x):
+        return torch.sigmoid(self.model(x))
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    return _TinyModel().eval()
+
+
+@pytest.fixture
+def img_tensor():
+    torch.manual_seed(1)
+    return torch.rand(1, 1, 32, 32) * 2048 - 1024
+
+
+def test_no_residual_hooks(model, img_tensor):
+    target_layer = get_target_layer(model)
+
+    for _ in range(3):
+        compute_gradcam(model, img_tensor, 0)
+        compute_gradcams(model, img_tensor, [0, 1, 2])
+
+    with GradCAM(model) as engine:
+        engine.compute(img_tensor, [1])
+        assert len(target_layer._forward_hooks) == 1
+
+    assert len(target_layer._forward_hooks) == 0
+    assert len(target_layer._backward_hooks) == 0
+
+
+def test_target_layer_is_cached(model):
+    assert get_target_layer(model) is get_target_layer(model)
+    assert get_target_layer(model) is model.model.backbone[2]
+
+
+def test_batched_matches_single(model, img_tensor):
+    heatmaps = compute_gradcams(model, img_tensor, [0, 1, 2])
+
+    for idx, heatmap in heatmaps.items():
+        assert heatmap.shape == (32, 32, 3)
+        np.testing.assert_allclose(heatmap, compute_gradcam(model, img_tensor, idx), atol=1e-6)
+
+
+def test_fused_forward_matches_compute(model, img_tensor):
+    with GradCAM(model) as engine:
+        output, activations = engine.forward(img_tensor)
+
+    torch.testing.assert_close(output.detach(), model(img_tensor).detach())
+    assert engine.compute_from_forward(img_tensor, output, activations, []) == {}
+
+    heatmaps = engine.compute_from_forward(img_tensor, output, activations, [0, 2])
+    for idx, heatmap in heatmaps.items():
+        np.testing.assert_allclose(heatmap, compute_gradcam(model, img_tensor, idx), atol=1e-6)
+
+
+def test_compact_cam_renders_like_overlay(model, img_tensor):
+    overlays = compute_gradcams(model, img_tensor, [0, 1])
+    cams = compute_gradcams(model, img_tensor, [0, 1], HeatmapFormat.CAM_UINT8)
+
+    for idx, cam in cams.items():
+        assert cam.dtype == np.uint8 and cam.shape == (16, 16)
+        np.testing.assert_allclose(render_heatmap(cam, img_tensor), overlays[idx], atol=0.02)
+
+
+def test_batch_matches_per_image(model):
+    torch.manual_seed(2)
+    batch = torch.rand(3, 1, 32, 32) * 2048 - 1024
+    target_class_indices = [[0, 2], [], [1]]
+
+    with GradCAM(model) as engine:
+        output, activations = engine.forward(batch)
+    heatmaps = engine.compute_batch_from_forward(batch, output, activations, target_class_indices)
+
+    assert [list(h) for h in heatmaps] == target_class_indices
+    for n, indices in enumerate(target_class_indices):
+        expected = compute_gradcams(model, batch[n:n + 1], indices)
+        for idx in indices:
+            np.testing.assert_allclose(heatmaps[n][idx], expected[idx], atol=1e-6)
+
+
+def test_target_layer_with_or_without_data_parallel(model):
+    expected = model.model.backbone[2]
+    assert find_target_layer(model) is expected
+
+    model.model = nn.DataParallel(model.model)
+    assert find_target_layer(model) is expected
+
+
+_DEVICES = ["cpu", pytest.param("cuda", marks=pytest.mark.skipif(not torch.cuda.is_available(), reason="CUDA not available"))]
+
+
+@pytest.mark.parametrize("device", _DEVICES)
+@pytest.mark.parametrize("batched", [True, False])
+def test_gradients_on_model_device(model, img_tensor, monkeypatch, device, batched):
+    expected = compute_gradcams(model, img_tensor, [0, 2], HeatmapFormat.CAM_FLOAT16)
+
+    if not batched:
+        grad = torch.autograd.grad
+
+        def no_vmap(*args, is_grads_batched=False, **kwargs):
+            if is_grads_batched:
+                raise RuntimeError("vmap not supported")
+            return grad(*args, **kwargs)
+
+        # Force the sequential fallback of `_batched_gradients`
+        monkeypatch.setattr(torch.autograd, "grad", no_vmap)
+
+    heatmaps = compute_gradcams(model.to(device), img_tensor.to(device), [0, 2], HeatmapFormat.CAM_FLOAT16)
+    for idx in (0, 2):
+        np.testing.assert_allclose(heatmaps[idx], expected[idx], atol=1e-3)
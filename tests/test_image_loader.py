@@ -0,0 +1,70 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from torch import nn
+
+from AFG_Gumball.xray_processing import image_loader
+from AFG_Gumball.xray_processing.preprocessing import preprocess_xray
+
+
+def test_failed_images_are_reported_when_asked(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_loader, "get_model", lambda: nn.Identity())
+    missing = [str(tmp_path / "missing.png"), str(tmp_path / "also-missing.png")]
+
+    assert image_loader.process_xray_batch(missing) == [([], []), ([], [])]
+    results = image_loader.process_xray_batch(missing, return_exceptions=True)
+    assert all(isinstance(result, image_loader.ImageDecodeError) for result in results)
+    assert all(isinstance(result.__cause__, FileNotFoundError) for result in results)
+
+
+def test_model_load_failure_is_reported_for_every_image(monkeypatch):
+    def fail():
+        raise RuntimeError("no weights")
+
+    monkeypatch.setattr(image_loader, "get_model", fail)
+    images = [np.zeros((8, 8), dtype=np.uint8)] * 2
+
+    assert image_loader.process_xray_batch(images) == [([], []), ([], [])]
+    results = image_loader.process_xray_batch(images, return_exceptions=True)
+    assert [str(result) for result in results] == ["no weights", "no weights"]
+    # Not the image's fault: callers must not treat it as a bad upload
+    assert not any(isinstance(result, image_loader.ImageDecodeError) for result in results)
+
+
+@pytest.mark.parametrize("mode,extension", [("I;16", ".png"), ("L", ".jpg")])
+def test_ingest_matches_preprocess_xray(tmp_path, mode, extension):
+    y, x = np.mgrid[0:700, 0:600]
+    if mode == "I;16":
+        pixels = ((x + y) / 1298 * 65535).astype(np.uint16)
+    else:
+        pixels = ((x + y) / 1298 * 255).astype(np.uint8)
+    upload = tmp_path / f"upload{extension}"
+    Image.fromarray(pixels).save(upload)
+
+    tensor_path, display_path = tmp_path / "scan.npy", tmp_path / "scan.jpeg"
+    tensor = image_loader.ingest_xray_image(upload.read_bytes(), tensor_path, display_path)
+
+    expected = preprocess_xray(str(upload), 512)
+    torch.testing.assert_close(tensor, expected)
+    # Stored as float16: half a step at |x| <= 1024
+    torch.testing.assert_close(image_loader.load_analysis_tensor(tensor_path), expected, rtol=0, atol=0.5)
+
+    with Image.open(display_path) as display:
+        assert display.mode == "L" and min(display.size) >= 512
+        # The 16-bit gradient is stretched to the full 8-bit range, not clipped
+        assert display.getextrema()[1] > 250
+
+
+def test_analysis_tensor_round_trip(tmp_path):
+    tensor = torch.linspace(-1024, 1024, 512 * 512).reshape(1, 512, 512)
+    tensor_path = tmp_path / "scan.npy"
+    image_loader.save_analysis_tensor(tensor, tensor_path)
+
+    stored = np.load(tensor_path)
+    assert stored.dtype == np.float16 and stored.shape == (1, 512, 512)
+    loaded = image_loader.load_analysis_tensor(tensor_path)
+    assert loaded.dtype == torch.float32 and loaded.shape == (1, 512, 512)
+    torch.testing.assert_close(loaded, tensor, rtol=0, atol=0.5)
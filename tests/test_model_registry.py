@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch import nn
+
+from AFG_Gumball.xray_processing.model_utils import ModelRegistry
+
+
+class _SlowModel(nn.Module):
+    """Counts constructions; slow enough that concurrent callers overlap."""
+
+    instances = 0
+
+    def __init__(self, scale=1):
+        super().__init__()
+        type(self).instances += 1
+        time.sleep(0.05)
+        self.scale = scale
+        self.dropout = nn.Dropout()
+
+
+@pytest.fixture
+def model_cls():
+    return type("SlowModel", (_SlowModel,), {"instances": 0})
+
+
+def test_concurrent_get_constructs_once(model_cls):
+    registry = ModelRegistry()
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get(model_cls))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model_cls.instances == 1
+    assert all(model is models[0] for model in models)
+    stats = registry.stats()
+    assert (stats["misses"], stats["hits"], stats["loaded"]) == (1, 7, 1)
+
+
+def test_models_come_back_in_eval_mode(model_cls):
+    model = ModelRegistry().get(model_cls)
+    assert not model.training and not model.dropout.training
+
+
+def test_kwargs_give_separate_entries(model_cls):
+    registry = ModelRegistry()
+    default, scaled = registry.get(model_cls), registry.get(model_cls, scale=2)
+
+    assert default is not scaled and scaled.scale == 2
+    assert registry.get(model_cls, scale=2) is scaled
+    # One load time per cache key, readable and not overwritten by the other entry
+    assert sorted(registry.stats()["load_times"]) == [
+        f"{__name__.rsplit('.', 1)[-1]}.SlowModel()",
+        f"{__name__.rsplit('.', 1)[-1]}.SlowModel(scale=2)",
+    ]
+
+
+def test_clear_drops_models_and_counters(model_cls):
+    registry = ModelRegistry()
+    first = registry.get(model_cls)
+    registry.get(model_cls)
+    registry.clear()
+
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"], stats["loaded"], stats["load_times"]) == (0, 0, 0, {})
+    assert registry.get(model_cls) is not first
+    assert model_cls.instances == 2
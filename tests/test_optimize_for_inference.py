@@ -0,0 +1,61 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch import nn
+
+from AFG_Gumball.torchxrayvision.utils import optimize_for_inference
+from AFG_Gumball.torchxrayvision.baseline_models.gumball.model.backbone.inception import BasicConv2d
+from AFG_Gumball.torchxrayvision.baseline_models.gumball.ptsemseg.utils import conv2DBatchNormRelu
+
+
+def _randomize_batchnorms(model):
+    generator = torch.Generator().manual_seed(0)
+    with torch.no_grad():
+        for module in model.modules():
+            if isinstance(module, nn.BatchNorm2d):
+                module.weight.uniform_(0.5, 1.5, generator=generator)
+                module.bias.normal_(0, 0.5, generator=generator)
+                module.running_mean.normal_(0, 0.5, generator=generator)
+                module.running_var.uniform_(0.5, 2, generator=generator)
+    return model
+
+
+class _Blocks(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.stem = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU())
+        self.inception = BasicConv2d(8, 8, norm_type="BatchNorm", kernel_size=3, padding=1)
+        self.psp = conv2DBatchNormRelu(8, 4, 3, 1, 1, bias=False)
+        # Pre-activation: the BatchNorm follows the block input, not a conv,
+        # and the first ReLU would overwrite that input if it ran in place
+        self.pre = nn.Sequential(nn.ReLU(), nn.BatchNorm2d(4), nn.ReLU(), nn.Conv2d(4, 2, 1))
+
+    def forward(self, x):
+        return self.pre(self.psp(self.inception(self.stem(x))))
+
+
+@pytest.mark.parametrize("channels_last", [False, True])
+def test_optimized_model_is_equivalent(channels_last):
+    torch.manual_seed(0)
+    model = _randomize_batchnorms(_Blocks()).eval()
+    x = torch.randn(2, 3, 16, 16)
+    with torch.inference_mode():
+        expected = model(x)
+
+    optimize_for_inference(model, channels_last=channels_last)
+
+    assert model.inference_optimizations["folded_batchnorms"] == 3
+    assert model.inference_optimizations["inplace_relus"] == 2
+    assert isinstance(model.stem[1], nn.Identity) and isinstance(model.inception.norm, nn.Identity)
+    assert isinstance(model.pre[1], nn.BatchNorm2d)
+    assert not model.pre[0].inplace and model.pre[2].inplace
+    assert model.stem[0].weight.is_contiguous(memory_format=torch.channels_last) == channels_last
+
+    with torch.inference_mode():
+        torch.testing.assert_close(model(x), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_requires_eval_mode():
+    with pytest.raises(ValueError):
+        optimize_for_inference(_Blocks())
@@ -0,0 +1,135 @@
+import io
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+from AFG_Gumball.xray_processing.preprocessing import center_crop, decode_xray, normalize_, preprocess_xray, resize
+
+
+def _gradient(height, width, dtype=np.uint8, maxval=255):
+    y, x = np.mgrid[0:height, 0:width]
+    return ((x + y) / (height + width - 2) * maxval).astype(dtype)
+
+
+def test_sources_agree(tmp_path):
+    image = _gradient(300, 400)
+    path = tmp_path / "xray.png"
+    Image.fromarray(image).save(path)
+
+    from_path = preprocess_xray(str(path), 128)
+    from_bytes = preprocess_xray(path.read_bytes(), 128)
+    from_array = preprocess_xray(image, 128)
+
+    assert from_path.shape == (1, 128, 128) and from_path.dtype == torch.float32
+    assert torch.equal(from_path, from_bytes) and torch.equal(from_path, from_array)
+    assert -1024 <= from_path.min() and from_path.max() <= 1024
+
+
+def test_center_crop_before_resize():
+    image = _gradient(100, 300)
+    image[:, :100] = 0
+    image[:, 200:] = 255
+
+    # The side bands are cropped away instead of being squashed into the output
+    out = preprocess_xray(image, 50)
+    expected = preprocess_xray(np.ascontiguousarray(image[:, 100:200]), 50)
+    assert torch.equal(out, expected)
+
+
+def test_sixteen_bit_images_keep_their_range():
+    image = _gradient(200, 160, np.uint16, 65535)
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, "PNG")
+
+    decoded, maxval = decode_xray(buffer.getvalue())
+    assert decoded.dtype == np.uint16 and maxval == 65535
+    out = preprocess_xray(buffer.getvalue(), 64)
+    assert out.shape == (1, 64, 64)
+
+    # Same crop + bilinear resize done in float32: the uint16 resize may only differ
+    # by its integer rounding, one 16-bit step (2048 / 65535) after normalization
+    reference = normalize_(resize(center_crop(image.astype(np.float32)), 64), 65535)
+    np.testing.assert_allclose(out[0].numpy(), reference, rtol=0, atol=2048 / 65535)
+
+
+def test_plan_follows_model_metadata_and_skips_the_resize_fallback():
+    xrv = pytest.importorskip("AFG_Gumball.torchxrayvision")
+    from AFG_Gumball.xray_processing.preprocessing import plan_preprocessing
+
+    model = xrv.models.DenseNet(weights=None).eval()
+    plan = plan_preprocessing(model)
+    assert plan.resolution == model.resolution == 224
+
+    image = _gradient(300, 400)
+    before = xrv.utils.get_resize_fallback_count(model)
+    with torch.inference_mode():
+        model(plan(image)[None])
+    assert xrv.utils.get_resize_fallback_count(model) == before
+
+    with torch.inference_mode():
+        model(preprocess_xray(image, 256)[None])
+    assert xrv.utils.get_resize_fallback_count(model) == before + 1
+
+
+def _write_dicom(path, image, photometric="MONOCHROME2", bits_stored=12, signed=False):
+    pydicom = pytest.importorskip("pydicom")
+    from pydicom.dataset import FileDataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+    meta = FileMetaDataset()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    meta.MediaStorageSOPClassUID = generate_uid()
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+
+    ds = FileDataset(str(path), {}, file_meta=meta, preamble=b"\0" * 128)
+    ds.Rows, ds.Columns = image.shape
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit = 16, bits_stored, bits_stored - 1
+    ds.PixelRepresentation = int(signed)
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = photometric
+    ds.PixelData = image.astype(np.int16 if signed else np.uint16).tobytes()
+    ds.save_as(str(path), enforce_file_format=True)
+    return path
+
+
+def test_dicom_is_downsampled_before_float(tmp_path):
+    from AFG_Gumball.torchxrayvision import utils
+
+    image = _gradient(1200, 1024, np.uint16, 4095)
+    path = _write_dicom(tmp_path / "scan.dcm", image)
+
+    assert utils.read_xray_dcm_header(str(path)).Rows == 1200
+
+    decoded, maxval = decode_xray(str(path), 256)
+    assert decoded.dtype == np.uint16 and maxval == 4095
+    assert decoded.shape == (300, 256)  # Factor 4: short side stays >= 256
+    np.testing.assert_allclose(decoded, image.reshape(300, 4, 256, 4).mean(axis=(1, 3)), atol=1)
+
+    out = preprocess_xray(path.read_bytes(), 256)
+    assert out.shape == (1, 256, 256)
+
+
+def test_monochrome1_is_inverted(tmp_path):
+    image = _gradient(64, 64, np.uint16, 4095)
+    normal = preprocess_xray(str(_write_dicom(tmp_path / "m2.dcm", image)), 64)
+    inverted = preprocess_xray(str(_write_dicom(tmp_path / "m1.dcm", image, "MONOCHROME1")), 64)
+    np.testing.assert_allclose(normal.numpy(), -inverted.numpy(), atol=1e-3)
+
+
+def test_signed_dicom_is_shifted_to_unsigned(tmp_path):
+    from AFG_Gumball.torchxrayvision import utils
+
+    unsigned = _gradient(64, 64, np.uint16, 4095)
+    signed = unsigned.astype(np.int16) - 2048  # -2048..2047, the 12-bit signed range
+    path = _write_dicom(tmp_path / "signed.dcm", signed, signed=True)
+
+    decoded, maxval = utils.read_xray_dcm_uint(str(path))
+    assert decoded.dtype == np.uint16 and maxval == 4095
+    np.testing.assert_array_equal(decoded, unsigned)
+
+    out = utils.read_xray_dcm(str(path))
+    assert -1024 <= out.min() and out.max() <= 1024
+    np.testing.assert_allclose(out, utils.normalize(unsigned, 4095))
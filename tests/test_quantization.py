@@ -0,0 +1,87 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from torch import nn
+
+from AFG_Gumball.xray_processing.quantization import QuantizedModel, drift_report, quantize_model
+
+
+class _TinyClassifier(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.backbone = nn.Sequential(nn.Conv2d(3, 8, 3, padding=1), nn.BatchNorm2d(8), nn.ReLU(), nn.Conv2d(8, 8, 3))
+        self.fc = nn.Linear(8, 2)
+
+    def forward(self, x):
+        return self.fc(self.backbone(x).mean(dim=(2, 3)))
+
+
+class _TinyGumball(nn.Module):
+    """Same layout as `gumball.DenseNet`: a DataParallel-wrapped classifier with a `backbone`."""
+
+    weights_path = None
+    pathologies = ["A", "B"]
+    resolution = 32
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.model = nn.DataParallel(_TinyClassifier())
+        self.weights_filename_local = self.weights_path
+
+    def forward(self, x):
+        return torch.sigmoid(self.model(x.repeat(1, 3, 1, 1) / 512))
+
+
+def _images(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (48, 40), dtype=np.uint8) for _ in range(count)]
+
+
+@pytest.fixture
+def tiny_cls(tmp_path):
+    weights = tmp_path / "tiny.pth"
+    weights.write_bytes(b"")
+    return type("Tiny", (_TinyGumball,), {"weights_path": str(weights)})
+
+
+def test_quantized_model_stays_close_to_float(tiny_cls):
+    model = tiny_cls().eval()
+    quantized = quantize_model(model, _images(8))
+
+    assert not isinstance(model.model.module.backbone, torch.fx.GraphModule)  # original untouched
+
+    report = drift_report(model, quantized, _images(6, seed=1))
+    assert report["images"] == 6
+    assert set(report["pathologies"]) == {"A", "B"}
+    assert report["max_abs_diff"] < 0.05
+    assert 0 <= report["agreement"] <= 1
+
+
+def test_quantized_weights_are_saved_and_reloaded(tiny_cls, tmp_path, monkeypatch):
+    calibration_dir = tmp_path / "calibration"
+    calibration_dir.mkdir()
+    for i, image in enumerate(_images(4)):
+        Image.fromarray(image).save(calibration_dir / f"{i}.png")
+
+    calibrated = QuantizedModel(tiny_cls, calibration_dir=calibration_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("calibrated twice")
+
+    monkeypatch.setattr("AFG_Gumball.xray_processing.quantization.quantize_model", fail)
+    reloaded = QuantizedModel(tiny_cls)
+
+    x = torch.randn(2, 1, 32, 32) * 500
+    with torch.inference_mode():
+        torch.testing.assert_close(reloaded(x), calibrated(x))
+    assert reloaded.pathologies == ["A", "B"]
+
+
+def test_missing_quantized_weights_need_calibration_images(tiny_cls, monkeypatch):
+    monkeypatch.delenv("GUMBALL_CALIBRATION_DIR", raising=False)
+    with pytest.raises(FileNotFoundError):
+        QuantizedModel(tiny_cls)
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+
+from torch import nn
+
+from AFG_Gumball.xray_processing import segmentation
+from AFG_Gumball.xray_processing.enums import BodyPart
+
+
+class _CountingSegmenter(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.head = nn.Conv2d(1, segmentation.NUM_BODY_PARTS, 1)
+
+    def forward(self, x):
+        self.calls += 1
+        return self.head(x)
+
+
+@pytest.fixture
+def seg_model(monkeypatch):
+    torch.manual_seed(0)
+    model = _CountingSegmenter().eval()
+    monkeypatch.setattr(segmentation, "get_segmentation_model", lambda **kwargs: model)
+    monkeypatch.setattr(segmentation, "segmentation_service", segmentation.SegmentationService(cache_size=2))
+    return model
+
+
+def test_parts_of_one_image_share_a_forward_pass(seg_model):
+    image = torch.randn(1, 512, 512)
+    parts = [BodyPart.HEART, BodyPart.LEFT_LUNG, BodyPart.RIGHT_LUNG, BodyPart.MEDIASTINUM]
+
+    segments = segmentation.get_body_part_segments(image, parts)
+    single = segmentation.get_body_part_segment(image.clone(), BodyPart.HEART)
+
+    assert seg_model.calls == 1
+    assert list(segments) == parts
+    assert torch.equal(single, segments[BodyPart.HEART])
+
+
+def test_label_map_is_argmax(seg_model):
+    image = torch.randn(1, 512, 512)
+    label_map = segmentation.get_label_map(image, threshold=None)
+    segments = segmentation.get_body_part_segments(image)
+
+    assert label_map.dtype == torch.uint8 and label_map.shape == (512, 512)
+    assert torch.equal(label_map.long(), torch.stack(list(segments.values())).argmax(dim=0))
+
+
+def test_cache_is_bounded(seg_model):
+    images = [torch.randn(1, 512, 512) for _ in range(3)]
+    for image in images:
+        segmentation.get_label_map(image)
+    segmentation.get_label_map(images[0])
+
+    assert seg_model.calls == 4
+    assert segmentation.segmentation_service.stats()["cached"] == 2
+
+
+def test_concurrent_misses_share_a_forward_pass(seg_model, monkeypatch):
+    forward = seg_model.forward
+
+    def slow_forward(x):
+        time.sleep(0.05)
+        return forward(x)
+
+    monkeypatch.setattr(seg_model, "forward", slow_forward)
+    image = torch.randn(1, 512, 512)
+    outputs = []
+    threads = [
+        threading.Thread(target=lambda: outputs.append(segmentation.segmentation_service.segment(image.clone())))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seg_model.calls == 1
+    assert all(output is outputs[0] for output in outputs)
+    stats = segmentation.segmentation_service.stats()
+    assert (stats["misses"], stats["hits"]) == (1, 5)
+    assert not segmentation.segmentation_service._key_locks
+
+
+def test_label_map_regions():
+    label_map = np.full((64, 64), segmentation.BACKGROUND_LABEL, dtype=np.uint8)
+    label_map[10:20, 5:15] = BodyPart.LEFT_LUNG.value
+    label_map[12:40, 30:50] = BodyPart.HEART.value
+
+    regions = segmentation.label_map_regions(label_map)
+
+    assert regions == {
+        "LEFT_LUNG": {"area": 100, "bbox": [5, 10, 14, 19]},
+        "HEART": {"area": 560, "bbox": [30, 12, 49, 39]},
+    }
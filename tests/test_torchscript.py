@@ -0,0 +1,71 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from torch import nn
+
+from AFG_Gumball.torchxrayvision import utils
+from AFG_Gumball.xray_processing.torchscript import ScriptedModel
+
+
+class _TinyGumball(nn.Module):
+    """Same interface as the gumball models (weights file, metadata, 1-channel input)."""
+
+    weights_path = None
+    pathologies = ["A", "B"]
+    resolution = 32
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = nn.Conv2d(3, 4, 3)
+        self.bn = nn.BatchNorm2d(4)
+        self.fc = nn.Linear(4, 2)
+        self.weights_filename_local = self.weights_path
+
+    def forward(self, x):
+        x = utils.fix_resolution(x, self.resolution, self)
+        x = x.repeat(1, 3, 1, 1) / 512
+        return torch.sigmoid(self.fc(self.bn(self.conv(x)).mean(dim=(2, 3))))
+
+
+@pytest.fixture
+def tiny_cls(tmp_path):
+    weights = tmp_path / "tiny.pth"
+    weights.write_bytes(b"")
+    return type("Tiny", (_TinyGumball,), {"weights_path": str(weights)})
+
+
+def test_scripted_model_matches_eager_for_any_batch_size(tiny_cls):
+    eager = tiny_cls().eval()
+    scripted = ScriptedModel(tiny_cls)
+
+    assert scripted.pathologies == eager.pathologies and scripted.resolution == 32
+    for batch_size in (1, 4):
+        x = torch.randn(batch_size, 1, 32, 32) * 500
+        with torch.inference_mode():
+            torch.testing.assert_close(scripted(x), eager(x))
+
+
+def test_artifact_is_reused(tiny_cls, monkeypatch):
+    ScriptedModel(tiny_cls)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("exported twice")
+
+    monkeypatch.setattr("AFG_Gumball.xray_processing.torchscript.export_torchscript", fail)
+    ScriptedModel(tiny_cls)
+
+
+def test_non_native_input_is_resized_like_eager(tiny_cls):
+    eager = tiny_cls().eval()
+    scripted = ScriptedModel(tiny_cls)
+
+    x = torch.randn(2, 1, 48, 48) * 500
+    before = utils.get_resize_fallback_count(scripted)
+    with torch.inference_mode():
+        torch.testing.assert_close(scripted(x), eager(x))
+    assert utils.get_resize_fallback_count(scripted) == before + 1
+
+    with pytest.raises(Exception, match="Height and width"):
+        scripted(torch.randn(1, 1, 32, 48))
@@ -0,0 +1,66 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+torch = pytest.importorskip("torch")
+Image = pytest.importorskip("PIL.Image")
+
+from AFG_Gumball.torchxrayvision import datasets, utils
+
+
+def _png(value):
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((16, 16), value, dtype=np.uint8)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Stored and deflated members, one of them with an extra field in its headers."""
+    path = tmp_path / "images.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for i in range(6):
+            info = zipfile.ZipInfo(f"train/{i}.png")
+            info.compress_type = zipfile.ZIP_DEFLATED if i % 2 else zipfile.ZIP_STORED
+            if i == 4:
+                info.extra = b"\xfe\xca\x04\x00abcd"
+            zf.writestr(info, _png(10 * (i + 1)))
+    return str(path)
+
+
+def test_zip_handle_is_reused_and_reopened_after_fork(archive, monkeypatch):
+    handle = utils.open_zip(archive)
+    assert utils.open_zip(archive) is handle
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    reopened = utils.open_zip(archive)
+    assert reopened is not handle
+    assert reopened.read("train/0.png") == handle.read("train/0.png")
+
+
+def test_mmap_reads_match_zipfile(archive):
+    offsets = utils.zip_member_offsets(archive)
+    assert sorted(offsets) == ["train/0.png", "train/2.png", "train/4.png"]
+
+    with zipfile.ZipFile(archive) as zf:
+        for name in zf.namelist():
+            assert utils.read_zip_member(archive, name, use_mmap=True) == zf.read(name)
+            assert utils.read_zip_member(archive, name) == zf.read(name)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_objectcxr_reads_through_worker_handles(archive, tmp_path, use_mmap):
+    csvpath = tmp_path / "train.csv"
+    pd.DataFrame({"image_name": [f"{i}.png" for i in range(6)], "annotation": ["0 1 2 3 4", None] * 3}).to_csv(csvpath, index=False)
+    dataset = datasets.ObjectCXR_Dataset(archive, str(csvpath), use_mmap=use_mmap)
+
+    loader = torch.utils.data.DataLoader(dataset, batch_size=2, num_workers=2)
+    images = torch.cat([batch["img"] for batch in loader])
+    for i in range(6):
+        expected = datasets.normalize(np.full((16, 16), 10 * (i + 1)), 255, reshape=True)
+        np.testing.assert_allclose(images[i].numpy(), expected, rtol=1e-6)
+        np.testing.assert_allclose(dataset[i]["img"], expected, rtol=1e-6)